@@ -0,0 +1,20 @@
+import click
+from .usage import rebuild_usage
+from .room_catalog import sync_rooms, sync_blackouts
+
+
+def register_commands(app):
+    """Register maintenance commands with the Flask CLI."""
+
+    @app.cli.command("rebuild-usage-rollup")
+    def rebuild_usage_rollup():
+        """Rebuild the room_usage_daily rollup from reservations and series."""
+        buckets = rebuild_usage()
+        click.echo(f"Usage rollup rebuilt with {buckets} daily buckets.")
+
+    @app.cli.command("sync-room-catalog")
+    def sync_room_catalog():
+        """Replace the room and blackout period replicas with snapshots from room-service."""
+        rooms = sync_rooms()
+        blackouts = sync_blackouts()
+        click.echo(f"Room catalog synchronized with {rooms} rooms and {blackouts} blackout periods.")
@@ -3,47 +3,220 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
+from contextlib import contextmanager
 import os
+import time
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
+smtp_pool = None
+smtp_pool_lock = threading.Lock()
+
+# Errors after which an SMTP connection cannot be reused
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP connections that are kept alive between messages.
+
+    Connections idle for longer than `idle_timeout` seconds are closed instead of reused, and
+    connections idle for longer than `health_check_after` seconds are probed with NOOP first.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_size=4, idle_timeout=60, health_check_after=5, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle = []  # (connection, last used) pairs, most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self):
+        now = time.monotonic()
+        server, expired = None, []
+        with self._lock:
+            while self._idle:
+                candidate, last_used = self._idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    server, idle = candidate, now - last_used
+                    break
+                expired.append(candidate)
+        for candidate in expired:
+            self._close(candidate)
+
+        if server is None:
+            return self._connect()
+        if idle > self.health_check_after:
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            server.close()
+            return self._connect()
+        return server
+
+    def _checkin(self, server):
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless it failed at the connection level."""
+        with self._slots:
+            server = self._checkout()
+            try:
+                yield server
+            except CONNECTION_ERRORS:
+                server.close()
+                raise
+            except Exception:
+                self._checkin(server)
+                raise
+            else:
+                self._checkin(server)
+
+    def send(self, msg, to_addrs):
+        """Send one message, reconnecting once if a pooled connection went stale.
+
+        Returns the dict of refused recipients (empty when everyone was accepted).
+        """
+        for attempt in range(2):
+            try:
+                with self.connection() as server:
+                    return server.send_message(msg, to_addrs=to_addrs)
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+
+    def close(self):
+        with self._lock:
+            for server, _ in self._idle:
+                self._close(server)
+            self._idle = []
+
+
+def get_smtp_pool():
+    """Initializes and returns the shared SMTPConnectionPool, or None if email is not configured."""
+    global smtp_pool
+    with smtp_pool_lock:
+        if smtp_pool is None:
+            email_host = os.getenv('EMAIL_HOST')
+            if not email_host or not os.getenv('EMAIL_FROM'):
+                logger.error("Email configuration is incomplete.")
+                return None
+            smtp_pool = SMTPConnectionPool(
+                host=email_host,
+                port=int(os.getenv('EMAIL_PORT', 587)),
+                username=os.getenv('EMAIL_USERNAME'),
+                password=os.getenv('EMAIL_PASSWORD'),
+                use_tls=os.getenv('EMAIL_USE_TLS', 'true').lower() == 'true',
+                max_size=int(os.getenv('EMAIL_POOL_SIZE', 4)),
+                idle_timeout=float(os.getenv('EMAIL_POOL_IDLE_TIMEOUT', 60))
+            )
+    return smtp_pool
+
+
+def close_smtp_pool():
+    """Close all pooled SMTP connections."""
+    global smtp_pool
+    with smtp_pool_lock:
+        if smtp_pool:
+            smtp_pool.close()
+            smtp_pool = None
+
+
+def build_message(to_emails, subject, body, attachment=None, attachment_name=None):
+    """Build a MIME message with an optional attachment.
+
+    A message for several recipients does not list them: they are only given in the SMTP envelope,
+    as for Bcc, so recipients of one batch never see each other's addresses.
+    """
+    msg = MIMEMultipart()
+    msg['From'] = os.getenv('EMAIL_FROM')
+    msg['To'] = to_emails[0] if len(to_emails) == 1 else 'undisclosed-recipients:;'
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+
+    # Attach the file if provided
+    if attachment and attachment_name:
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(attachment)
+        encoders.encode_base64(part)
+        part.add_header('Content-Disposition', f'attachment; filename="{attachment_name}"')
+        msg.attach(part)
+    return msg
+
 
 def send_email(to_email, subject, body, attachment=None, attachment_name=None):
-    """Send an email using SMTP with an optional attachment."""
+    """Send an email over a pooled SMTP connection with an optional attachment."""
+    return not send_email_batch([to_email], subject, body, attachment, attachment_name)
+
+
+def send_email_batch(to_emails, subject, body, attachment=None, attachment_name=None):
+    """Send one message to many recipients in a single SMTP transaction, without disclosing them to each other.
+
+    Returns the recipients the message could not be delivered to (empty on success).
+    """
+    pool = get_smtp_pool()
+    if not pool:
+        return list(to_emails)
     try:
-        email_host = os.getenv('EMAIL_HOST')
-        email_port = int(os.getenv('EMAIL_PORT', 587))
-        email_username = os.getenv('EMAIL_USERNAME')
-        email_password = os.getenv('EMAIL_PASSWORD')
-        email_from = os.getenv('EMAIL_FROM')
-
-        if not all([email_host, email_port, email_username, email_password, email_from]):
-            logger.error("Email configuration is incomplete.")
-            return False
-
-        # Set up the email
-        msg = MIMEMultipart()
-        msg['From'] = email_from
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        # Attach the file if provided
-        if attachment and attachment_name:
-            part = MIMEBase('application', 'octet-stream')
-            part.set_payload(attachment)
-            encoders.encode_base64(part)
-            part.add_header('Content-Disposition', f'attachment; filename="{attachment_name}"')
-            msg.attach(part)
-
-        # Connect to the SMTP server and send the email
-        with smtplib.SMTP(email_host, email_port) as server:
-            server.starttls()
-            server.login(email_username, email_password)
-            server.send_message(msg)
+        msg = build_message(to_emails, subject, body, attachment, attachment_name)
+        refused = pool.send(msg, to_addrs=list(to_emails))
+        for recipient, error in refused.items():
+            logger.error(f"Failed to send email to {recipient}: {error}")
+        logger.info(f"Email sent to {len(to_emails) - len(refused)} recipient(s)")
+        return list(refused)
+    except Exception as e:
+        logger.error(f"Failed to send email to {', '.join(to_emails)}: {e}")
+        return list(to_emails)
+
 
-        logger.info(f"Email sent to {to_email}")
-        return True
+def send_messages(messages):
+    """Send many messages over one pooled SMTP connection.
+
+    `messages` is a list of dicts with the send_email arguments. Returns one bool per message.
+    """
+    pool = get_smtp_pool()
+    if not pool:
+        return [False] * len(messages)
+    results = []
+    try:
+        with pool.connection() as server:
+            for message in messages:
+                try:
+                    msg = build_message([message['to_email']], message['subject'], message['body'],
+                                        message.get('attachment'), message.get('attachment_name'))
+                    server.send_message(msg)
+                    results.append(True)
+                except CONNECTION_ERRORS:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to send email to {message['to_email']}: {e}")
+                    results.append(False)
     except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {e}")
-        return False
+        logger.error(f"SMTP connection failed after {len(results)} of {len(messages)} messages: {e}")
+    return results + [False] * (len(messages) - len(results))
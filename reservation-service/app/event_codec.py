@@ -0,0 +1,130 @@
+"""Encoding of reservation events on the Kafka topic.
+
+Events are published either as JSON or as a compact MessagePack envelope. The format is announced
+in the record headers: a consumer reads `content-type` and `schema-version` and treats records
+without them as JSON, so old and new producers can share a topic.
+
+The compact format drops the payload keys: payload values are written positionally in the field
+order of a registered schema, and ISO timestamps become integer microseconds since the epoch.
+Events the schema cannot represent exactly are published as JSON instead.
+This module is copied in reservation-service (producer) and user-service (consumer); keep both in sync.
+"""
+import json
+from datetime import datetime, timedelta
+
+import msgpack
+
+CONTENT_TYPE_HEADER = 'content-type'
+SCHEMA_VERSION_HEADER = 'schema-version'
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/vnd.reservation-event+msgpack'
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Schema registry stand-in. A version is never edited once published: add a new one, deploy the
+# consumers, then point SCHEMA_VERSION at it. Payload fields that may be absent must come last.
+SCHEMAS = {
+    1: {
+        'event_types': (
+            'RESERVATION_CREATED', 'RESERVATION_UPDATED', 'RESERVATION_DELETED',
+            'RESERVATION_SERIES_CREATED', 'RESERVATION_SERIES_DELETED',
+        ),
+        'reservation': (
+            'id', 'user_id', 'room_id', 'start_time', 'end_time', 'purpose', 'num_attendees',
+            'description', 'attendees', 'series_id', 'created_at', 'updated_at',
+            'occurrence_start',  # Only on series occurrences
+        ),
+        'series': (
+            'id', 'user_id', 'room_id', 'rrule', 'start_time', 'duration', 'purpose', 'num_attendees',
+            'description', 'attendees', 'exceptions', 'created_at', 'updated_at',
+        ),
+        'timestamps': {'start_time', 'end_time', 'created_at', 'updated_at', 'occurrence_start'},
+    },
+}
+SCHEMA_VERSION = 1  # Version written by this producer
+
+
+class EventDecodeError(ValueError):
+    """A record that cannot be decoded into an event."""
+
+
+def _fields(schema, event_type):
+    return schema['series'] if event_type.startswith('RESERVATION_SERIES_') else schema['reservation']
+
+
+def _encode_timestamp(value):
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None or parsed.isoformat() != value:
+        raise ValueError(f"Timestamp {value!r} does not round-trip")
+    return (parsed - EPOCH) // MICROSECOND
+
+
+def _decode_timestamp(value):
+    return None if value is None else (EPOCH + value * MICROSECOND).isoformat()
+
+
+def encode_compact(event, version=SCHEMA_VERSION):
+    """Encode an event as [id, event type index, payload values]. Raises ValueError if it does not fit the schema."""
+    schema = SCHEMAS[version]
+    event_type, payload = event['type'], event['payload']
+    if event_type not in schema['event_types']:
+        raise ValueError(f"Event type {event_type} is not in schema {version}")
+    fields = _fields(schema, event_type)
+    unknown = set(payload) - set(fields)
+    if unknown:
+        raise ValueError(f"Fields {sorted(unknown)} are not in schema {version}")
+
+    present = [field for field in fields if field in payload]
+    if fields[:len(present)] != tuple(present):
+        raise ValueError("Only trailing schema fields may be absent")
+    values = [
+        _encode_timestamp(payload[field]) if field in schema['timestamps'] else payload[field]
+        for field in present
+    ]
+    return msgpack.packb([event['id'], schema['event_types'].index(event_type), values], use_bin_type=True)
+
+
+def decode_compact(data, version):
+    schema = SCHEMAS[version]
+    event_id, type_index, values = msgpack.unpackb(data, raw=False)
+    event_type = schema['event_types'][type_index]
+    payload = {
+        field: _decode_timestamp(value) if field in schema['timestamps'] else value
+        for field, value in zip(_fields(schema, event_type), values)
+    }
+    return {"id": event_id, "type": event_type, "payload": payload}
+
+
+def encode_event(event, encoding='msgpack'):
+    """Serialize an event for Kafka. Returns (value bytes, record headers)."""
+    if encoding == 'msgpack':
+        try:
+            return encode_compact(event), [
+                (CONTENT_TYPE_HEADER, MSGPACK_CONTENT_TYPE.encode()),
+                (SCHEMA_VERSION_HEADER, str(SCHEMA_VERSION).encode()),
+            ]
+        except ValueError:
+            pass  # Not representable in the schema: JSON keeps every field
+    return json.dumps(event).encode('utf-8'), [(CONTENT_TYPE_HEADER, JSON_CONTENT_TYPE.encode())]
+
+
+def decode_event(data, headers=None):
+    """Deserialize a record value using its headers; records without a content type are JSON."""
+    headers = dict(headers or [])
+    content_type = headers.get(CONTENT_TYPE_HEADER, JSON_CONTENT_TYPE.encode()).decode()
+    try:
+        if content_type == MSGPACK_CONTENT_TYPE:
+            version = int(headers.get(SCHEMA_VERSION_HEADER, b'0'))
+            if version not in SCHEMAS:
+                raise EventDecodeError(f"Unknown schema version {version}")
+            return decode_compact(data, version)
+        if content_type == JSON_CONTENT_TYPE:
+            return json.loads(data.decode('utf-8'))
+    except EventDecodeError:
+        raise
+    except (ValueError, TypeError, IndexError, msgpack.UnpackException) as e:
+        raise EventDecodeError(f"Undecodable {content_type} record: {e!r}") from e
+    raise EventDecodeError(f"Unsupported content type {content_type}")
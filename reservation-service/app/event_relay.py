@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import func, text
+
+from .event_bus import EventBusError
+from .event_codec import encode_event
+from .kafka_producer import get_kafka_producer, close_kafka_producer
+from .models import db, EventOutbox
+
+logger = logging.getLogger(__name__)
+stop_event = threading.Event()
+
+RELAY_LOCK_ID = 72_310_001  # Advisory lock taken per batch: one relay publishes at a time, in id order
+
+# Relay metrics (exposed by run_event_relay.py)
+PENDING_EVENTS = Gauge('outbox_pending_events', 'Events committed to the outbox and not yet published')
+RELAY_LAG = Gauge('outbox_lag_seconds', 'Age of the oldest unpublished event in the outbox')
+EVENTS_PUBLISHED = Counter('outbox_events_published_total', 'Events published from the outbox', ['topic'])
+BYTES_PUBLISHED = Counter('outbox_published_bytes_total', 'Encoded event bytes sent to the broker (before compression)', ['topic'])
+PUBLISH_FAILURES = Counter('outbox_publish_failures_total', 'Outbox events the broker did not acknowledge')
+PUBLISH_LATENCY = Histogram(
+    'outbox_publish_latency_seconds', 'Time from queueing an event to its acknowledgement by the broker',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+)
+BATCH_SIZE = Histogram('outbox_batch_size', 'Events published per relay batch', buckets=(1, 10, 50, 100, 250, 500, 1000))
+
+
+def publish_batch(producer, batch_size, send_timeout):
+    """Publish up to `batch_size` undelivered events in id order and mark them delivered.
+
+    Returns the number of events published. Events are marked delivered only up to the first one
+    the broker did not acknowledge, so nothing is skipped; later events of a failed batch may be
+    published again, and consumers drop duplicates by event id.
+    """
+    if not db.session.execute(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": RELAY_LOCK_ID}).scalar():
+        db.session.rollback()  # Another relay is publishing
+        return 0
+    rows = EventOutbox.query.filter(EventOutbox.delivered_at.is_(None)).order_by(EventOutbox.id).limit(batch_size).all()
+    if not rows:
+        db.session.commit()
+        return 0
+
+    encoding = current_app.config['KAFKA_EVENT_ENCODING']
+    futures = []
+    for row in rows:
+        value, headers = encode_event(row.to_event(), encoding)
+        futures.append(producer.send(row.topic, key=row.key.encode('utf-8') if row.key else None, value=value, headers=headers))
+        BYTES_PUBLISHED.labels(row.topic).inc(len(value))
+    producer.flush(timeout=send_timeout)
+    delivered = []
+    for row, future in zip(rows, futures):
+        try:
+            future.get(timeout=send_timeout)
+        except EventBusError as e:
+            PUBLISH_FAILURES.inc()
+            logger.error(f"Failed to publish outbox event {row.id} ({row.event_type}): {e}")
+            break
+        delivered.append(row)
+
+    now = datetime.utcnow()
+    published = [(row.topic, row.created_at) for row in delivered]  # Read before the commit expires the rows
+    if delivered:
+        EventOutbox.query.filter(EventOutbox.id.in_([row.id for row in delivered])).update(
+            {'delivered_at': now}, synchronize_session=False
+        )
+    db.session.commit()
+
+    for topic, created_at in published:
+        EVENTS_PUBLISHED.labels(topic).inc()
+        PUBLISH_LATENCY.observe((now - created_at).total_seconds())
+    BATCH_SIZE.observe(len(delivered))
+    logger.debug(f"Published {len(delivered)} of {len(rows)} outbox events")
+    return len(delivered)
+
+
+def update_lag_metrics():
+    pending, oldest = db.session.query(func.count(EventOutbox.id), func.min(EventOutbox.created_at)).filter(
+        EventOutbox.delivered_at.is_(None)
+    ).one()
+    db.session.commit()
+    PENDING_EVENTS.set(pending)
+    RELAY_LAG.set((datetime.utcnow() - oldest).total_seconds() if oldest else 0)
+
+
+def purge_delivered(retention):
+    """Delete events delivered more than `retention` ago."""
+    deleted = EventOutbox.query.filter(EventOutbox.delivered_at < datetime.utcnow() - retention).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    if deleted:
+        logger.info(f"Purged {deleted} delivered outbox events")
+
+
+def run_relay(app, batch_size=500, poll_interval=0.2, send_timeout=30, retention_hours=24,
+              metrics_interval=5, purge_interval=3600):
+    """Publish outbox events to Kafka until stop_relay() is called."""
+    retention = timedelta(hours=retention_hours)
+    next_metrics_at = next_purge_at = 0
+    with app.app_context():
+        logger.info(f"Event relay started with batch size {batch_size}")
+        while not stop_event.is_set():
+            try:
+                now = time.monotonic()
+                if now >= next_metrics_at:
+                    update_lag_metrics()
+                    next_metrics_at = now + metrics_interval
+                if now >= next_purge_at:
+                    purge_delivered(retention)
+                    next_purge_at = now + purge_interval
+
+                producer = get_kafka_producer()
+                if producer is None:
+                    stop_event.wait(10)  # Broker not reachable yet; events wait in the outbox
+                    continue
+                if publish_batch(producer, batch_size, send_timeout) < batch_size:
+                    stop_event.wait(poll_interval)  # Caught up
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error in event relay loop: {e}", exc_info=True)
+                stop_event.wait(poll_interval)
+        close_kafka_producer()
+        logger.info("Event relay stopped.")
+
+
+def stop_relay(*_):
+    """Signal the relay loop to stop after the current batch."""
+    stop_event.set()
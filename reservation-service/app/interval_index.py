@@ -0,0 +1,56 @@
+import bisect
+from datetime import datetime, timezone
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(value):
+    """Convert a (naive UTC or aware) datetime to seconds since the epoch."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH).total_seconds()
+
+
+class RoomIntervals:
+    """Sorted [start, end) intervals of a single room.
+
+    Only holds the intervals of one request (bulk items, candidates of a series); stored
+    reservations are always checked in the database.
+
+    Intervals are kept in three parallel lists ordered by start time. The
+    longest interval ever stored bounds how far back an overlapping interval
+    can start, so a lookup is a bisect plus a scan over that window only.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_length = 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, reservation_id, start, end):
+        position = bisect.bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, reservation_id)
+        self.max_length = max(self.max_length, end - start)
+
+    def find_overlap(self, start, end, exclude_id=None):
+        """Return the id of an interval overlapping [start, end), or None."""
+        # Anything starting at or after `end` cannot overlap, and anything
+        # starting before `start - max_length` has already ended.
+        low = bisect.bisect_right(self.starts, start - self.max_length)
+        high = bisect.bisect_left(self.starts, end)
+        for position in range(low, high):
+            if self.ends[position] > start and self.ids[position] != exclude_id:
+                return self.ids[position]
+        return None
+
+    def find_overlaps(self, start, end):
+        """Return the ids of every interval overlapping [start, end), in start order."""
+        low = bisect.bisect_right(self.starts, start - self.max_length)
+        high = bisect.bisect_left(self.starts, end)
+        return [self.ids[position] for position in range(low, high) if self.ends[position] > start]
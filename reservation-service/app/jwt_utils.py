@@ -1,8 +1,12 @@
 import jwt
 from datetime import datetime, timedelta
-from flask import current_app, jsonify, request
+from flask import current_app, jsonify, request, g
 import requests
 import os
+from .service_client import get_service_client  # Pooled, timeout-bounded client for other services
+from .user_cache import user_cache
+from .token_cache import token_cache  # Verified claims of recently seen tokens
+from .room_catalog import get_room
 from functools import wraps  # Add this import
 
 # Define JWT secret key directly instead of importing
@@ -31,18 +35,33 @@ def generate_token(user_id):
         return None
 
 # Function to decode JWT token
-def decode_token(token):
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
-        return payload['sub'] # Return user_id
-    except jwt.ExpiredSignatureError:
-        current_app.logger.warning("Token expired.")
-        return None
-    except jwt.InvalidTokenError:
+def decode_claims(token):
+    """Return the verified claims of an access token, or None if it is invalid, expired or a refresh token.
+
+    Tokens verified before are served from the token cache until they expire.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            current_app.logger.warning("Token expired.")
+            return None
+        except jwt.InvalidTokenError:
+            current_app.logger.warning("Invalid token.")
+            return None
+        token_cache.set(token, payload)
+    if payload.get('type', 'access') != 'access' or not payload.get('sub'):
         current_app.logger.warning("Invalid token.")
         return None
+    return payload
+
+def decode_token(token):
+    claims = decode_claims(token)
+    return claims['sub'] if claims else None # Return user_id
 
 def token_required(f):
+    """Verify the bearer access token and expose its claims as `g.claims`."""
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -56,25 +75,37 @@ def token_required(f):
         if not token:
             return jsonify({"message": "Token is missing"}), 401
 
-        user_id = decode_token(token)
-        if not user_id:
+        claims = decode_claims(token)
+        if not claims:
             return jsonify({"message": "Token is invalid or expired"}), 401
 
+        g.claims = claims
         # Pass user_id and token to the decorated function
-        return f(user_id, token, *args, **kwargs)
+        return f(claims['sub'], token, *args, **kwargs)
 
     return decorated
 
 # Function to fetch user details (optional, could be used for validation)
 def get_user_details(user_id, token):
-    user_service_url = os.getenv("USER_SERVICE_URL", "http://user-service:5000")
+    # Access tokens carry the role and profile claims: no lookup at all
+    claims = g.get('claims') or {}
+    if claims.get('sub') == user_id and claims.get('role'):
+        return {"id": user_id, "email": claims.get('email'), "full_name": claims.get('full_name'), "role": claims['role']}
+
+    # Tokens issued before claims were added: served from the local cache when possible,
+    # entries are invalidated by user-service events
+    details = user_cache.get(user_id)
+    if details is not None:
+        return details
+
     headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.get(f"{user_service_url}/users/me", headers=headers)
+        response = get_service_client("user-service").get("/users/me", headers=headers)
         response.raise_for_status()
         details = response.json()
         # Ensure the ID from the token matches the ID returned by the service
         if details.get('id') == user_id:
+            user_cache.set(user_id, details)
             return details
         else:
             current_app.logger.error(f"User ID mismatch: token({user_id}) != service({details.get('id')})")
@@ -88,14 +119,7 @@ def get_user_details(user_id, token):
 
 # Function to fetch room details (optional, could be used for validation)
 def get_room_details(room_id, token):
-    room_service_url = os.getenv("ROOM_SERVICE_URL", "http://room-service:5001")
-    headers = {"Authorization": f"Bearer {token}"} # Pass token to room service
-    try:
-        response = requests.get(f"{room_service_url}/rooms/{room_id}", headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"Failed to fetch room details from room-service: {e}")
-        return None
+    # Served from the local room catalog replica; unknown rooms are read through from room-service
+    return get_room(room_id, token)
 
 # ... potentially other utility functions ...
@@ -1,75 +1,52 @@
-import json
 import logging
-from kafka import KafkaProducer
-from kafka.errors import KafkaError
 from flask import current_app
 
+from .event_bus import EventBusError, get_event_bus
+
 logger = logging.getLogger(__name__)
 producer = None
 
 def get_kafka_producer():
-    """Initializes and returns a KafkaProducer instance."""
+    """Initializes and returns the event bus producer (a KafkaProducer with the kafka backend).
+
+    Reservation events are published by the event relay from the outbox table, so the producer is
+    tuned for throughput: records are batched per partition for up to KAFKA_LINGER_MS and compressed.
+    Keys and values are sent as bytes already encoded by the event relay (see app/event_codec.py).
+    """
     global producer
     if producer is None:
-        bootstrap_servers = current_app.config.get('KAFKA_BOOTSTRAP_SERVERS')
-        if not bootstrap_servers:
+        event_bus = get_event_bus()
+        if event_bus is None:
             logger.error("KAFKA_BOOTSTRAP_SERVERS not configured.")
             return None
         try:
-            producer = KafkaProducer(
-                bootstrap_servers=bootstrap_servers.split(','), # Handle comma-separated list
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: str(k).encode('utf-8') if k else None,
+            producer = event_bus.producer( # Options below tune the kafka backend; the others ignore them
                 retries=5, # Retry sending messages on failure
-                acks='all' # Wait for all replicas to acknowledge
+                max_in_flight_requests_per_connection=1, # Retries cannot reorder events of a key
+                acks='all', # Wait for all replicas to acknowledge
+                linger_ms=current_app.config['KAFKA_LINGER_MS'],
+                batch_size=current_app.config['KAFKA_BATCH_SIZE'],
+                compression_type=current_app.config['KAFKA_COMPRESSION_TYPE']
             )
-            logger.info(f"KafkaProducer initialized for servers: {bootstrap_servers}")
-        except KafkaError as e:
-            logger.error(f"Failed to initialize KafkaProducer: {e}")
+            logger.info(f"Event producer initialized: {type(producer).__name__}")
+        except EventBusError as e:
+            logger.error(f"Failed to initialize event producer: {e}")
             producer = None # Ensure producer remains None on failure
     return producer
 
-def send_reservation_event(event_type, reservation_data):
-    """Sends a reservation event to the configured Kafka topic."""
-    kafka_producer = get_kafka_producer()
-    topic = current_app.config.get('KAFKA_RESERVATIONS_TOPIC')
-
-    if not kafka_producer or not topic:
-        logger.error("Kafka producer or topic not available. Cannot send event.")
-        return
-
-    event = {
-        "type": event_type,
-        "payload": reservation_data # reservation_data should be a dict (e.g., from reservation.to_dict())
-    }
-    reservation_id = reservation_data.get('id')
-
-    try:
-        logger.info(f"Sending event to Kafka topic '{topic}': {event}")
-        future = kafka_producer.send(topic, key=reservation_id, value=event)
-        # Optional: Block for synchronous send or add callbacks for async handling
-        # result = future.get(timeout=10)
-        # logger.info(f"Event sent successfully: {result}")
-        # Add callbacks for better async handling
-        future.add_callback(on_send_success)
-        future.add_errback(on_send_error)
-    except KafkaError as e:
-        logger.error(f"Failed to send event to Kafka topic '{topic}': {e}")
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while sending Kafka event: {e}")
-
-# Optional callbacks for async send
-def on_send_success(record_metadata):
-    logger.info(f"Message sent successfully to topic '{record_metadata.topic}' partition {record_metadata.partition} offset {record_metadata.offset}")
-
-def on_send_error(excp):
-    logger.error('Error sending message to Kafka', exc_info=excp)
-
-# Optional: Function to close producer on app shutdown
-# def close_kafka_producer(app=None):
-#     global producer
-#     if producer:
-#         producer.flush()
-#         producer.close()
-#         producer = None
-#         logger.info("KafkaProducer closed.")
+def close_kafka_producer(timeout=10):
+    """Flush buffered events and close the producer (graceful shutdown)."""
+    global producer
+    if producer is not None:
+        try:
+            producer.flush(timeout=timeout)
+            producer.close(timeout=timeout)
+            logger.info("KafkaProducer closed.")
+        except Exception as e:
+            logger.error(f"Error closing KafkaProducer: {e}")
+        producer = None
+
+def reset_kafka_producer():
+    """Forget a producer inherited from the parent process; its I/O thread does not survive a fork."""
+    global producer
+    producer = None
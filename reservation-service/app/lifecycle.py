@@ -0,0 +1,34 @@
+import logging
+
+from .models import db
+from .event_bus import reset_event_bus
+from .kafka_producer import close_kafka_producer, reset_kafka_producer
+from .service_client import reset_clients
+from . import room_catalog, user_events
+
+logger = logging.getLogger(__name__)
+
+
+def start_background_workers(app):
+    """Start the Kafka consumers: user cache invalidation and the room catalog replica."""
+    user_events.start_user_event_consumer(app)
+    room_catalog.init_room_catalog(app)
+
+
+def init_worker_process(app):
+    """Re-create per-process resources in a worker forked from a preloaded app, then start its consumers."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)  # Pooled connections opened before the fork belong to the parent
+    reset_event_bus()
+    reset_kafka_producer()
+    reset_clients()
+    start_background_workers(app)
+    logger.info("Worker process initialized.")
+
+
+def shutdown(app):
+    """Stop the consumers and flush buffered Kafka events before the process exits."""
+    user_events.stop_event.set()
+    room_catalog.stop_event.set()
+    close_kafka_producer()
@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import copy_current_request_context, g
+
+# Shared pool for independent validation lookups (e.g. user details) made while handling a request
+lookup_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('LOOKUP_POOL_SIZE', 16)), thread_name_prefix='lookup'
+)
+
+
+def with_request_context(fn):
+    """Wrap `fn` to run in a copy of the current request context, carrying the token claims.
+
+    The copy gets a fresh `g` (and its own database session), so `g.claims` is set again in the
+    worker thread for lookups that read it.
+    """
+    claims = g.get('claims')
+
+    @copy_current_request_context
+    def call(*args):
+        if claims is not None:
+            g.claims = claims
+        return fn(*args)
+    return call
+
+
+def run_concurrently(calls, is_fatal=lambda result: result is None):
+    """Run independent lookups `(fn, *args)` concurrently and return (results, failed).
+
+    The first call runs in the calling thread, so it can use the request's database session;
+    the others run in the lookup pool. `results` are in call order and `failed` is the index of
+    the first call, in call order, whose result is fatal (None by default), or None. Later calls
+    are not waited for once a call has failed, so an error is reported as soon as it is known
+    and does not depend on which lookup happened to finish first.
+    """
+    (first, *first_args), rest = calls[0], calls[1:]
+    futures = [lookup_executor.submit(with_request_context(fn), *args) for fn, *args in rest]
+    results = [None] * len(calls)
+    try:
+        results[0] = first(*first_args)
+        if is_fatal(results[0]):
+            return results, 0
+        for i, future in enumerate(futures, start=1):
+            results[i] = future.result()
+            if is_fatal(results[i]):
+                return results, i
+        return results, None
+    finally:
+        for future in futures:
+            future.cancel()  # No-op for lookups already running or done
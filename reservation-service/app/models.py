@@ -1,8 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 
 db = SQLAlchemy()
 
+# Keys of a serialized reservation or series occurrence; GET /reservations/?fields= selects a subset
+RESERVATION_FIELDS = (
+    'id', 'user_id', 'room_id', 'start_time', 'end_time', 'purpose', 'num_attendees',
+    'description', 'attendees', 'series_id', 'occurrence_start', 'created_at', 'updated_at'
+)
+
 class Reservation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False) # Foreign key to User (conceptually)
@@ -14,17 +21,35 @@ class Reservation(db.Model):
     description = db.Column(db.String(255), nullable=True)  # Add description field
     attendees = db.Column(db.ARRAY(db.String), nullable=True)  # Add attendees field
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)  # Export watermark
 
     # Add constraint to prevent overlapping reservations for the same room
     __table_args__ = (
         db.CheckConstraint('end_time > start_time', name='check_start_end_time'),
         db.CheckConstraint('num_attendees > 0', name='check_positive_num_attendees'),  # Ensure positive attendees
+        ExcludeConstraint(
+            ('room_id', '='),
+            (db.text('tsrange(start_time, end_time)'), '&&'),
+            name='exclude_overlapping_reservations',
+            using='gist'
+        ),  # Requires the btree_gist extension
+        db.Index('ix_reservation_updated_at', 'updated_at'),
+        db.Index('ix_reservation_room_id_start_time_end_time', 'room_id', 'start_time', 'end_time'),  # Overlap checks, room filter
+        db.Index('ix_reservation_user_id_start_time_id', 'user_id', 'start_time', 'id'),  # user_id=self pages
+        db.Index('ix_reservation_start_time_id', 'start_time', 'id'),  # Unfiltered pages, time windows, usage report
     )
 
     def __repr__(self):
         return f'<Reservation {self.id} for Room {self.room_id} by User {self.user_id}>'
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
+        if fields is not None:
+            # Only touch the requested attributes so columns deferred with load_only() are never loaded
+            data = {}
+            for field in fields:
+                value = getattr(self, field, None)  # series_id and occurrence_start only exist on series occurrences
+                data[field] = value.isoformat() if isinstance(value, datetime) else value
+            return data
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -35,5 +60,229 @@ class Reservation(db.Model):
             'num_attendees': self.num_attendees,  # Include in the dictionary
             'description': self.description,  # Include description in the dictionary
             'attendees': self.attendees,  # Include attendees in the dictionary
-            'created_at': self.created_at.isoformat()
+            'series_id': None,  # Occurrences of a ReservationSeries carry their series id instead
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class ReservationSeries(db.Model):
+    """Recurring reservation stored once as an RFC 5545 recurrence rule.
+
+    Occurrences are not stored as Reservation rows: they are expanded on demand for the queried
+    window (see recurrence.expand_series). Cancelled and moved occurrences are stored as
+    ReservationSeriesException rows.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    room_id = db.Column(db.Integer, nullable=False)
+    rrule = db.Column(db.String(255), nullable=False)  # e.g. FREQ=WEEKLY;COUNT=52
+    dtstart = db.Column(db.DateTime, nullable=False)  # Start of the first occurrence, anchors the rule
+    duration = db.Column(db.Integer, nullable=False)  # Length of each occurrence in minutes
+    span_start = db.Column(db.DateTime, nullable=False)  # Earliest start of any occurrence, including overrides
+    span_end = db.Column(db.DateTime, nullable=False)  # Latest end of any occurrence, including overrides
+    purpose = db.Column(db.String(255), nullable=True)
+    num_attendees = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.String(255), nullable=True)
+    attendees = db.Column(db.ARRAY(db.String), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)  # Also bumped when an occurrence changes
+
+    exceptions = db.relationship(
+        'ReservationSeriesException', backref='series', lazy='selectin', cascade='all, delete-orphan'
+    )
+
+    __table_args__ = (
+        db.CheckConstraint('duration > 0', name='check_positive_series_duration'),
+        db.CheckConstraint('num_attendees > 0', name='check_positive_series_num_attendees'),
+        db.Index('ix_reservation_series_room_id_span', 'room_id', 'span_start', 'span_end'),
+        db.Index('ix_reservation_series_user_id', 'user_id'),
+        db.Index('ix_reservation_series_updated_at', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f'<ReservationSeries {self.id} for Room {self.room_id} by User {self.user_id}: {self.rrule}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'room_id': self.room_id,
+            'rrule': self.rrule,
+            'start_time': self.dtstart.isoformat(),
+            'duration': self.duration,
+            'purpose': self.purpose,
+            'num_attendees': self.num_attendees,
+            'description': self.description,
+            'attendees': self.attendees,
+            'exceptions': [exception.to_dict() for exception in self.exceptions],
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    def occurrence_dict(self, original_start, start_time, end_time, exception=None, fields=None):
+        """Render one expanded occurrence in the same shape as Reservation.to_dict()."""
+        occurrence = {
+            'id': None,
+            'start_time': start_time,
+            'end_time': end_time,
+            'series_id': self.id,
+            'occurrence_start': original_start  # Identifies the occurrence within its series
         }
+        for field in ('purpose', 'description'):
+            if exception is not None and getattr(exception, field) is not None:
+                occurrence[field] = getattr(exception, field)
+        data = {}
+        # Only touch the requested attributes so columns deferred with load_only() are never loaded
+        for field in RESERVATION_FIELDS if fields is None else fields:
+            value = occurrence[field] if field in occurrence else getattr(self, field)
+            data[field] = value.isoformat() if isinstance(value, datetime) else value
+        return data
+
+
+class ReservationSeriesException(db.Model):
+    """A cancelled or overridden occurrence of a ReservationSeries."""
+    id = db.Column(db.Integer, primary_key=True)
+    series_id = db.Column(db.Integer, db.ForeignKey('reservation_series.id', ondelete='CASCADE'), nullable=False)
+    original_start = db.Column(db.DateTime, nullable=False)  # Start of the occurrence as generated by the rule
+    cancelled = db.Column(db.Boolean, nullable=False, default=False)
+    start_time = db.Column(db.DateTime, nullable=True)  # New times of an overridden occurrence
+    end_time = db.Column(db.DateTime, nullable=True)
+    purpose = db.Column(db.String(255), nullable=True)
+    description = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('series_id', 'original_start', name='uq_series_exception_original_start'),
+        db.CheckConstraint('cancelled OR end_time > start_time', name='check_series_exception_times'),
+    )
+
+    def __repr__(self):
+        return f'<ReservationSeriesException {self.original_start} of Series {self.series_id}>'
+
+    def to_dict(self):
+        return {
+            'original_start': self.original_start.isoformat(),
+            'cancelled': self.cancelled,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'purpose': self.purpose,
+            'description': self.description
+        }
+
+
+class RoomUsageDaily(db.Model):
+    """Bookings and booked time per room and day, kept current with deltas by every reservation change.
+
+    Backs GET /reservations/reports/usage; rebuild it with `flask rebuild-usage-rollup`.
+    """
+    room_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # Day the bookings start on
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    booked_seconds = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<RoomUsageDaily Room {self.room_id} on {self.day}: {self.bookings} bookings>'
+
+
+class RoomReplica(db.Model):
+    """Read-only copy of room-service's rooms, kept current by ROOM_* events (see room_catalog.py).
+
+    Used for capacity checks, email details and the usage report instead of calling room-service;
+    resynchronize it with `flask sync-room-catalog`.
+    """
+    __tablename__ = 'room_replica'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Room id in room-service
+    name = db.Column(db.String(100), nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    amenities = db.Column(db.JSON, nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RoomReplica {self.id} {self.name}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'capacity': self.capacity,
+            'description': self.description,
+            'amenities': self.amenities
+        }
+
+
+class BlackoutReplica(db.Model):
+    """Read-only copy of room-service's blackout periods, kept current by BLACKOUT_* events.
+
+    Lets the blackout check run in the same statement as the reservation overlap check.
+    """
+    __tablename__ = 'blackout_replica'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Blackout period id in room-service
+    room_id = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    reason = db.Column(db.String(255), nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_blackout_replica_room_id_start_time_end_time', 'room_id', 'start_time', 'end_time'),
+    )
+
+    def __repr__(self):
+        return f'<BlackoutReplica {self.id} Room {self.room_id}>'
+
+
+class Notification(db.Model):
+    """Email or calendar notification queued in the same transaction as the reservation change.
+
+    Rows are delivered by the background notification worker (run_notification_worker.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, default='email')  # 'email' or 'calendar'
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=True)
+    body = db.Column(db.Text, nullable=True)
+    attachment = db.Column(db.LargeBinary, nullable=True)
+    attachment_name = db.Column(db.String(255), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sent' or 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Also used as the claim lease
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f'<Notification {self.id} ({self.kind}) to {self.recipient}: {self.status}>'
+
+
+class EventOutbox(db.Model):
+    """Kafka event written in the same transaction as the reservation change.
+
+    Rows are published in id order by the event relay (run_event_relay.py), which sets
+    delivered_at once the broker has acknowledged them.
+    """
+    __tablename__ = 'event_outbox'
+    id = db.Column(db.BigInteger, primary_key=True)
+    event_id = db.Column(db.String(32), nullable=False, unique=True)  # Sent with the event so consumers can skip duplicates
+    topic = db.Column(db.String(255), nullable=False)
+    key = db.Column(db.String(255), nullable=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Only undelivered rows are scanned by the relay
+        db.Index('ix_event_outbox_pending', 'id', postgresql_where=db.text('delivered_at IS NULL')),
+    )
+
+    def to_event(self):
+        return {"id": self.event_id, "type": self.event_type, "payload": self.payload}
+
+    def __repr__(self):
+        return f'<EventOutbox {self.id} {self.event_type}>'
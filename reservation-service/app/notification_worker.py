@@ -0,0 +1,160 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .email_utils import send_email_batch, close_smtp_pool
+from .models import db, Notification
+
+logger = logging.getLogger(__name__)
+stop_event = threading.Event()
+
+# Worker metrics (exposed by run_notification_worker.py)
+QUEUE_DEPTH = Gauge('notification_queue_depth', 'Notifications waiting to be delivered')
+DELIVERY_LATENCY = Histogram(
+    'notification_delivery_latency_seconds', 'Time from queueing to successful delivery',
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+)
+DELIVERIES = Counter('notification_deliveries_total', 'Notification delivery attempts', ['kind', 'outcome'])
+
+
+def send_to_external_calendar(user_email, ics_content):
+    """Send the calendar event to an external calendar system."""
+    # Placeholder for integration with external calendar APIs (e.g., Google Calendar, Microsoft Outlook)
+    # For now, this function will log the event and simulate success.
+    logger.info(f"Sending calendar event for {user_email} to external calendar system.")
+    # Simulate success
+    return True
+
+
+def group_notifications(claimed, max_recipients=50):
+    """Group claimed emails with identical content so each group is sent as one message.
+
+    Invitations for the same meeting differ only by recipient, so they share a single SMTP
+    transaction (and a single copy of the .ics attachment); the recipients are only in the SMTP
+    envelope, never in the headers. Calendar events are delivered one by one.
+    """
+    groups = {}
+    for notification in claimed:
+        if notification['kind'] == 'email':
+            key = ('email', notification['subject'], notification['body'],
+                   notification['attachment'], notification['attachment_name'])
+        else:
+            key = (notification['kind'], notification['id'])
+        groups.setdefault(key, []).append(notification)
+    return [
+        group[offset:offset + max_recipients]
+        for group in groups.values()
+        for offset in range(0, len(group), max_recipients)
+    ]
+
+
+def deliver(group):
+    """Deliver a group of claimed notifications. Returns (notification, delivered, error) tuples."""
+    first = group[0]
+    try:
+        if first['kind'] == 'calendar':
+            return [
+                (notification, send_to_external_calendar(notification['recipient'], notification['attachment']), None)
+                for notification in group
+            ]
+        refused = set(send_email_batch(
+            [notification['recipient'] for notification in group],
+            subject=first['subject'],
+            body=first['body'],
+            attachment=first['attachment'],
+            attachment_name=first['attachment_name']
+        ))
+        return [
+            (notification, notification['recipient'] not in refused,
+             "Delivery failed" if notification['recipient'] in refused else None)
+            for notification in group
+        ]
+    except Exception as e:
+        return [(notification, False, str(e)) for notification in group]
+
+
+def claim_batch(batch_size, lease):
+    """Claim up to `batch_size` due notifications.
+
+    Rows are locked with SKIP LOCKED so several workers can drain the queue, and their
+    next_attempt_at is pushed out by `lease` so a crashed worker's rows are retried later.
+    """
+    now = datetime.utcnow()
+    notifications = Notification.query.filter(
+        Notification.status == 'pending',
+        Notification.next_attempt_at <= now
+    ).order_by(Notification.next_attempt_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    claimed = []
+    for notification in notifications:
+        notification.attempts += 1
+        notification.next_attempt_at = now + lease
+        claimed.append({
+            'id': notification.id,
+            'kind': notification.kind,
+            'recipient': notification.recipient,
+            'subject': notification.subject,
+            'body': notification.body,
+            'attachment': notification.attachment,
+            'attachment_name': notification.attachment_name,
+            'attempts': notification.attempts,
+            'created_at': notification.created_at
+        })
+    db.session.commit()
+    return claimed
+
+
+def record_outcomes(outcomes, max_attempts, backoff_base, backoff_max):
+    """Mark delivered notifications as sent and schedule retries with exponential backoff."""
+    now = datetime.utcnow()
+    for notification, delivered, error in outcomes:
+        values = {'last_error': error}
+        if delivered:
+            values.update(status='sent', sent_at=now)
+            DELIVERY_LATENCY.observe((now - notification['created_at']).total_seconds())
+            DELIVERIES.labels(notification['kind'], 'sent').inc()
+        elif notification['attempts'] >= max_attempts:
+            values.update(status='failed')
+            DELIVERIES.labels(notification['kind'], 'failed').inc()
+            logger.error(f"Giving up on notification {notification['id']} after {notification['attempts']} attempts: {error}")
+        else:
+            delay = min(backoff_max, backoff_base * 2 ** (notification['attempts'] - 1))
+            values.update(next_attempt_at=now + timedelta(seconds=delay))
+            DELIVERIES.labels(notification['kind'], 'retry').inc()
+        Notification.query.filter_by(id=notification['id']).update(values, synchronize_session=False)
+    db.session.commit()
+
+
+def run_worker(app, concurrency=4, batch_size=50, poll_interval=2.0, max_attempts=5,
+               backoff_base=30, backoff_max=3600, lease_seconds=300):
+    """Drain the notification queue until stop_worker() is called."""
+    lease = timedelta(seconds=lease_seconds)
+    with app.app_context(), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        logger.info(f"Notification worker started with concurrency {concurrency}")
+        while not stop_event.is_set():
+            try:
+                QUEUE_DEPTH.set(Notification.query.filter_by(status='pending').count())
+                claimed = claim_batch(batch_size, lease)
+                if not claimed:
+                    stop_event.wait(poll_interval)
+                    continue
+                outcomes = [
+                    outcome
+                    for group_outcomes in executor.map(deliver, group_notifications(claimed))
+                    for outcome in group_outcomes
+                ]
+                record_outcomes(outcomes, max_attempts, backoff_base, backoff_max)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error in notification worker loop: {e}", exc_info=True)
+                stop_event.wait(poll_interval)
+        close_smtp_pool()
+        logger.info("Notification worker stopped.")
+
+
+def stop_worker(*_):
+    """Signal the worker loop to stop after the current batch."""
+    stop_event.set()
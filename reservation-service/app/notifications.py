@@ -0,0 +1,23 @@
+from .models import db, Notification
+
+
+def queue_email(to_email, subject, body, attachment=None, attachment_name=None):
+    """Queue an email in the current transaction; it is sent by the notification worker after commit."""
+    db.session.add(Notification(
+        kind='email',
+        recipient=to_email,
+        subject=subject,
+        body=body,
+        attachment=attachment,
+        attachment_name=attachment_name
+    ))
+
+
+def queue_calendar_event(user_email, ics_content):
+    """Queue a calendar event for the external calendar system in the current transaction."""
+    db.session.add(Notification(
+        kind='calendar',
+        recipient=user_email,
+        attachment=ics_content,
+        attachment_name="meeting-invitation.ics"
+    ))
@@ -0,0 +1,30 @@
+import uuid
+
+from flask import current_app
+
+from .models import db, EventOutbox
+
+
+def queue_reservation_event(event_type, reservation_data):
+    """Queue a reservation event in the current transaction; it is published by the event relay after commit."""
+    queue_reservation_events(event_type, [reservation_data])
+
+
+def queue_reservation_events(event_type, reservations_data):
+    """Queue one event per reservation (or series) dict in the current transaction.
+
+    Events are keyed by KAFKA_RESERVATIONS_KEY_FIELD (the room by default), so all events of a
+    room go to the same partition and are consumed in order.
+    """
+    topic = current_app.config['KAFKA_RESERVATIONS_TOPIC']
+    key_field = current_app.config['KAFKA_RESERVATIONS_KEY_FIELD']
+    db.session.add_all([
+        EventOutbox(
+            event_id=uuid.uuid4().hex,
+            topic=topic,
+            key=str(reservation_data.get(key_field, reservation_data.get('id'))),
+            event_type=event_type,
+            payload=reservation_data
+        )
+        for reservation_data in reservations_data
+    ])
@@ -0,0 +1,137 @@
+import heapq
+from datetime import timedelta
+
+from dateutil.rrule import rrulestr
+
+# Shorthand recurrence values accepted by POST /reservations/ and the RRULE frequency they map to
+FREQUENCIES = {
+    "daily": "DAILY",
+    "weekly": "WEEKLY",
+    "monthly": "MONTHLY"
+}
+MAX_SERIES_OCCURRENCES = 5000  # Upper bound on occurrences of a single series (about 20 years of weekly meetings)
+
+
+def build_rule(recurrence=None, occurrences=1, rule=None):
+    """Return the RRULE string for a shorthand recurrence ("weekly", ...) or validate an explicit rule."""
+    if rule:
+        rule = rule.strip()
+        if "\n" in rule:
+            raise ValueError("Only a single RRULE line is supported; cancel or move occurrences individually")
+        if rule.upper().startswith("RRULE:"):
+            rule = rule[len("RRULE:"):]
+        parts = []
+        for part in rule.upper().split(";"):
+            name, _, value = part.partition("=")
+            if name == "UNTIL" and value.endswith("Z"):
+                part = f"UNTIL={value[:-1]}"  # Times are stored as naive UTC, and dateutil rejects an aware UNTIL with a naive start
+            parts.append(part)
+        return ";".join(parts)
+    frequency = FREQUENCIES.get(str(recurrence).lower())
+    if frequency is None:
+        raise ValueError(f"Unsupported recurrence '{recurrence}'. Use one of: {', '.join(FREQUENCIES)}")
+    if occurrences <= 0:
+        raise ValueError("Occurrences must be greater than zero for recurring meetings")
+    return f"FREQ={frequency};COUNT={occurrences}"
+
+
+def end_rule(rule, until):
+    """Return `rule` with its COUNT or UNTIL replaced by UNTIL=`until` (inclusive, rounded up to the second)."""
+    if until.microsecond:
+        until = until.replace(microsecond=0) + timedelta(seconds=1)
+    parts = [part for part in rule.split(";") if part.split("=", 1)[0] not in ("COUNT", "UNTIL")]
+    return ";".join(parts + [f"UNTIL={until:%Y%m%dT%H%M%S}"])
+
+
+def parse_rule(rule, dtstart):
+    """Parse an RRULE string anchored at `dtstart` into a dateutil rrule."""
+    return rrulestr(rule, dtstart=dtstart)
+
+
+def rule_occurrences(rule, dtstart):
+    """Return every occurrence start of a bounded rule.
+
+    Raises ValueError for invalid rules, rules without COUNT or UNTIL and rules with more than
+    MAX_SERIES_OCCURRENCES occurrences, so a series can always be fully checked for conflicts.
+    """
+    try:
+        parsed = parse_rule(rule, dtstart)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid recurrence rule: {e}")
+    parts = {part.split("=", 1)[0] for part in rule.split(";")}
+    if not parts & {"COUNT", "UNTIL"}:
+        raise ValueError("Recurrence rule must end (COUNT or UNTIL)")
+
+    starts = []
+    for start in parsed:
+        if len(starts) == MAX_SERIES_OCCURRENCES:
+            raise ValueError(f"A series can have at most {MAX_SERIES_OCCURRENCES} occurrences")
+        starts.append(start)
+    if not starts:
+        raise ValueError("Recurrence rule has no occurrences")
+    return starts
+
+
+def expand_series(series, window_start=None, window_end=None):
+    """Lazily yield (original_start, start_time, end_time, exception) for occurrences of `series`.
+
+    Only occurrences overlapping [window_start, window_end) are produced, in start order, and
+    nothing after the window is generated. dateutil still iterates the rule from dtstart to reach
+    the window start, so skipping to a late window costs one step per earlier occurrence (at most
+    MAX_SERIES_OCCURRENCES). Cancelled occurrences are skipped and overridden ones are yielded at
+    their new time with the exception row that moved them.
+    """
+    duration = timedelta(minutes=series.duration)
+    exceptions = {exception.original_start: exception for exception in series.exceptions}
+    rule = parse_rule(series.rrule, series.dtstart)
+
+    def overlaps(start, end):
+        return (window_start is None or end > window_start) and (window_end is None or start < window_end)
+
+    def regular():
+        starts = iter(rule) if window_start is None else rule.xafter(window_start - duration, inc=False)
+        for start in starts:
+            if window_end is not None and start >= window_end:
+                return
+            if start not in exceptions:
+                yield start, start, start + duration, None
+
+    overrides = [
+        (exception.original_start, exception.start_time, exception.end_time, exception)
+        for exception in exceptions.values()
+        if not exception.cancelled and overlaps(exception.start_time, exception.end_time)
+    ]
+    overrides.sort(key=lambda occurrence: occurrence[1])
+
+    return heapq.merge(regular(), overrides, key=lambda occurrence: occurrence[1])
+
+
+def end_series(series, now):
+    """End `series` at `now`, keeping the occurrences that already started.
+
+    The rule is cut after its last occurrence before `now`. Exceptions of occurrences the new rule no
+    longer generates are removed unless they moved the occurrence before `now`, and occurrences moved
+    from before `now` to later are cancelled. Returns the (start_time, end_time) of every occurrence
+    removed from the schedule.
+    """
+    upcoming = [(start, end) for _, start, end, _ in expand_series(series, now) if start >= now]
+    until = parse_rule(series.rrule, series.dtstart).before(now)
+    series.rrule = end_rule(series.rrule, until or series.dtstart - timedelta(seconds=1))
+    for exception in list(series.exceptions):
+        started = not exception.cancelled and exception.start_time < now
+        if exception.original_start >= now and not started:
+            series.exceptions.remove(exception)
+        elif exception.original_start < now and not exception.cancelled and not started:
+            exception.cancelled = True
+    series.span_end = max(end for _, _, end, _ in expand_series(series, window_end=now))
+    return upcoming
+
+
+def find_occurrence(series, original_start):
+    """Return (start_time, end_time, exception) of one occurrence, or None if it does not exist or was cancelled."""
+    for exception in series.exceptions:
+        if exception.original_start == original_start:
+            return None if exception.cancelled else (exception.start_time, exception.end_time, exception)
+    if original_start not in parse_rule(series.rrule, series.dtstart):
+        return None
+    return original_start, original_start + timedelta(minutes=series.duration), None
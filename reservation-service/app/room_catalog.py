@@ -0,0 +1,249 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+import requests
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .event_bus import EventBusError, get_event_bus
+from .models import db, RoomReplica, BlackoutReplica
+from .service_client import get_service_client
+
+logger = logging.getLogger(__name__)
+consumer_thread = None
+stop_event = threading.Event()
+
+ROOM_FIELDS = ('id', 'name', 'capacity', 'description', 'amenities')
+BLACKOUT_FIELDS = ('id', 'room_id', 'start_time', 'end_time', 'reason')
+
+
+def upsert_rooms(rooms):
+    """Insert or overwrite replica rows from room dicts as returned by room-service."""
+    rows = [dict({field: room.get(field) for field in ROOM_FIELDS}, synced_at=datetime.utcnow()) for room in rooms]
+    if not rows:
+        return
+    statement = pg_insert(RoomReplica).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[RoomReplica.id],
+        set_={field: statement.excluded[field] for field in ROOM_FIELDS[1:] + ('synced_at',)}
+    ))
+
+
+def upsert_blackouts(blackouts):
+    """Insert or overwrite blackout replica rows from blackout dicts as returned by room-service."""
+    rows = [
+        {
+            'id': blackout['id'],
+            'room_id': blackout['room_id'],
+            'start_time': datetime.fromisoformat(blackout['start_time']),
+            'end_time': datetime.fromisoformat(blackout['end_time']),
+            'reason': blackout.get('reason'),
+            'synced_at': datetime.utcnow()
+        }
+        for blackout in blackouts
+    ]
+    if not rows:
+        return
+    statement = pg_insert(BlackoutReplica).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[BlackoutReplica.id],
+        set_={field: statement.excluded[field] for field in BLACKOUT_FIELDS[1:] + ('synced_at',)}
+    ))
+
+
+def apply_room_event(event):
+    """Apply a ROOM_* or BLACKOUT_* event to the replica (without committing).
+
+    Events are keyed by room id, so the events of one room and its blackout periods are applied
+    in order and replaying them is harmless.
+    """
+    event_type = event.get("type")
+    payload = event.get("payload") or {}
+    if payload.get('id') is None:
+        logger.warning(f"Ignoring room event without an id: {event}")
+        return
+    if event_type in ("ROOM_CREATED", "ROOM_UPDATED"):
+        upsert_rooms([payload])
+    elif event_type == "ROOM_DELETED":
+        RoomReplica.query.filter_by(id=payload['id']).delete()
+        BlackoutReplica.query.filter_by(room_id=payload['id']).delete()
+    elif event_type in ("BLACKOUT_CREATED", "BLACKOUT_UPDATED"):
+        upsert_blackouts([payload])
+    elif event_type == "BLACKOUT_DELETED":
+        BlackoutReplica.query.filter_by(id=payload['id']).delete()
+    else:
+        logger.warning(f"Unhandled room event type: {event_type}")
+
+
+def fetch_room(room_id, token):
+    """Fetch one room from room-service. Returns None if it does not exist or the service is unavailable."""
+    try:
+        response = get_service_client("room-service").get(
+            f"/rooms/{room_id}", headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch room details from room-service: {e}")
+        return None
+
+
+def get_room(room_id, token=None):
+    """Return a room dict from the replica.
+
+    A room missing from the replica (e.g. created moments ago, before its event arrived) is read
+    through from room-service when a token is given, and stored.
+    """
+    room = db.session.get(RoomReplica, room_id)
+    if room is not None:
+        return room.to_dict()
+    if token is None:
+        return None
+    details = fetch_room(room_id, token)
+    if details is not None:
+        upsert_rooms([details])
+        db.session.commit()
+    return details
+
+
+def get_rooms():
+    """Return {room id: room dict} for every replicated room."""
+    return {room.id: room.to_dict() for room in RoomReplica.query.all()}
+
+
+def sync_rooms():
+    """Replace the replica with a snapshot of GET /rooms/ from room-service. Returns the number of rooms."""
+    from .jwt_utils import generate_token  # Delayed import to avoid circular import
+    response = get_service_client("room-service").get(
+        "/rooms/", headers={"Authorization": f"Bearer {generate_token('reservation-service')}"}
+    )
+    response.raise_for_status()
+    rooms = response.json()
+    upsert_rooms(rooms)
+    RoomReplica.query.filter(RoomReplica.id.notin_([room['id'] for room in rooms])).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Room catalog synchronized with {len(rooms)} rooms")
+    return len(rooms)
+
+
+def sync_blackouts():
+    """Replace the blackout replica with a snapshot of GET /rooms/blackouts. Returns the number of periods."""
+    from .jwt_utils import generate_token  # Delayed import to avoid circular import
+    response = get_service_client("room-service").get(
+        "/rooms/blackouts", headers={"Authorization": f"Bearer {generate_token('reservation-service')}"}
+    )
+    response.raise_for_status()
+    blackouts = response.json()
+    upsert_blackouts(blackouts)
+    BlackoutReplica.query.filter(
+        BlackoutReplica.id.notin_([blackout['id'] for blackout in blackouts])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Blackout replica synchronized with {len(blackouts)} blackout periods")
+    return len(blackouts)
+
+
+def reconcile_room_catalog():
+    """Overwrite the replicas with room-service snapshots, repairing changes whose events were lost."""
+    sync_rooms()
+    sync_blackouts()
+
+
+def consume_room_events(app):
+    """Apply room events to the replica until stop_event is set.
+
+    The consumer group commits offsets only up to the first event of each partition that could
+    not be applied; the consumer seeks back to it and it is retried on the next poll, so a
+    failure never skips an event. Several processes share the partitions. Every
+    ROOM_CATALOG_RECONCILE_INTERVAL seconds the replicas are also reconciled with room-service.
+    """
+    event_bus = get_event_bus(app.config)
+    topic = app.config.get('KAFKA_ROOMS_TOPIC')
+    reconcile_interval = app.config['ROOM_CATALOG_RECONCILE_INTERVAL']
+    next_reconcile_at = time.monotonic() + reconcile_interval  # Reconciled on startup by init_room_catalog
+    consumer = None
+    while not stop_event.is_set():
+        try:
+            if reconcile_interval and time.monotonic() >= next_reconcile_at:
+                next_reconcile_at = time.monotonic() + reconcile_interval
+                with app.app_context():
+                    try:
+                        reconcile_room_catalog()
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.warning(f"Could not reconcile room catalog: {e}")
+
+            if event_bus is None or not topic:
+                stop_event.wait(1)  # Kafka is not configured; only reconcile
+                continue
+            if consumer is None:
+                consumer = event_bus.consumer(
+                    [topic],
+                    group_id=app.config['ROOM_CATALOG_CONSUMER_GROUP'],
+                    auto_offset_reset='earliest'
+                )
+                logger.info(f"Room event consumer connected to topic '{topic}'.")
+
+            failed = False
+            # Timeout to allow checking stop_event
+            for partition, messages in consumer.poll(timeout_ms=1000).items():
+                for message in messages:
+                    try:
+                        event = json.loads(message.value.decode('utf-8'))
+                    except ValueError as e:
+                        # Can never be applied; reconciliation repairs whatever it described
+                        logger.error(f"Skipping undecodable room event at {partition.partition}:{message.offset}: {e}")
+                        continue
+                    with app.app_context():
+                        try:
+                            apply_room_event(event)
+                            db.session.commit()
+                        except Exception as e:
+                            db.session.rollback()
+                            logger.error(f"Error applying room event {message.value}: {e}. Retrying.", exc_info=True)
+                            consumer.seek(partition, message.offset)  # Later events of this room wait for it
+                            failed = True
+                            break
+            consumer.commit()
+            if failed:
+                stop_event.wait(5)
+
+        except EventBusError as e:
+            logger.error(f"Kafka error in room event consumer: {e}. Retrying in 10 seconds...")
+            if consumer:
+                consumer.close()
+            consumer = None
+            stop_event.wait(10)
+        except Exception as e:
+            logger.error(f"Unexpected error in room event consumer: {e}. Retrying in 10 seconds...", exc_info=True)
+            if consumer:
+                consumer.close()
+            consumer = None
+            stop_event.wait(10)
+
+    if consumer:
+        consumer.close()
+    logger.info("Room event consumer stopped.")
+
+
+def init_room_catalog(app):
+    """Reconcile the replicas with room-service snapshots and start the room event consumer."""
+    global consumer_thread
+    with app.app_context():
+        try:
+            reconcile_room_catalog()
+        except Exception as e:
+            # The database or room-service may not be reachable yet; rooms are read through on demand
+            db.session.rollback()
+            app.logger.warning(f"Could not synchronize room catalog on startup: {e}")
+
+    if get_event_bus(app.config) is None or not app.config.get('KAFKA_ROOMS_TOPIC'):
+        app.logger.warning("Kafka is not configured; room catalog will only be reconciled periodically.")
+    if consumer_thread is None or not consumer_thread.is_alive():
+        stop_event.clear()
+        consumer_thread = threading.Thread(target=consume_room_events, args=(app,), daemon=True)
+        consumer_thread.start()
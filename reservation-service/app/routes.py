@@ -1,18 +1,41 @@
-from flask import Blueprint, request, jsonify, current_app
-from .models import db, Reservation
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from .models import db, Reservation, ReservationSeries, ReservationSeriesException, BlackoutReplica, RESERVATION_FIELDS
+from .recurrence import build_rule, rule_occurrences, expand_series, end_series, find_occurrence
+from .interval_index import RoomIntervals, to_seconds
 from .jwt_utils import token_required, get_user_details, get_room_details # Import token_required and validation helpers
-from .kafka_producer import send_reservation_event # Import Kafka producer function
+from .outbox import queue_reservation_event, queue_reservation_events  # Kafka events are published by the event relay
 from datetime import datetime, timedelta
-from sqlalchemy import or_, and_
-from .email_utils import send_email  # Import the email utility
+from sqlalchemy import or_, and_, values, column, Integer, DateTime, Text, cast, insert, select, tuple_, literal, null, union_all
+from sqlalchemy.orm import load_only
+from sqlalchemy.exc import IntegrityError
+from .notifications import queue_email, queue_calendar_event  # Notifications are delivered by the background worker
+from .usage import apply_usage_deltas, series_usage_changes, usage_report
+from .room_catalog import get_rooms
+from .service_client import get_service_client  # Pooled, timeout-bounded client for other services
+from .lookups import run_concurrently  # Concurrent fan-out of independent validation lookups
 import pytz  # For timezone handling
 from email.utils import formatdate  # For RFC 2822 date formatting
 import os  # Import os to read environment variables
 from sqlalchemy.sql import func  # Import for aggregation
 import requests  # Add missing import for requests
+import base64
+import csv
+import io
+import json
+import heapq
+from itertools import count, islice
 
 reservation_bp = Blueprint('reservation_bp', __name__)
 
+MAX_BULK_RESERVATIONS = 500  # Upper bound on items accepted by POST /reservations/bulk
+DEFAULT_PAGE_SIZE = 100  # Reservations per page of GET /reservations/ when no limit is given
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per server-side cursor round trip and per streamed chunk
+EXPORT_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
 MODIFICATION_TIME_LIMIT = timedelta(hours=1)  # Allow modifications/cancellations up to 1 hour before the start time
 
 # Define booking policies
@@ -21,21 +44,201 @@ BOOKING_POLICIES = {
     "staff": {"max_days_in_advance": 30},           # Staff can book up to 30 days in advance
     "guest": {"max_days_in_advance": 7}             # Guests can book up to 7 days in advance
 }
-# Helper function to check for overlapping reservations
-def check_overlap(room_id, start_time, end_time, exclude_reservation_id=None):
-    query = Reservation.query.filter(
-        Reservation.room_id == room_id,
-        Reservation.id != exclude_reservation_id, # Exclude self when updating
-        or_(
-            # Existing reservation starts during the new one
-            and_(Reservation.start_time >= start_time, Reservation.start_time < end_time),
-            # Existing reservation ends during the new one
-            and_(Reservation.end_time > start_time, Reservation.end_time <= end_time),
-            # Existing reservation completely contains the new one
-            and_(Reservation.start_time <= start_time, Reservation.end_time >= end_time)
+# SQLSTATE raised by the `exclude_overlapping_reservations` exclusion constraint
+EXCLUSION_VIOLATION = '23P01'
+# Key space of the per-room advisory locks that serialize series writes (see lock_room_schedules)
+ROOM_SCHEDULE_LOCK = 7007
+
+def encode_cursor(key):
+    """Encode a (start_time, id) sort key as an opaque pagination cursor."""
+    start_time, key_id = key
+    return base64.urlsafe_b64encode(f"{start_time.isoformat()}|{key_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor(). Raises ValueError if it is malformed."""
+    try:
+        start_time, key_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(start_time), int(key_id)
+
+def is_overlap_violation(error):
+    """Return True if an IntegrityError was raised by the non-overlap exclusion constraint."""
+    return getattr(error.orig, 'pgcode', None) == EXCLUSION_VIOLATION
+
+def query_candidate_conflicts(candidates, exclude_reservation_id=None, reservations=True, blackouts=False,
+                              schedule_lock=None):
+    """Find every existing reservation and/or blackout period overlapping any candidate (room_id, start, end).
+
+    The candidates are sent as a VALUES list and joined against the reservation table and the
+    blackout replica in a single statement, so a whole recurring series (or bulk import) costs
+    one round trip. With `schedule_lock` (a room id), the same statement also takes that room's
+    shared schedule lock (see lock_room_schedules), so the statements after it see every series
+    committed before the lock was granted.
+    Returns (reservation conflicts, blackout conflicts) ordered by candidate: (candidate index,
+    reservation id, start_time, end_time) and (candidate index, blackout id, start_time, end_time, reason) rows.
+    """
+    if not candidates or not (reservations or blackouts or schedule_lock is not None):
+        return [], []
+    candidate_rows = values(
+        column('candidate', Integer),
+        column('room_id', Integer),
+        column('start_time', DateTime),
+        column('end_time', DateTime),
+        name='candidates'
+    ).data([(i, room_id, start, end) for i, (room_id, start, end) in enumerate(candidates)])
+
+    selects = []
+    if reservations:
+        query = select(
+            candidate_rows.c.candidate, literal('reservation').label('kind'), Reservation.id,
+            Reservation.start_time, Reservation.end_time, null().label('reason')
+        ).select_from(candidate_rows).join(
+            Reservation,
+            and_(
+                Reservation.room_id == candidate_rows.c.room_id,
+                Reservation.start_time < candidate_rows.c.end_time,
+                Reservation.end_time > candidate_rows.c.start_time
+            )
         )
+        if exclude_reservation_id is not None:
+            query = query.where(Reservation.id != exclude_reservation_id) # Exclude self when updating
+        selects.append(query)
+    if blackouts:
+        selects.append(select(
+            candidate_rows.c.candidate, literal('blackout').label('kind'), BlackoutReplica.id,
+            BlackoutReplica.start_time, BlackoutReplica.end_time, BlackoutReplica.reason
+        ).select_from(candidate_rows).join(
+            BlackoutReplica,
+            and_(
+                BlackoutReplica.room_id == candidate_rows.c.room_id,
+                BlackoutReplica.start_time < candidate_rows.c.end_time,
+                BlackoutReplica.end_time > candidate_rows.c.start_time
+            )
+        ))
+    if schedule_lock is not None:
+        # One row that is always fetched, so the lock is taken even when nothing overlaps
+        selects.append(select(
+            literal(-1), literal('lock'), null(), null(), null(),
+            cast(func.pg_advisory_xact_lock_shared(ROOM_SCHEDULE_LOCK, schedule_lock), Text)
+        ))
+    rows = union_all(*selects).subquery() if len(selects) > 1 else selects[0].subquery()
+    conflicts, blackout_conflicts = [], []
+    for candidate, kind, conflict_id, start, end, reason in db.session.execute(
+            select(rows).order_by(rows.c.candidate, rows.c.start_time)):
+        if kind == 'lock':
+            continue
+        if kind == 'blackout':
+            blackout_conflicts.append((candidate, conflict_id, start, end, reason))
+        else:
+            conflicts.append((candidate, conflict_id, start, end))
+    return conflicts, blackout_conflicts
+
+def query_conflicts(room_id, intervals, exclude_reservation_id=None, reservations=True, blackouts=False,
+                    schedule_lock=None):
+    """Find every existing reservation and/or blackout period in `room_id` overlapping any of the candidate intervals."""
+    return query_candidate_conflicts(
+        [(room_id, start, end) for start, end in intervals], exclude_reservation_id, reservations, blackouts,
+        schedule_lock
+    )
+
+# Helper function to check for overlapping reservations and blackout periods
+def find_conflicts(room_id, intervals, exclude_reservation_id=None):
+    """Check candidate intervals against blackout periods and existing reservations in one statement.
+
+    Returns (reservation conflicts, blackout conflicts) as query_candidate_conflicts does.
+    """
+    return query_conflicts(room_id, intervals, exclude_reservation_id, blackouts=True)
+
+def find_blackout_conflicts(room_id, intervals):
+    """Check a single booking against blackout periods, taking the room's shared schedule lock in the same statement.
+
+    Overlaps with other reservations are left to the exclusion constraint (23P01 on insert or update).
+    Returns blackout conflicts as query_candidate_conflicts does.
+    """
+    return query_conflicts(room_id, intervals, reservations=False, blackouts=True, schedule_lock=room_id)[1]
+
+def lock_room_schedules(room_ids, exclusive=False):
+    """Take transaction-scoped advisory locks on the schedules of `room_ids`.
+
+    Series occurrences are not rows, so the exclusion constraint cannot see them. Writing a series
+    takes the room lock exclusively while single reservations share it (see find_blackout_conflicts),
+    so a series and a single booking in the same room never check for conflicts concurrently.
+    Rooms are locked in id order.
+    """
+    lock = func.pg_advisory_xact_lock if exclusive else func.pg_advisory_xact_lock_shared
+    for room_id in sorted(set(room_ids)):
+        db.session.execute(select(lock(ROOM_SCHEDULE_LOCK, room_id)))
+
+def query_candidate_series_conflicts(candidates, exclude_occurrence=None):
+    """Find series occurrences overlapping any candidate (room_id, start, end).
+
+    Series whose span overlaps the candidates are loaded with one query and expanded only for the
+    window of their room's candidates. `exclude_occurrence` is a (series id, original start) pair to
+    ignore, e.g. the occurrence being moved.
+    Returns (candidate index, series id, start_time, end_time) tuples ordered by candidate.
+    """
+    if not candidates:
+        return []
+    rooms = {}
+    for i, (room_id, start, end) in enumerate(candidates):
+        rooms.setdefault(room_id, []).append((i, start, end))
+
+    series_list = ReservationSeries.query.filter(
+        ReservationSeries.room_id.in_(rooms),
+        ReservationSeries.span_start < max(end for _, _, end in candidates),
+        ReservationSeries.span_end > min(start for _, start, _ in candidates)
+    ).all()
+
+    conflicts = []
+    for series in series_list:
+        room_candidates = RoomIntervals()
+        for i, start, end in rooms[series.room_id]:
+            room_candidates.add(i, to_seconds(start), to_seconds(end))
+        window_start = min(start for _, start, _ in rooms[series.room_id])
+        window_end = max(end for _, _, end in rooms[series.room_id])
+        for original_start, start, end, _ in expand_series(series, window_start, window_end):
+            if (series.id, original_start) == exclude_occurrence:
+                continue
+            for i in room_candidates.find_overlaps(to_seconds(start), to_seconds(end)):
+                conflicts.append((i, series.id, start, end))
+    return sorted(conflicts, key=lambda conflict: (conflict[0], conflict[2]))
+
+def find_series_conflicts(room_id, intervals, exclude_occurrence=None):
+    """Find series occurrences in `room_id` overlapping any of the candidate intervals."""
+    return query_candidate_series_conflicts(
+        [(room_id, start, end) for start, end in intervals], exclude_occurrence
     )
-    return query.first()
+
+def conflict_response(conflicts, intervals, series_conflicts=()):
+    """Build a 409 response listing every conflicting occurrence."""
+    details = [
+        {
+            "occurrence": occurrence + 1,
+            "start_time": intervals[occurrence][0].isoformat(),
+            "end_time": intervals[occurrence][1].isoformat(),
+            "conflicting_reservation_id": reservation_id,
+            "conflicting_start_time": existing_start.isoformat(),
+            "conflicting_end_time": existing_end.isoformat()
+        }
+        for occurrence, reservation_id, existing_start, existing_end in conflicts
+    ] + [
+        {
+            "occurrence": occurrence + 1,
+            "start_time": intervals[occurrence][0].isoformat(),
+            "end_time": intervals[occurrence][1].isoformat(),
+            "conflicting_series_id": series_id,
+            "conflicting_start_time": existing_start.isoformat(),
+            "conflicting_end_time": existing_end.isoformat()
+        }
+        for occurrence, series_id, existing_start, existing_end in series_conflicts
+    ]
+    details.sort(key=lambda detail: (detail["occurrence"], detail["conflicting_start_time"]))
+    occurrences = sorted({detail["occurrence"] for detail in details})
+    return jsonify({
+        "message": f"Time slot conflict for occurrence(s) {', '.join(map(str, occurrences))} with existing reservations",
+        "conflicts": details
+    }), 409
 
 def generate_calendar_invitation(room_name, room_description, start_time, end_time, attendees, purpose):
     """Generate an iCalendar (.ics) file for the meeting."""
@@ -64,56 +267,9 @@ END:VCALENDAR
 """
     return ics_content.encode('utf-8')
 
-def check_blackout_periods(room_id, start_time, end_time, token):
-    """Check if the reservation conflicts with any blackout periods."""
-    room_service_url = current_app.config.get("ROOM_SERVICE_URL", "http://room-service:5001")
-    try:
-        # Fix the URL construction to include /rooms prefix and the correct path for blackout periods
-        response = requests.get(
-            f"{room_service_url}/rooms/{room_id}/blackout",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "X-User-Role": "user"  # Add role header that room service requires
-            }
-        )
-        current_app.logger.debug(f"Blackout check response status: {response.status_code}")
-        response.raise_for_status()
-        blackout_periods = response.json()
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"Failed to fetch blackout periods: {e}")
-        # Try alternate URL if the first one fails
-        try:
-            # Try with localhost if service name doesn't work
-            alternate_url = "http://localhost:5001" if "room-service" in room_service_url else "http://room-service:5001"
-            current_app.logger.debug(f"Trying alternate URL: {alternate_url}")
-            response = requests.get(
-                f"{alternate_url}/rooms/{room_id}/blackout",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "X-User-Role": "user"
-                }
-            )
-            response.raise_for_status()
-            blackout_periods = response.json()
-        except requests.exceptions.RequestException as e2:
-            current_app.logger.error(f"Failed with alternate URL too: {str(e2)}")
-            return False, "Failed to fetch blackout periods from room-service"
-
-    for bp in blackout_periods:
-        bp_start = datetime.fromisoformat(bp['start_time'])
-        bp_end = datetime.fromisoformat(bp['end_time'])
-        if not (end_time <= bp_start or start_time >= bp_end):
-            return False, f"Reservation conflicts with a blackout period: {bp.get('reason', 'No reason provided')}"
-
-    return True, None
-
-def send_to_external_calendar(user_email, ics_content):
-    """Send the calendar event to an external calendar system."""
-    # Placeholder for integration with external calendar APIs (e.g., Google Calendar, Microsoft Outlook)
-    # For now, this function will log the event and simulate success.
-    current_app.logger.info(f"Sending calendar event for {user_email} to external calendar system.")
-    # Simulate success
-    return True
+def blackout_conflict_message(reason):
+    """Error message for a booking that overlaps a blackout period."""
+    return f"Reservation conflicts with a blackout period: {reason or 'No reason provided'}"
 
 def is_email_notifications_enabled():
     """Check if email notifications are enabled."""
@@ -133,6 +289,26 @@ def get_operating_hours():
     end_hour = int(os.getenv('OPERATING_HOURS_END', 18))  # Default to 6 PM
     return start_hour, end_hour
 
+def check_booking_window(start_time, end_time):
+    """Enforce booking lead time and operating hours. Returns an error message or None."""
+    booking_lead_time = get_booking_lead_time()
+    if (start_time - datetime.utcnow()).total_seconds() / 3600 < booking_lead_time:
+        return f"Reservations must be made at least {booking_lead_time} hours in advance"
+
+    operating_start, operating_end = get_operating_hours()
+    if not (operating_start <= start_time.hour < operating_end and operating_start < end_time.hour <= operating_end):
+        return f"Reservations must be within operating hours: {operating_start}:00 to {operating_end}:00"
+    return None
+
+def check_booking_policy(user_role, start_time):
+    """Enforce how far in advance a role may book. Returns an error message or None."""
+    booking_policy = BOOKING_POLICIES.get(user_role, BOOKING_POLICIES['guest'])  # Default to guest policy if role is unknown
+    max_days_in_advance = booking_policy['max_days_in_advance']
+
+    if (start_time - datetime.utcnow()).days > max_days_in_advance:
+        return f"Users with role '{user_role}' can only book up to {max_days_in_advance} days in advance"
+    return None
+
 # Create a new reservation
 @reservation_bp.route('/', methods=['POST'])
 @token_required
@@ -150,6 +326,7 @@ def create_reservation(user_id, token):
         end_time = start_time + timedelta(minutes=duration)
         recurrence = data.get('recurrence')  # Optional recurrence pattern (e.g., "weekly", "monthly")
         occurrences = int(data.get('occurrences', 1))  # Number of occurrences for the recurrence
+        rule = data.get('rrule')  # Optional RFC 5545 rule, e.g. "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=20"
     except (ValueError, TypeError) as e:
         return jsonify({"message": "Invalid data format for room_id, start_time, duration, or num_attendees", "error": str(e)}), 400
 
@@ -162,19 +339,31 @@ def create_reservation(user_id, token):
     if recurrence and occurrences <= 0:
         return jsonify({"message": "Occurrences must be greater than zero for recurring meetings"}), 400
 
-    # --- Enforce Booking Lead Time ---
-    booking_lead_time = get_booking_lead_time()
-    if (start_time - datetime.utcnow()).total_seconds() / 3600 < booking_lead_time:
-        return jsonify({"message": f"Reservations must be made at least {booking_lead_time} hours in advance"}), 403
-
-    # --- Enforce Operating Hours ---
-    operating_start, operating_end = get_operating_hours()
-    if not (operating_start <= start_time.hour < operating_end and operating_start < end_time.hour <= operating_end):
-        return jsonify({"message": f"Reservations must be within operating hours: {operating_start}:00 to {operating_end}:00"}), 403
+    # Recurring bookings are stored once as a series; its occurrences are only expanded here for the conflict check
+    series_rule = None
+    starts = [start_time]
+    if recurrence or rule:
+        try:
+            series_rule = build_rule(recurrence, occurrences, rule)
+            starts = rule_occurrences(series_rule, start_time)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+    intervals = [(start, start + timedelta(minutes=duration)) for start in starts]
+    start_time, end_time = intervals[0]  # A start_time that does not match the rule is not an occurrence
+
+    # --- Enforce Booking Lead Time and Operating Hours ---
+    error_message = check_booking_window(start_time, end_time)
+    if error_message:
+        return jsonify({"message": error_message}), 403
 
     # --- Inter-service communication/validation ---
+    # Room and user lookups are independent: run them concurrently, checking results in order
+    (room_details, user_details), _ = run_concurrently([
+        (get_room_details, room_id, token),
+        (get_user_details, user_id, token)
+    ], is_fatal=lambda details: not details)
+
     # 1. Validate Room exists and check capacity
-    room_details = get_room_details(room_id, token)
     if not room_details:
         return jsonify({"message": f"Room with ID {room_id} not found or room service unavailable"}), 404
 
@@ -182,61 +371,67 @@ def create_reservation(user_id, token):
         return jsonify({"message": f"Room capacity ({room_details.get('capacity')}) is insufficient for {num_attendees} attendees"}), 400
 
     # 2. Validate User Role and Booking Policy
-    user_details = get_user_details(user_id, token)
     if not user_details or not user_details.get('role'):
         return jsonify({"message": "User role information is missing or user service unavailable"}), 403
 
-    user_role = user_details['role']
-    booking_policy = BOOKING_POLICIES.get(user_role, BOOKING_POLICIES['guest'])  # Default to guest policy if role is unknown
-    max_days_in_advance = booking_policy['max_days_in_advance']
-
-    if (start_time - datetime.utcnow()).days > max_days_in_advance:
-        return jsonify({"message": f"Users with role '{user_role}' can only book up to {max_days_in_advance} days in advance"}), 403
-
-    # --- Check for blackout periods ---
-    is_valid, error_message = check_blackout_periods(room_id, start_time, end_time, token)
-    if not is_valid:
+    error_message = check_booking_policy(user_details['role'], start_time)
+    if error_message:
         return jsonify({"message": error_message}), 403
 
-    reservations = []
+    # --- Check what the exclusion constraint cannot see ---
+    # A single reservation is checked against blackout periods and series occurrences only: an
+    # overlap with another reservation is rejected by the constraint on insert and returned as 409.
+    # A series is not a row, so it is also checked against existing reservations, under the
+    # room's exclusive schedule lock.
+    conflicts = []
+    if series_rule:
+        lock_room_schedules([room_id], exclusive=True)
+        conflicts, blackout_conflicts = find_conflicts(room_id, intervals)
+    else:
+        blackout_conflicts = find_blackout_conflicts(room_id, intervals)
+    if blackout_conflicts:
+        db.session.rollback()  # Release the schedule lock
+        return jsonify({"message": blackout_conflict_message(blackout_conflicts[0][4])}), 403
+    series_conflicts = find_series_conflicts(room_id, intervals)
+    if conflicts or series_conflicts:
+        db.session.rollback()  # Release the schedule lock
+        return conflict_response(conflicts, intervals, series_conflicts)
+
     try:
         attendees = data.get('attendees', [])  # Get attendees from the request
-        for i in range(occurrences):
-            # Calculate the start and end times for each occurrence
-            if recurrence == "weekly":
-                occurrence_start_time = start_time + timedelta(weeks=i)
-            elif recurrence == "monthly":
-                occurrence_start_time = start_time + timedelta(days=30 * i)
-            else:
-                occurrence_start_time = start_time
-
-            occurrence_end_time = occurrence_start_time + timedelta(minutes=duration)
-
-            # --- Check for overlaps ---
-            existing_reservation = check_overlap(room_id, occurrence_start_time, occurrence_end_time)
-            if existing_reservation:
-                return jsonify({"message": f"Time slot conflict for occurrence {i + 1} with an existing reservation"}), 409
-
+        if series_rule:
+            # Store the rule once instead of one row per occurrence
+            new_series = ReservationSeries(
+                user_id=user_id,
+                room_id=room_id,
+                rrule=series_rule,
+                dtstart=start_time,
+                duration=duration,
+                span_start=intervals[0][0],
+                span_end=intervals[-1][1],
+                purpose=data.get('purpose'),
+                num_attendees=num_attendees,
+                description=data.get('description'),
+                attendees=attendees
+            )
+            db.session.add(new_series)
+        else:
             # Create the reservation
             new_reservation = Reservation(
                 user_id=user_id,
                 room_id=room_id,
-                start_time=occurrence_start_time,
-                end_time=occurrence_end_time,
+                start_time=start_time,
+                end_time=end_time,
                 purpose=data.get('purpose'),
                 num_attendees=num_attendees,
                 description=data.get('description'),  # Add description
                 attendees=attendees  # Add attendees
             )
             db.session.add(new_reservation)
-            reservations.append(new_reservation)
 
-        db.session.commit()
-
-        # Send confirmation email for the first occurrence
+        # Queue confirmation email for the first occurrence (written in the same transaction)
         if is_email_notifications_enabled():
-            user_details = get_user_details(user_id, token)
-            if user_details and user_details.get('email'):
+            if user_details.get('email'):
                 email_body = (
                     f"Dear {user_details.get('full_name', 'User')},\n\n"
                     f"Your recurring reservation has been confirmed with the following details:\n"
@@ -245,8 +440,8 @@ def create_reservation(user_id, token):
                     f"End Time (First Occurrence): {end_time}\n"
                     f"Number of Attendees: {num_attendees}\n"
                     f"Purpose: {data.get('purpose', 'N/A')}\n"
-                    f"Recurrence: {recurrence if recurrence else 'None'}\n"
-                    f"Occurrences: {occurrences}\n\n"
+                    f"Recurrence: {series_rule if series_rule else 'None'}\n"
+                    f"Occurrences: {len(intervals)}\n\n"
                     f"Thank you for using our service!"
                 )
 
@@ -260,7 +455,7 @@ def create_reservation(user_id, token):
                     purpose=data.get('purpose', 'Meeting')
                 )
 
-                send_email(
+                queue_email(
                     to_email=user_details['email'],
                     subject="Meeting Room Reservation Confirmation",
                     body=email_body,
@@ -269,9 +464,9 @@ def create_reservation(user_id, token):
                 )
 
                 # Send to external calendar system
-                send_to_external_calendar(user_details['email'], ics_content)
+                queue_calendar_event(user_details['email'], ics_content)
 
-        # Send Email Invitations
+        # Queue Email Invitations
         if is_email_notifications_enabled() and attendees:
             email_body = (
                 f"Dear Attendee,\n\n"
@@ -296,7 +491,7 @@ def create_reservation(user_id, token):
             )
 
             for attendee_email in attendees:
-                send_email(
+                queue_email(
                     to_email=attendee_email,
                     subject="Meeting Invitation",
                     body=email_body,
@@ -304,59 +499,409 @@ def create_reservation(user_id, token):
                     attachment_name="meeting-invitation.ics"
                 )
 
-        # Publish Kafka events for all reservations
-        for reservation in reservations:
-            send_reservation_event("RESERVATION_CREATED", reservation.to_dict())
+        apply_usage_deltas((room_id, start, end, 1) for start, end in intervals)
+
+        # Queue one Kafka event per reservation or series in the same transaction
+        db.session.flush()  # Assigns the id
+        if series_rule:
+            reservations_data = [new_series.occurrence_dict(start, start, end) for start, end in intervals]
+            queue_reservation_event("RESERVATION_SERIES_CREATED", new_series.to_dict())
+        else:
+            reservations_data = [new_reservation.to_dict()]
+            queue_reservation_event("RESERVATION_CREATED", reservations_data[0])
+        db.session.commit()
 
-        return jsonify([reservation.to_dict() for reservation in reservations]), 201
+        return jsonify(reservations_data), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_overlap_violation(e):
+            # Overlaps another reservation (the only check for a single booking); list every conflicting occurrence
+            conflicts, _ = query_conflicts(room_id, intervals)
+            if conflicts:
+                return conflict_response(conflicts, intervals)
+            return jsonify({"message": "Time slot conflict with an existing reservation"}), 409
+        current_app.logger.error(f"Failed to create recurring reservations: {e}")
+        return jsonify({"message": "Failed to create recurring reservations", "error": str(e)}), 500
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Failed to create recurring reservations: {e}")
         return jsonify({"message": "Failed to create recurring reservations", "error": str(e)}), 500
 
 
-# Get all reservations (maybe filter by user or room?)
-@reservation_bp.route('/', methods=['GET'])
+def parse_bulk_item(item):
+    """Parse one bulk reservation item. Returns (fields, error message)."""
+    required_fields = ['room_id', 'start_time', 'duration', 'num_attendees']
+    if not isinstance(item, dict) or not all(field in item for field in required_fields):
+        return None, "Missing required fields: room_id, start_time, duration, num_attendees"
+    try:
+        start_time = datetime.fromisoformat(item['start_time'])
+        fields = {
+            "room_id": int(item['room_id']),
+            "start_time": start_time,
+            "end_time": start_time + timedelta(minutes=int(item['duration'])),
+            "num_attendees": int(item['num_attendees']),
+            "purpose": item.get('purpose'),
+            "description": item.get('description'),
+            "attendees": item.get('attendees', [])
+        }
+    except (ValueError, TypeError):
+        return None, "Invalid data format for room_id, start_time, duration, or num_attendees"
+
+    if fields['end_time'] <= fields['start_time']:
+        return None, "End time must be after start time"
+    if fields['num_attendees'] <= 0:
+        return None, "Number of attendees must be greater than zero"
+    return fields, check_booking_window(fields['start_time'], fields['end_time'])
+
+def lookup_rooms(room_ids, token):
+    """Return {room id: room details, or None if not found} for `room_ids`."""
+    return {room_id: get_room_details(room_id, token) for room_id in room_ids}
+
+# Create many reservations at once
+@reservation_bp.route('/bulk', methods=['POST'])
 @token_required
-def get_reservations(user_id, token):
+def create_reservations_bulk(user_id, token):
+    """
+    Create many single reservations in one request (e.g. facilities imports).
+    Accepts a JSON list of items shaped like the POST /reservations/ body (without recurrence),
+    or {"reservations": [...]}. Every distinct room is looked up once, blackout periods and
+    conflicts are found with one set-based query each and the accepted items are inserted with
+    a single batched statement. Email notifications are not sent for bulk imports.
+    """
+    data = request.get_json()
+    items = data.get('reservations') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"message": "Request body must be a non-empty list of reservations"}), 400
+    if len(items) > MAX_BULK_RESERVATIONS:
+        return jsonify({"message": f"At most {MAX_BULK_RESERVATIONS} reservations can be created per request"}), 400
+
+    results = [None] * len(items)
+    accepted = {}  # item index -> parsed fields
+    for i, item in enumerate(items):
+        fields, error_message = parse_bulk_item(item)
+        if error_message:
+            results[i] = {"index": i, "status": "invalid", "message": error_message}
+        else:
+            accepted[i] = fields
+
+    # --- User and room validation, rooms once per distinct room; the user lookup runs concurrently ---
+    (rooms, user_details), _ = run_concurrently([
+        (lookup_rooms, {fields['room_id'] for fields in accepted.values()}, token),
+        (get_user_details, user_id, token)
+    ], is_fatal=lambda result: False)
+    if not user_details or not user_details.get('role'):
+        return jsonify({"message": "User role information is missing or user service unavailable"}), 403
+
+    for i, fields in list(accepted.items()):
+        error_message = check_booking_policy(user_details['role'], fields['start_time'])
+        if error_message:
+            results[i] = {"index": i, "status": "invalid", "message": error_message}
+            del accepted[i]
+
+    for i, fields in list(accepted.items()):
+        room_details = rooms[fields['room_id']]
+        if not room_details:
+            error_message = f"Room with ID {fields['room_id']} not found or room service unavailable"
+        elif room_details.get('capacity', 0) < fields['num_attendees']:
+            error_message = f"Room capacity ({room_details.get('capacity')}) is insufficient for {fields['num_attendees']} attendees"
+        else:
+            continue
+        results[i] = {"index": i, "status": "invalid", "message": error_message}
+        del accepted[i]
+
+    # --- Blackout periods of every item, one set-based query against the local replica ---
+    indexes = list(accepted)
+    candidates = [(accepted[i]['room_id'], accepted[i]['start_time'], accepted[i]['end_time']) for i in indexes]
+    _, blackout_conflicts = query_candidate_conflicts(candidates, reservations=False, blackouts=True)
+    for candidate, _, _, _, reason in blackout_conflicts:
+        i = indexes[candidate]
+        if i in accepted:
+            results[i] = {"index": i, "status": "invalid", "message": blackout_conflict_message(reason)}
+            del accepted[i]
+
+    # --- Conflicts within the batch (first item in request order wins) ---
+    batch_rooms = {}
+    for i, fields in list(accepted.items()):
+        intervals = batch_rooms.setdefault(fields['room_id'], RoomIntervals())
+        start, end = to_seconds(fields['start_time']), to_seconds(fields['end_time'])
+        other = intervals.find_overlap(start, end)
+        if other is not None:
+            results[i] = {"index": i, "status": "conflict", "message": f"Time slot conflicts with item {other} of this request"}
+            del accepted[i]
+        else:
+            intervals.add(i, start, end)
+
+    created, reservations_data = [], []
+    for attempt in range(2):
+        # --- Conflicts with existing reservations and series, one set-based query each ---
+        indexes = list(accepted)
+        candidates = [(accepted[i]['room_id'], accepted[i]['start_time'], accepted[i]['end_time']) for i in indexes]
+        conflicts = []  # (item index, conflict details)
+        if candidates:
+            lock_room_schedules(room_id for room_id, _, _ in candidates)
+            reservation_conflicts, _ = query_candidate_conflicts(candidates)
+            for candidate, reservation_id, existing_start, existing_end in reservation_conflicts:
+                conflicts.append((indexes[candidate], {
+                    "conflicting_reservation_id": reservation_id,
+                    "conflicting_start_time": existing_start.isoformat(),
+                    "conflicting_end_time": existing_end.isoformat()
+                }))
+            for candidate, series_id, existing_start, existing_end in query_candidate_series_conflicts(candidates):
+                conflicts.append((indexes[candidate], {
+                    "conflicting_series_id": series_id,
+                    "conflicting_start_time": existing_start.isoformat(),
+                    "conflicting_end_time": existing_end.isoformat()
+                }))
+        for i, details in conflicts:
+            if i in accepted:
+                results[i] = {"index": i, "status": "conflict", "message": "Time slot conflict with an existing reservation", "conflicts": []}
+                del accepted[i]
+            results[i]["conflicts"].append(details)
+        if not accepted:
+            db.session.rollback()  # Release the schedule locks
+            break
+
+        try:
+            indexes = list(accepted)
+            rows = [dict(accepted[i], user_id=user_id) for i in indexes]
+            created = db.session.scalars(
+                insert(Reservation).returning(Reservation, sort_by_parameter_order=True), rows
+            ).all()
+            apply_usage_deltas((row['room_id'], row['start_time'], row['end_time'], 1) for row in rows)
+            reservations_data = [reservation.to_dict() for reservation in created]
+            queue_reservation_events("RESERVATION_CREATED", reservations_data)  # Kafka events, in the same transaction
+            db.session.commit()
+            break
+        except IntegrityError as e:
+            db.session.rollback()
+            created, reservations_data = [], []
+            if not is_overlap_violation(e) or attempt:
+                current_app.logger.error(f"Failed to create bulk reservations: {e}")
+                return jsonify({"message": "Failed to create reservations", "error": str(e)}), 500
+            # Lost a race against a concurrent booking: re-check conflicts and retry once
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to create bulk reservations: {e}")
+            return jsonify({"message": "Failed to create reservations", "error": str(e)}), 500
+
+    for i, reservation, reservation_dict in zip(indexes, created, reservations_data):
+        results[i] = {"index": i, "status": "created", "reservation": reservation_dict}
+
+    failed = len(items) - len(reservations_data)
+    return jsonify({"created": len(reservations_data), "failed": failed, "results": results}), 201 if not failed else 207
+
+
+def filter_reservations(query, series_query, user_id):
+    """Apply the user_id=self, room_id, start_time and end_time filters of the current request.
+
+    Returns (query, series_query, start_datetime, end_datetime); raises ValueError on invalid filters.
+    """
     # Add query parameters for filtering, e.g., ?user_id=self or ?room_id=123
     filter_user = request.args.get('user_id')
     filter_room = request.args.get('room_id')
     start_time = request.args.get('start_time')
     end_time = request.args.get('end_time')
-
-    query = Reservation.query
+    start_datetime = end_datetime = None
 
     if filter_user == 'self':
-        query = query.filter_by(user_id=user_id)
+        query = query.filter(Reservation.user_id == user_id)
+        series_query = series_query.filter(ReservationSeries.user_id == user_id)
 
     if filter_room:
         try:
-            query = query.filter_by(room_id=int(filter_room))
+            room_id = int(filter_room)
         except ValueError:
-            return jsonify({"message": "Invalid room_id format"}), 400
+            raise ValueError("Invalid room_id format")
+        query = query.filter(Reservation.room_id == room_id)
+        series_query = series_query.filter(ReservationSeries.room_id == room_id)
 
     if start_time and end_time:
         try:
             start_datetime = datetime.fromisoformat(start_time)
             end_datetime = datetime.fromisoformat(end_time)
-            query = query.filter(
-                or_(
-                    and_(Reservation.start_time >= start_datetime, Reservation.start_time < end_datetime),
-                    and_(Reservation.end_time > start_datetime, Reservation.end_time <= end_datetime),
-                    and_(Reservation.start_time <= start_datetime, Reservation.end_time >= end_datetime)
-                )
-            )
         except ValueError:
-            return jsonify({"message": "Invalid date format. Use ISO 8601 format."}), 400
+            raise ValueError("Invalid date format. Use ISO 8601 format.")
+        query = query.filter(
+            or_(
+                and_(Reservation.start_time >= start_datetime, Reservation.start_time < end_datetime),
+                and_(Reservation.end_time > start_datetime, Reservation.end_time <= end_datetime),
+                and_(Reservation.start_time <= start_datetime, Reservation.end_time >= end_datetime)
+            )
+        )
+        series_query = series_query.filter(
+            ReservationSeries.span_start < end_datetime, ReservationSeries.span_end > start_datetime
+        )
+    return query, series_query, start_datetime, end_datetime
+
+def merge_series_occurrences(items, series_rows, occurrences):
+    """Merge sorted (key, item) pairs with the occurrences of series read in span_start order.
+
+    A series is read and expanded only once the merge reaches its span_start (no occurrence of it
+    can sort earlier), so the series past the end of a page are never loaded.
+    """
+    heap = []
+    tiebreak = count()
+
+    def push(iterator):
+        for key, item in iterator:
+            heapq.heappush(heap, (key, next(tiebreak), item, iterator))
+            return
+
+    series_rows = iter(series_rows)
+    pending = next(series_rows, None)
+    push(iter(items))
+    while heap or pending is not None:
+        while pending is not None and (not heap or pending.span_start <= heap[0][0][0]):
+            push(occurrences(pending))
+            pending = next(series_rows, None)
+        if heap:
+            key, _, item, iterator = heapq.heappop(heap)
+            yield key, item
+            push(iterator)
+
+# Get all reservations (maybe filter by user or room?)
+@reservation_bp.route('/', methods=['GET'])
+@token_required
+def get_reservations(user_id, token):
+    """
+    List reservations and series occurrences ordered by start time, one page at a time.
+    Query parameters:
+    - user_id=self, room_id, start_time and end_time: filters (optional)
+    - limit: page size (default 100, at most 1000)
+    - cursor: value of the X-Next-Cursor header of the previous page
+    - fields: comma-separated keys to return, e.g. fields=id,room_id,start_time
+    """
+    try:
+        query, series_query, start_datetime, end_datetime = filter_reservations(
+            Reservation.query, ReservationSeries.query, user_id
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # --- Pagination and field projection ---
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError:
+        return jsonify({"message": "Invalid limit or cursor"}), 400
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({"message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    fields = None
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in RESERVATION_FIELDS]
+        if unknown:
+            return jsonify({"message": f"Unknown fields: {', '.join(unknown)}", "fields": list(RESERVATION_FIELDS)}), 400
+        # The sort key columns are always loaded, other columns only when requested
+        columns = {'id', 'start_time'} | (set(fields) & set(Reservation.__table__.columns.keys()))
+        query = query.options(load_only(*(getattr(Reservation, name) for name in columns)))
+
+    if after:
+        query = query.filter(tuple_(Reservation.start_time, Reservation.id) > after)
+        series_query = series_query.filter(ReservationSeries.span_end > after[0])
 
     try:
-        reservations = query.order_by(Reservation.start_time).all()
-        return jsonify([res.to_dict() for res in reservations])
+        # Reservations are ordered by (start_time, id) and series occurrences by (start_time, -series id)
+        reservations = [
+            ((res.start_time, res.id), res.to_dict(fields))
+            for res in query.order_by(Reservation.start_time, Reservation.id).limit(limit + 1)
+        ]
+        if len(reservations) > limit:
+            # The page ends at the last reservation at the latest; later series cannot be on it
+            series_query = series_query.filter(ReservationSeries.span_start <= reservations[limit][0][0])
+        if fields is not None:
+            columns = {'id', 'rrule', 'dtstart', 'duration', 'span_start'} | (set(fields) & set(ReservationSeries.__table__.columns.keys()))
+            series_query = series_query.options(load_only(*(getattr(ReservationSeries, name) for name in columns)))
+        window_start = max((bound for bound in (start_datetime, after and after[0]) if bound), default=None)
+
+        def occurrences(series):
+            # Series occurrences are expanded for the requested window only, and only as far as the page needs
+            for original_start, start, end, exception in expand_series(series, window_start, end_datetime):
+                key = (start, -series.id)
+                if after is None or key > after:
+                    yield key, series.occurrence_dict(original_start, start, end, exception, fields)
+
+        series_rows = series_query.order_by(ReservationSeries.span_start, ReservationSeries.id).yield_per(limit + 1)
+        page = list(islice(merge_series_occurrences(reservations, series_rows, occurrences), limit + 1))
+        response = jsonify([reservation for _, reservation in page[:limit]])
+        if len(page) > limit:
+            response.headers['X-Next-Cursor'] = encode_cursor(page[limit - 1][0])
+        return response
     except Exception as e:
         current_app.logger.error(f"Error retrieving reservations: {str(e)}")
         return jsonify({"message": "Failed to retrieve reservations", "error": str(e)}), 500
 
+def export_rows(query, series_query, start_datetime, end_datetime):
+    """Yield export rows (dicts of RESERVATION_FIELDS) without materializing the result set.
+
+    Reservations are read as plain column tuples through a server-side cursor; series are read the
+    same way and their occurrences expanded one at a time.
+    """
+    columns = [name for name in RESERVATION_FIELDS if name in Reservation.__table__.columns]
+    for row in query.with_entities(*(getattr(Reservation, name) for name in columns)).order_by(Reservation.id).yield_per(EXPORT_BATCH_SIZE):
+        data = dict.fromkeys(RESERVATION_FIELDS)
+        for name, value in zip(columns, row):
+            data[name] = value.isoformat() if isinstance(value, datetime) else value
+        yield data
+
+    for series in series_query.order_by(ReservationSeries.id).yield_per(EXPORT_BATCH_SIZE):
+        for original_start, start, end, exception in expand_series(series, start_datetime, end_datetime):
+            yield series.occurrence_dict(original_start, start, end, exception)
+
+def export_chunks(rows, export_format):
+    """Serialize export rows as NDJSON or CSV, yielding a chunk every EXPORT_BATCH_SIZE rows."""
+    buffer = io.StringIO()
+    writer = None
+    if export_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=RESERVATION_FIELDS)
+        writer.writeheader()
+    for row_number, data in enumerate(rows, 1):
+        if writer:
+            writer.writerow(dict(data, attendees=';'.join(data['attendees'] or [])))
+        else:
+            buffer.write(json.dumps(data) + '\n')
+        if row_number % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# Stream every matching reservation for data warehouse exports
+@reservation_bp.route('/export', methods=['GET'])
+@token_required
+def export_reservations(user_id, token):
+    """
+    Stream reservations and series occurrences as NDJSON or CSV.
+    Query parameters:
+    - format: ndjson (default) or csv
+    - user_id=self, room_id, start_time and end_time: same filters as GET /reservations/
+    - updated_since: only rows (or series) created or changed at or after this time (ISO 8601)
+    Memory use does not depend on the number of rows. Deletions are not exported; they are
+    published as RESERVATION_DELETED events.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({"message": f"Unsupported format. Use one of: {', '.join(EXPORT_MIMETYPES)}"}), 400
+
+    try:
+        query, series_query, start_datetime, end_datetime = filter_reservations(
+            db.session.query(Reservation), ReservationSeries.query, user_id
+        )
+        if request.args.get('updated_since'):
+            updated_since = datetime.fromisoformat(request.args['updated_since'])
+            query = query.filter(Reservation.updated_at >= updated_since)
+            series_query = series_query.filter(ReservationSeries.updated_at >= updated_since)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    rows = export_rows(query, series_query, start_datetime, end_datetime)
+    response = current_app.response_class(
+        stream_with_context(export_chunks(rows, export_format)), mimetype=EXPORT_MIMETYPES[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="reservations.{export_format}"'
+    return response
+
 # Get a specific reservation by ID
 @reservation_bp.route('/<int:reservation_id>', methods=['GET'])
 @token_required
@@ -413,23 +958,31 @@ def update_reservation(user_id, token, reservation_id):
              if not room_details:
                  return jsonify({"message": f"Room with ID {new_room_id} not found or room service unavailable"}), 404 # Or 400
 
-        existing_reservation = check_overlap(new_room_id, new_start_time, new_end_time, exclude_reservation_id=reservation_id)
-        if existing_reservation:
+        # Overlaps with other reservations are rejected by the exclusion constraint on update (409 below)
+        intervals = [(new_start_time, new_end_time)]
+        blackout_conflicts = find_blackout_conflicts(new_room_id, intervals)
+        if blackout_conflicts:
+            db.session.rollback()  # Release the schedule lock
+            return jsonify({"message": blackout_conflict_message(blackout_conflicts[0][4])}), 403
+        if find_series_conflicts(new_room_id, intervals):
+            db.session.rollback()  # Release the schedule lock
             return jsonify({"message": "Time slot conflict with an existing reservation"}), 409 # Conflict
 
     try:
+        apply_usage_deltas([
+            (reservation.room_id, reservation.start_time, reservation.end_time, -1),
+            (new_room_id, new_start_time, new_end_time, 1)
+        ])
         reservation.room_id = new_room_id
         reservation.start_time = new_start_time
         reservation.end_time = new_end_time
         reservation.purpose = data.get('purpose', reservation.purpose)
         reservation.num_attendees = data.get('num_attendees', reservation.num_attendees)
         reservation.description = data.get('description', reservation.description)  # Update description
-        db.session.commit()
-        reservation_dict = reservation.to_dict()  # Get dict before potential session closure
+        reservation_dict = reservation.to_dict()
 
-        # --- Send Notification Email ---
+        # --- Queue Notification Email (delivered after commit by the notification worker) ---
         if is_email_notifications_enabled():
-            user_details = get_user_details(user_id, token)
             if user_details and user_details.get('email'):
                 email_body = (
                     f"Dear {user_details.get('full_name', 'User')},\n\n"
@@ -441,18 +994,23 @@ def update_reservation(user_id, token, reservation_id):
                     f"Please check your schedule for the updated details.\n\n"
                     f"Thank you!"
                 )
-                send_email(
+                queue_email(
                     to_email=user_details['email'],
                     subject="Meeting Room Reservation Updated",
                     body=email_body
                 )
-        # --- End Email Sending ---
+        # --- End Email Queueing ---
 
-        # --- Publish Kafka Event ---
-        send_reservation_event("RESERVATION_UPDATED", reservation_dict)
-        # --- End Kafka Event ---
+        queue_reservation_event("RESERVATION_UPDATED", reservation_dict)  # Kafka event, in the same transaction
+        db.session.commit()
 
         return jsonify(reservation_dict)
+    except IntegrityError as e:
+        db.session.rollback()
+        if is_overlap_violation(e):
+            return jsonify({"message": "Time slot conflict with an existing reservation"}), 409 # Conflict
+        current_app.logger.error(f"Failed to update reservation {reservation_id}: {e}")
+        return jsonify({"message": "Failed to update reservation", "error": str(e)}), 500
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Failed to update reservation {reservation_id}: {e}")
@@ -480,12 +1038,11 @@ def delete_reservation(user_id, token, reservation_id):
 
     try:
         reservation_dict = reservation.to_dict()  # Capture state before deleting
+        apply_usage_deltas([(reservation.room_id, reservation.start_time, reservation.end_time, -1)])
         db.session.delete(reservation)
-        db.session.commit()
 
-        # --- Send Notification Email ---
+        # --- Queue Notification Email (delivered after commit by the notification worker) ---
         if is_email_notifications_enabled():
-            user_details = get_user_details(user_id, token)
             if user_details and user_details.get('email'):
                 email_body = (
                     f"Dear {user_details.get('full_name', 'User')},\n\n"
@@ -497,16 +1054,15 @@ def delete_reservation(user_id, token, reservation_id):
                     f"Please update your schedule accordingly.\n\n"
                     f"Thank you!"
                 )
-                send_email(
+                queue_email(
                     to_email=user_details['email'],
                     subject="Meeting Room Reservation Canceled",
                     body=email_body
                 )
-        # --- End Email Sending ---
+        # --- End Email Queueing ---
 
-        # --- Publish Kafka Event ---
-        send_reservation_event("RESERVATION_DELETED", reservation_dict)
-        # --- End Kafka Event ---
+        queue_reservation_event("RESERVATION_DELETED", reservation_dict)  # Kafka event, in the same transaction
+        db.session.commit()
 
         return jsonify({"message": "Reservation deleted successfully"})
     except Exception as e:
@@ -514,6 +1070,238 @@ def delete_reservation(user_id, token, reservation_id):
         current_app.logger.error(f"Failed to delete reservation {reservation_id}: {e}")
         return jsonify({"message": "Failed to delete reservation", "error": str(e)}), 500
 
+# Get a recurring reservation series with its rule and exceptions
+@reservation_bp.route('/series/<int:series_id>', methods=['GET'])
+@token_required
+def get_reservation_series(user_id, token, series_id):
+    series = ReservationSeries.query.get(series_id)
+    if not series:
+        return jsonify({"message": "Reservation series not found"}), 404
+    return jsonify(series.to_dict())
+
+# Delete a whole series (only owner or admin)
+@reservation_bp.route('/series/<int:series_id>', methods=['DELETE'])
+@token_required
+def delete_reservation_series(user_id, token, series_id):
+    """
+    Cancel every upcoming occurrence of a series.
+    A series that already started is ended instead of deleted: its rule is cut before now, so
+    occurrences already held stay in the reservation history and the usage report.
+    """
+    series = ReservationSeries.query.get(series_id)
+    if not series:
+        return jsonify({"message": "Reservation series not found"}), 404
+
+    # --- Enforce Cancellation Deadline on the next occurrence ---
+    now = datetime.utcnow()
+    cancellation_deadline = get_cancellation_deadline()
+    next_occurrence = next((occurrence for occurrence in expand_series(series, now) if occurrence[1] >= now), None)
+    if next_occurrence and (next_occurrence[1] - now).total_seconds() / 3600 < cancellation_deadline:
+        return jsonify({"message": f"Cancellations must be made at least {cancellation_deadline} hours before the reservation start time"}), 403
+
+    # --- Authorization Check ---
+    user_details = get_user_details(user_id, token)
+    is_admin = user_details and user_details.get('role') == 'admin'
+
+    if series.user_id != user_id and not is_admin:
+        return jsonify({"message": "Forbidden: You can only delete your own reservations"}), 403
+
+    try:
+        started = next(expand_series(series, window_end=now), None) is not None
+        if started:
+            removed = end_series(series, now)
+            apply_usage_deltas((series.room_id, start, end, -1) for start, end in removed)
+            series.updated_at = now
+            series_dict = series.to_dict()
+        else:
+            series_dict = series.to_dict()  # Capture state before deleting
+            apply_usage_deltas(series_usage_changes(series, -1))
+            db.session.delete(series)
+
+        if is_email_notifications_enabled() and user_details and user_details.get('email'):
+            queue_email(
+                to_email=user_details['email'],
+                subject="Meeting Room Reservation Canceled",
+                body=(
+                    f"Dear {user_details.get('full_name', 'User')},\n\n"
+                    f"The following recurring reservation has been canceled"
+                    f"{f' from {now.isoformat()} on' if started else ''}:\n"
+                    f"Room: {series_dict['room_id']}\n"
+                    f"First Occurrence: {series_dict['start_time']}\n"
+                    f"Recurrence: {series_dict['rrule']}\n"
+                    f"Purpose: {series_dict['purpose']}\n\n"
+                    f"Please update your schedule accordingly.\n\n"
+                    f"Thank you!"
+                )
+            )
+
+        # Kafka event, in the same transaction
+        queue_reservation_event("RESERVATION_SERIES_UPDATED" if started else "RESERVATION_SERIES_DELETED", series_dict)
+        db.session.commit()
+        if started:
+            return jsonify({"message": "Upcoming occurrences of the reservation series canceled", "series": series_dict})
+        return jsonify({"message": "Reservation series deleted successfully"})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to delete reservation series {series_id}: {e}")
+        return jsonify({"message": "Failed to delete reservation series", "error": str(e)}), 500
+
+def get_series_occurrence(series_id, occurrence_start):
+    """Load a series and one of its occurrences. Returns (series, original start, occurrence, error response)."""
+    series = ReservationSeries.query.get(series_id)
+    if not series:
+        return None, None, None, (jsonify({"message": "Reservation series not found"}), 404)
+    try:
+        original_start = datetime.fromisoformat(occurrence_start)
+    except ValueError:
+        return None, None, None, (jsonify({"message": "Invalid occurrence start. Use ISO 8601 format."}), 400)
+    occurrence = find_occurrence(series, original_start)
+    if not occurrence:
+        return None, None, None, (jsonify({"message": "Occurrence not found"}), 404)
+    return series, original_start, occurrence, None
+
+# Move or edit one occurrence of a series (only owner or admin)
+@reservation_bp.route('/series/<int:series_id>/occurrences/<occurrence_start>', methods=['PUT'])
+@token_required
+def update_series_occurrence(user_id, token, series_id, occurrence_start):
+    series, original_start, occurrence, error = get_series_occurrence(series_id, occurrence_start)
+    if error:
+        return error
+    current_start, current_end, exception = occurrence
+
+    # --- Time Limit Check ---
+    if datetime.utcnow() > current_start - MODIFICATION_TIME_LIMIT:
+        return jsonify({"message": "Modifications are not allowed within 1 hour of the reservation start time"}), 403
+
+    # --- Authorization Check ---
+    user_details = get_user_details(user_id, token)
+    is_admin = user_details and user_details.get('role') == 'admin'
+
+    if series.user_id != user_id and not is_admin:
+        return jsonify({"message": "Forbidden: You can only update your own reservations"}), 403
+
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        new_start_time = datetime.fromisoformat(data['start_time']) if 'start_time' in data else current_start
+        new_end_time = datetime.fromisoformat(data['end_time']) if 'end_time' in data else current_end
+    except (ValueError, TypeError) as e:
+        return jsonify({"message": "Invalid data format for time", "error": str(e)}), 400
+
+    if new_end_time <= new_start_time:
+        return jsonify({"message": "End time must be after start time"}), 400
+
+    # --- Check for overlaps (excluding this occurrence) ---
+    if (new_start_time, new_end_time) != (current_start, current_end):
+        lock_room_schedules([series.room_id], exclusive=True)
+        intervals = [(new_start_time, new_end_time)]
+        # A moved occurrence is not a row: check reservations in the database, not the index
+        conflicts, blackout_conflicts = query_conflicts(series.room_id, intervals, blackouts=True)
+        if blackout_conflicts:
+            db.session.rollback()  # Release the schedule lock
+            return jsonify({"message": blackout_conflict_message(blackout_conflicts[0][4])}), 403
+        if conflicts or find_series_conflicts(
+                series.room_id, intervals, exclude_occurrence=(series.id, original_start)):
+            db.session.rollback()  # Release the schedule lock
+            return jsonify({"message": "Time slot conflict with an existing reservation"}), 409 # Conflict
+
+    try:
+        apply_usage_deltas([
+            (series.room_id, current_start, current_end, -1),
+            (series.room_id, new_start_time, new_end_time, 1)
+        ])
+        if exception is None:
+            exception = ReservationSeriesException(series=series, original_start=original_start)
+            db.session.add(exception)
+        exception.start_time = new_start_time
+        exception.end_time = new_end_time
+        exception.purpose = data.get('purpose', exception.purpose)
+        exception.description = data.get('description', exception.description)
+        series.span_start = min(series.span_start, new_start_time)
+        series.span_end = max(series.span_end, new_end_time)
+        series.updated_at = datetime.utcnow()
+        occurrence_dict = series.occurrence_dict(original_start, new_start_time, new_end_time, exception)
+
+        if is_email_notifications_enabled() and user_details and user_details.get('email'):
+            queue_email(
+                to_email=user_details['email'],
+                subject="Meeting Room Reservation Updated",
+                body=(
+                    f"Dear {user_details.get('full_name', 'User')},\n\n"
+                    f"The following reservation has been updated:\n"
+                    f"Room: {occurrence_dict['room_id']}\n"
+                    f"Start Time: {occurrence_dict['start_time']}\n"
+                    f"End Time: {occurrence_dict['end_time']}\n"
+                    f"Purpose: {occurrence_dict['purpose']}\n\n"
+                    f"Please check your schedule for the updated details.\n\n"
+                    f"Thank you!"
+                )
+            )
+
+        queue_reservation_event("RESERVATION_UPDATED", occurrence_dict)  # Kafka event, in the same transaction
+        db.session.commit()
+        return jsonify(occurrence_dict)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to update occurrence {occurrence_start} of series {series_id}: {e}")
+        return jsonify({"message": "Failed to update reservation", "error": str(e)}), 500
+
+# Cancel one occurrence of a series (only owner or admin)
+@reservation_bp.route('/series/<int:series_id>/occurrences/<occurrence_start>', methods=['DELETE'])
+@token_required
+def delete_series_occurrence(user_id, token, series_id, occurrence_start):
+    series, original_start, occurrence, error = get_series_occurrence(series_id, occurrence_start)
+    if error:
+        return error
+    current_start, current_end, exception = occurrence
+
+    # --- Enforce Cancellation Deadline ---
+    cancellation_deadline = get_cancellation_deadline()
+    if (current_start - datetime.utcnow()).total_seconds() / 3600 < cancellation_deadline:
+        return jsonify({"message": f"Cancellations must be made at least {cancellation_deadline} hours before the reservation start time"}), 403
+
+    # --- Authorization Check ---
+    user_details = get_user_details(user_id, token)
+    is_admin = user_details and user_details.get('role') == 'admin'
+
+    if series.user_id != user_id and not is_admin:
+        return jsonify({"message": "Forbidden: You can only delete your own reservations"}), 403
+
+    try:
+        occurrence_dict = series.occurrence_dict(original_start, current_start, current_end, exception)
+        apply_usage_deltas([(series.room_id, current_start, current_end, -1)])
+        if exception is None:
+            exception = ReservationSeriesException(series=series, original_start=original_start)
+            db.session.add(exception)
+        exception.cancelled = True
+        series.updated_at = datetime.utcnow()
+
+        if is_email_notifications_enabled() and user_details and user_details.get('email'):
+            queue_email(
+                to_email=user_details['email'],
+                subject="Meeting Room Reservation Canceled",
+                body=(
+                    f"Dear {user_details.get('full_name', 'User')},\n\n"
+                    f"The following reservation has been canceled:\n"
+                    f"Room: {occurrence_dict['room_id']}\n"
+                    f"Start Time: {occurrence_dict['start_time']}\n"
+                    f"End Time: {occurrence_dict['end_time']}\n"
+                    f"Purpose: {occurrence_dict['purpose']}\n\n"
+                    f"Please update your schedule accordingly.\n\n"
+                    f"Thank you!"
+                )
+            )
+
+        queue_reservation_event("RESERVATION_DELETED", occurrence_dict)  # Kafka event, in the same transaction
+        db.session.commit()
+        return jsonify({"message": "Reservation deleted successfully"})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to cancel occurrence {occurrence_start} of series {series_id}: {e}")
+        return jsonify({"message": "Failed to delete reservation", "error": str(e)}), 500
+
 @reservation_bp.route('/reports/usage', methods=['GET'])
 @token_required
 def generate_usage_report(user_id, token):
@@ -522,52 +1310,39 @@ def generate_usage_report(user_id, token):
     Query parameters:
     - start_time: Start of the time range (ISO 8601 format, optional)
     - end_time: End of the time range (ISO 8601 format, optional)
+    Counts bookings starting at or after start_time and ending at or before end_time, as before the
+    room_usage_daily rollup: whole days come from the rollup, partial days from the bookings.
     """
     start_time = request.args.get('start_time')
     end_time = request.args.get('end_time')
 
-    query = db.session.query(
-        Reservation.room_id,
-        func.count(Reservation.id).label('total_bookings'),
-        func.sum(func.extract('epoch', Reservation.end_time - Reservation.start_time) / 3600).label('total_hours')
-    ).group_by(Reservation.room_id)
-
     if start_time:
         try:
             start_time = datetime.fromisoformat(start_time)
-            query = query.filter(Reservation.start_time >= start_time)
         except ValueError:
             return jsonify({"message": "Invalid start_time format. Use ISO 8601 format."}), 400
 
     if end_time:
         try:
             end_time = datetime.fromisoformat(end_time)
-            query = query.filter(Reservation.end_time <= end_time)
         except ValueError:
             return jsonify({"message": "Invalid end_time format. Use ISO 8601 format."}), 400
 
-    results = query.all()
+    # Sum the pre-aggregated daily buckets instead of scanning the reservation history; only partial days are scanned
+    usage = usage_report(start_time or None, end_time or None)
 
-    # Fetch room details from room-service
-    room_service_url = current_app.config.get("ROOM_SERVICE_URL", "http://room-service:5001")
-    try:
-        response = requests.get(f"{room_service_url}/rooms", headers={"Authorization": f"Bearer {token}"})
-        response.raise_for_status()
-        rooms = {room['id']: room for room in response.json()}
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"Failed to fetch room details: {e}")
-        return jsonify({"message": "Failed to fetch room details from room-service"}), 500
+    # Room names and capacities come from the local room catalog replica
+    rooms = get_rooms()
 
     # Build the report
     report = []
-    for result in results:
-        room_id = result.room_id
+    for room_id, total_bookings, total_hours in usage:
         room_details = rooms.get(room_id, {})
         report.append({
             "room_id": room_id,
             "room_name": room_details.get('name', 'Unknown'),
-            "total_bookings": result.total_bookings,
-            "total_hours": round(result.total_hours, 2),
+            "total_bookings": total_bookings,
+            "total_hours": round(float(total_hours), 2),
             "capacity": room_details.get('capacity', 'Unknown')
         })
 
@@ -0,0 +1,179 @@
+import logging
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import cast, Date, func, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .models import db, Reservation, ReservationSeries, RoomUsageDaily
+from .recurrence import expand_series
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 1000  # Series loaded per round trip while rebuilding
+
+
+def apply_usage_deltas(changes):
+    """Add booking deltas to the room_usage_daily rollup in the current transaction.
+
+    `changes` is an iterable of (room_id, start_time, end_time, sign) where sign is +1 for a booking
+    that was added and -1 for one that was removed. A booking counts towards the day it starts on.
+    Deltas are summed per (room_id, day) and written with a single INSERT ... ON CONFLICT statement,
+    in key order so concurrent writers lock buckets in the same order.
+    """
+    buckets = {}
+    for room_id, start_time, end_time, sign in changes:
+        bucket = buckets.setdefault((room_id, start_time.date()), [0, 0])
+        bucket[0] += sign
+        bucket[1] += sign * int((end_time - start_time).total_seconds())
+    rows = [
+        {"room_id": room_id, "day": day, "bookings": bookings, "booked_seconds": booked_seconds}
+        for (room_id, day), (bookings, booked_seconds) in sorted(buckets.items())
+        if bookings or booked_seconds
+    ]
+    if not rows:
+        return
+    statement = pg_insert(RoomUsageDaily).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[RoomUsageDaily.room_id, RoomUsageDaily.day],
+        set_={
+            "bookings": RoomUsageDaily.bookings + statement.excluded.bookings,
+            "booked_seconds": RoomUsageDaily.booked_seconds + statement.excluded.booked_seconds
+        }
+    ))
+
+
+def series_usage_changes(series, sign):
+    """Usage deltas for every current occurrence of a series."""
+    return [(series.room_id, start, end, sign) for _, start, end, _ in expand_series(series)]
+
+
+def booking_usage(starts_from=None, starts_before=None, ends_by=None, ends_after=None):
+    """Per-room [bookings, booked seconds] of reservations and series occurrences, read from the bookings themselves.
+
+    Counts bookings starting in [starts_from, starts_before) and, when given, ending at or before
+    `ends_by` or after `ends_after`. Used for the parts of a report range the daily buckets cannot
+    answer exactly, so the ranges passed here are at most a day long or end-bounded.
+    """
+    usage = {}
+    query = db.session.query(
+        Reservation.room_id,
+        func.count(Reservation.id),
+        func.sum(func.extract('epoch', Reservation.end_time - Reservation.start_time))
+    ).group_by(Reservation.room_id)
+    series_query = ReservationSeries.query
+    if starts_from:
+        query = query.filter(Reservation.start_time >= starts_from)
+        series_query = series_query.filter(ReservationSeries.span_end > starts_from)
+    if starts_before:
+        query = query.filter(Reservation.start_time < starts_before)
+        series_query = series_query.filter(ReservationSeries.span_start < starts_before)
+    if ends_by:
+        query = query.filter(Reservation.end_time <= ends_by)
+    if ends_after:
+        # Bookings in progress at `ends_after`, served by the exclusion constraint's GiST index
+        query = query.filter(func.tsrange(Reservation.start_time, Reservation.end_time).op('@>')(ends_after))
+        series_query = series_query.filter(ReservationSeries.span_end > ends_after)
+    for room_id, bookings, booked_seconds in query:
+        usage[room_id] = [bookings, float(booked_seconds)]
+
+    for series in series_query.yield_per(REBUILD_BATCH_SIZE):
+        for _, start, end, _ in expand_series(series, ends_after or starts_from, starts_before):
+            if ((starts_from and start < starts_from) or (ends_by and end > ends_by)
+                    or (ends_after and end <= ends_after)):
+                continue
+            bucket = usage.setdefault(series.room_id, [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += (end - start).total_seconds()
+    return usage
+
+
+def usage_report(start_time=None, end_time=None):
+    """Sum bookings per room. Returns (room_id, total_bookings, total_hours) rows ordered by room.
+
+    A booking is counted when it starts at or after `start_time` and ends at or before `end_time`.
+    Whole days inside the range are read from the daily buckets. Bookings starting on a partial
+    first or last day are read from the bookings themselves, and bookings starting on a whole day
+    but ending after `end_time` are subtracted, so the result does not depend on the bounds being
+    at midnight.
+    """
+    first_day = last_day = None
+    if start_time:
+        first_day = start_time.date() if start_time.time() == time() else start_time.date() + timedelta(days=1)
+    if end_time:
+        last_day = end_time.date()  # Exclusive
+    whole_days = not (first_day and last_day and first_day >= last_day)
+    partial_ranges = []  # [starts_from, starts_before) ranges read from the bookings themselves
+    if not whole_days:
+        partial_ranges.append((start_time, end_time))
+    else:
+        if start_time and start_time.time() != time():
+            partial_ranges.append((start_time, datetime.combine(first_day, time())))
+        if end_time and end_time.time() != time():
+            partial_ranges.append((datetime.combine(last_day, time()), end_time))
+
+    totals = {}
+    if whole_days:
+        query = db.session.query(
+            RoomUsageDaily.room_id, func.sum(RoomUsageDaily.bookings), func.sum(RoomUsageDaily.booked_seconds)
+        ).group_by(RoomUsageDaily.room_id)
+        if first_day:
+            query = query.filter(RoomUsageDaily.day >= first_day)
+        if last_day:
+            query = query.filter(RoomUsageDaily.day < last_day)
+        for room_id, bookings, booked_seconds in query:
+            totals[room_id] = [int(bookings), float(booked_seconds)]
+        if end_time:
+            # Bookings of the whole days that run past the end of the range
+            days_end = datetime.combine(last_day, time())
+            for room_id, (bookings, booked_seconds) in booking_usage(
+                    first_day and datetime.combine(first_day, time()), days_end, ends_after=end_time).items():
+                bucket = totals.setdefault(room_id, [0, 0.0])
+                bucket[0] -= bookings
+                bucket[1] -= booked_seconds
+
+    for starts_from, starts_before in partial_ranges:
+        for room_id, (bookings, booked_seconds) in booking_usage(starts_from, starts_before, ends_by=end_time).items():
+            bucket = totals.setdefault(room_id, [0, 0.0])
+            bucket[0] += bookings
+            bucket[1] += booked_seconds
+
+    return [
+        (room_id, bookings, booked_seconds / 3600.0)
+        for room_id, (bookings, booked_seconds) in sorted(totals.items())
+        if bookings > 0
+    ]
+
+
+def rebuild_usage():
+    """Rebuild room_usage_daily from the reservation and series tables in one transaction.
+
+    Reservation writes are blocked while the rollup is rebuilt so no delta is lost or counted twice.
+    Returns the number of buckets written.
+    """
+    db.session.execute(text("LOCK TABLE reservation, reservation_series IN SHARE MODE"))
+    db.session.query(RoomUsageDaily).delete()
+
+    day = cast(Reservation.start_time, Date)
+    db.session.execute(insert(RoomUsageDaily).from_select(
+        ['room_id', 'day', 'bookings', 'booked_seconds'],
+        db.session.query(
+            Reservation.room_id,
+            day,
+            func.count(Reservation.id),
+            func.sum(func.extract('epoch', Reservation.end_time - Reservation.start_time))
+        ).group_by(Reservation.room_id, day)
+    ))
+
+    # Series occurrences only exist once expanded, so they are added as deltas
+    changes = []
+    for series in ReservationSeries.query.yield_per(REBUILD_BATCH_SIZE):
+        changes.extend(series_usage_changes(series, 1))
+        if len(changes) >= REBUILD_BATCH_SIZE:
+            apply_usage_deltas(changes)
+            changes = []
+    apply_usage_deltas(changes)
+
+    buckets = db.session.query(func.count()).select_from(RoomUsageDaily).scalar()
+    db.session.commit()
+    logger.info(f"Usage rollup rebuilt with {buckets} daily buckets")
+    return buckets
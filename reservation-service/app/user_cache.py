@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = Counter('user_cache_hits_total', 'User details served from the local cache')
+CACHE_MISSES = Counter('user_cache_misses_total', 'User details fetched from user-service')
+CACHE_INVALIDATIONS = Counter('user_cache_invalidations_total', 'User cache entries dropped by user events')
+CACHE_SIZE = Gauge('user_cache_entries', 'User details currently cached')
+
+
+class UserCache:
+    """Bounded LRU cache of user details keyed by user id, with a TTL per entry.
+
+    Entries are dropped when user-service publishes a role change or a deletion
+    (see user_events.py); the TTL bounds staleness if an event is missed.
+    """
+
+    def __init__(self, max_size=10000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user id -> (expires_at, details)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions['user_cache'] = self
+        self.max_size = app.config.get('USER_CACHE_SIZE', self.max_size)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+
+    def get(self, user_id):
+        """Return the cached details of `user_id`, or None if missing or expired."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                CACHE_HITS.inc()
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[user_id]
+        CACHE_MISSES.inc()
+        return None
+
+    def set(self, user_id, details):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, dict(details))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            CACHE_SIZE.set(len(self._entries))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            removed = self._entries.pop(user_id, None) is not None
+            CACHE_SIZE.set(len(self._entries))
+        if removed:
+            CACHE_INVALIDATIONS.inc()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            CACHE_SIZE.set(0)
+
+
+user_cache = UserCache()
@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+import time
+
+from .event_bus import EventBusError, get_event_bus
+from .user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+consumer_thread = None
+stop_event = threading.Event()
+
+# Events published by user-service that make cached user details stale
+INVALIDATING_EVENTS = ("USER_ROLE_UPDATED", "USER_DELETED")
+
+
+def process_user_event(event):
+    """Drop the cached details of the user an event refers to."""
+    event_type = event.get("type")
+    user_id = (event.get("payload") or {}).get("id")
+    if event_type in INVALIDATING_EVENTS and user_id is not None:
+        user_cache.invalidate(user_id)
+        logger.info(f"User cache entry for user {user_id} invalidated by {event_type}")
+
+
+def consume_user_events(event_bus, topic):
+    """Consume the users topic and invalidate cache entries until stop_event is set.
+
+    Every process keeps its own cache, so the consumer joins no group: each one reads all
+    partitions from the latest offset. Events missed while disconnected cannot be replayed,
+    so the whole cache is cleared on every (re)connect.
+    """
+    consumer = None
+    while not stop_event.is_set():
+        try:
+            if consumer is None:
+                consumer = event_bus.consumer([topic], group_id=None, auto_offset_reset='latest')
+                user_cache.clear()
+                logger.info(f"User event consumer connected to topic '{topic}'.")
+
+            # Timeout to allow checking stop_event
+            for messages in consumer.poll(timeout_ms=1000).values():
+                for message in messages:
+                    try:
+                        process_user_event(json.loads(message.value.decode('utf-8')))
+                    except Exception as e:
+                        logger.error(f"Error processing user event: {e}", exc_info=True)
+
+        except EventBusError as e:
+            logger.error(f"Kafka error in user event consumer: {e}. Retrying in 10 seconds...")
+            if consumer:
+                consumer.close()
+            consumer = None
+            time.sleep(10)
+        except Exception as e:
+            logger.error(f"Unexpected error in user event consumer: {e}. Retrying in 10 seconds...", exc_info=True)
+            if consumer:
+                consumer.close()
+            consumer = None
+            time.sleep(10)
+
+    if consumer:
+        consumer.close()
+    logger.info("User event consumer stopped.")
+
+
+def start_user_event_consumer(app):
+    """Start the cache invalidation consumer in a daemon thread if an event bus is configured."""
+    global consumer_thread
+    event_bus = get_event_bus(app.config)
+    topic = app.config.get('KAFKA_USERS_TOPIC')
+    if event_bus is None or not topic:
+        app.logger.warning("Kafka is not configured; cached user details expire by TTL only.")
+        return
+    if consumer_thread is None or not consumer_thread.is_alive():
+        stop_event.clear()
+        consumer_thread = threading.Thread(
+            target=consume_user_events, args=(event_bus, topic), daemon=True
+        )
+        consumer_thread.start()
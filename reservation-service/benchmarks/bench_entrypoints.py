@@ -0,0 +1,70 @@
+"""Throughput of the development server (run.py) vs gunicorn (gunicorn.conf.py).
+
+Usage:
+    python benchmarks/bench_entrypoints.py --clients 50 200 --duration 10 --workers 4 --threads 8
+
+Starts the reservation service once per entrypoint on a local port, waits for
+/health and drives it with benchmarks/load_test.py's closed-loop clients. The
+default path (/health) needs no database; pass --path and --token to measure
+an endpoint against a configured database. Environment variables such as
+DATABASE_URL are passed through to the servers.
+"""
+from load_test import run  # First: monkey-patches the standard library for the greenlet clients
+
+import argparse  # noqa: E402
+import os  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import requests  # noqa: E402
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def wait_until_healthy(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url + '/health', timeout=1).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the reservation service entrypoints under load')
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--token', help='Bearer access token sent with every request')
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per client count')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5802)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PORT=str(args.port), GUNICORN_WORKERS=str(args.workers), GUNICORN_THREADS=str(args.threads))
+    entrypoints = [
+        ('run.py', [sys.executable, 'run.py', f'--port={args.port}']),
+        (f'gunicorn {args.workers}x{args.threads}', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app']),
+    ]
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    url = f'http://127.0.0.1:{args.port}'
+
+    print(f"{'entrypoint':<16} {'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, command in entrypoints:
+        server = subprocess.Popen(command, cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_healthy(url)
+            for clients in args.clients:
+                throughput, p50, _, p99, errors = run(url + args.path, headers, clients, args.duration)
+                print(f"{name:<16} {clients:>8} {throughput:>9.1f} {p50:>9.1f} {p99:>9.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+
+
+if __name__ == '__main__':
+    main()
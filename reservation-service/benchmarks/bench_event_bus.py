@@ -0,0 +1,99 @@
+"""Produce and consume throughput of the event bus backends, without a broker.
+
+Usage:
+    python benchmarks/bench_event_bus.py --backend memory sqlite --events 50000 --partitions 6 --consumers 1 3 6
+
+For each backend and consumer count, a producer writes --events records of
+--size bytes keyed by --keys room ids to a fresh topic with --partitions
+partitions. Then that many consumers in one group (threads of this process)
+poll batches of --max-records and commit after each batch until every record
+is consumed. Reports records per second for both sides and the records each
+consumer received. The sqlite log is written to a temporary file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.event_bus import InMemoryEventBus, SqliteEventBus  # noqa: E402
+
+
+def make_bus(backend, partitions, directory):
+    if backend == 'memory':
+        return InMemoryEventBus(partitions)
+    return SqliteEventBus(os.path.join(directory, f'bus-{uuid.uuid4().hex}.sqlite3'), partitions)
+
+
+def produce(bus, topic, events, size, keys):
+    producer = bus.producer()
+    value = b'x' * size
+    started = time.perf_counter()
+    for i in range(events):
+        producer.send(topic, value=value, key=str(i % keys).encode())
+    producer.flush()
+    producer.close()
+    return events / (time.perf_counter() - started)
+
+
+def consume(bus, topic, events, consumers, max_records):
+    remaining = [events]
+    lock = threading.Lock()
+    counts = [0] * consumers
+    members = [
+        bus.consumer([topic], group_id='bench', auto_offset_reset='earliest', max_poll_records=max_records)
+        for _ in range(consumers)
+    ]
+
+    def run(index, consumer):
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+            received = sum(len(records) for records in consumer.poll(timeout_ms=100).values())
+            consumer.commit()
+            counts[index] += received
+            with lock:
+                remaining[0] -= received
+
+    threads = [threading.Thread(target=run, args=(i, member)) for i, member in enumerate(members)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    for member in members:
+        member.close()
+    return events / elapsed, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure event bus backend throughput')
+    parser.add_argument('--backend', nargs='+', choices=['memory', 'sqlite'], default=['memory', 'sqlite'])
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--size', type=int, default=220, help='Value bytes (a compact reservation event is about 220)')
+    parser.add_argument('--keys', type=int, default=200, help='Distinct keys (rooms)')
+    parser.add_argument('--partitions', type=int, default=6)
+    parser.add_argument('--consumers', type=int, nargs='+', default=[1, 3, 6])
+    parser.add_argument('--max-records', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'consumers':>9} {'produce/s':>10} {'consume/s':>10}  per consumer")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in args.backend:
+            for consumers in args.consumers:
+                bus = make_bus(backend, args.partitions, directory)
+                topic = f'bench-{uuid.uuid4().hex}'
+                bus.create_topic(topic, args.partitions)
+                produced = produce(bus, topic, args.events, args.size, args.keys)
+                consumed, counts = consume(bus, topic, args.events, consumers, args.max_records)
+                print(f"{backend:<8} {consumers:>9} {produced:>10.0f} {consumed:>10.0f}  {counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Size and speed of reservation event encodings.
+
+Usage:
+    python benchmarks/bench_event_codec.py --events 20000 --batch 500
+
+Builds synthetic events shaped like the outbox payloads: single reservations,
+series occurrences and series with exceptions, with up to --max-attendees
+attendee emails. For each encoding it reports the mean bytes per event, the
+bytes per event after gzip compression of --batch events (the producer
+compresses whole record batches) and the encode/decode time per event:
+  * json: the previous value_serializer,
+  * msgpack-map: MessagePack keeping the payload keys,
+  * compact: app/event_codec.py schema version 1 (positional fields, integer timestamps).
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import msgpack
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import event_codec  # noqa: E402
+
+
+def iso(moment):
+    return moment.isoformat()
+
+
+def make_event(rng, max_attendees):
+    start = datetime(2025, 1, 1, 8) + timedelta(days=rng.randrange(365), minutes=30 * rng.randrange(20))
+    end = start + timedelta(minutes=30 * rng.randint(1, 6))
+    created = start - timedelta(days=rng.randrange(30), seconds=rng.randrange(86400), microseconds=rng.randrange(1000000))
+    common = {
+        'user_id': rng.randrange(1, 5000),
+        'room_id': rng.randrange(1, 200),
+        'purpose': rng.choice(['Team sync', 'Planning', 'Interview', '1:1', None]),
+        'num_attendees': rng.randint(1, 12),
+        'description': rng.choice([None, 'Weekly review of the roadmap and open incidents', 'Candidate onsite, bring laptop']),
+        'attendees': [f'person{rng.randrange(10000)}@example.com' for _ in range(rng.randint(0, max_attendees))],
+        'created_at': iso(created),
+        'updated_at': iso(created + timedelta(seconds=rng.randrange(3600), microseconds=rng.randrange(1000000))),
+    }
+    kind = rng.random()
+    if kind < 0.8:
+        event_type = rng.choice(['RESERVATION_CREATED', 'RESERVATION_UPDATED', 'RESERVATION_DELETED'])
+        payload = {'id': rng.randrange(1, 10 ** 7), **common, 'start_time': iso(start), 'end_time': iso(end), 'series_id': None}
+    elif kind < 0.95:
+        event_type = rng.choice(['RESERVATION_UPDATED', 'RESERVATION_DELETED'])
+        payload = {'id': None, **common, 'start_time': iso(start), 'end_time': iso(end),
+                   'series_id': rng.randrange(1, 10 ** 5), 'occurrence_start': iso(start)}
+    else:
+        event_type = rng.choice(['RESERVATION_SERIES_CREATED', 'RESERVATION_SERIES_DELETED'])
+        payload = {'id': rng.randrange(1, 10 ** 5), **common, 'rrule': 'FREQ=WEEKLY;COUNT=52', 'start_time': iso(start),
+                   'duration': 60, 'exceptions': [{'original_start': iso(start + timedelta(weeks=2)), 'cancelled': True,
+                                                   'start_time': None, 'end_time': None, 'purpose': None, 'description': None}]}
+    # Same key order as the model's to_dict(), which the compact schema relies on
+    fields = event_codec.SCHEMAS[1]['series' if event_type.startswith('RESERVATION_SERIES_') else 'reservation']
+    payload = {field: payload[field] for field in fields if field in payload}
+    return {'id': uuid.uuid4().hex, 'type': event_type, 'payload': payload}
+
+
+def encode_json(event):
+    return json.dumps(event).encode('utf-8'), None
+
+
+def decode_json(data, headers):
+    return json.loads(data.decode('utf-8'))
+
+
+def encode_msgpack_map(event):
+    return msgpack.packb(event, use_bin_type=True), None
+
+
+def decode_msgpack_map(data, headers):
+    return msgpack.unpackb(data, raw=False)
+
+
+def encode_compact(event):
+    return event_codec.encode_event(event, 'msgpack')  # Falls back to JSON for events outside the schema
+
+
+CODECS = (
+    ('json', encode_json, decode_json),
+    ('msgpack-map', encode_msgpack_map, decode_msgpack_map),
+    ('compact', encode_compact, event_codec.decode_event),
+)
+
+
+def measure(events, encode, decode, batch):
+    started = time.perf_counter()
+    records = [encode(event) for event in events]
+    encode_us = (time.perf_counter() - started) / len(events) * 1e6
+    started = time.perf_counter()
+    decoded = [decode(value, headers) for value, headers in records]
+    decode_us = (time.perf_counter() - started) / len(events) * 1e6
+    assert decoded == events, "encoding is not lossless"
+    values = [value for value, _ in records]
+    raw = sum(map(len, values)) / len(events)
+    compressed = sum(
+        len(gzip.compress(b''.join(values[i:i + batch]))) for i in range(0, len(values), batch)
+    ) / len(events)
+    return raw, compressed, encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare reservation event encodings')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=500, help='Events per compressed record batch')
+    parser.add_argument('--max-attendees', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    events = [make_event(rng, args.max_attendees) for _ in range(args.events)]
+    print(f"{'encoding':<12} {'bytes/event':>12} {'gzip bytes/event':>17} {'encode us':>10} {'decode us':>10}")
+    for name, encode, decode in CODECS:
+        raw, compressed, encode_us, decode_us = measure(events, encode, decode, args.batch)
+        print(f"{name:<12} {raw:>12.1f} {compressed:>17.1f} {encode_us:>10.2f} {decode_us:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
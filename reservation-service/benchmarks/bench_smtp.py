@@ -0,0 +1,112 @@
+"""SMTP delivery throughput before and after connection pooling.
+
+Usage:
+    pip install aiosmtpd
+    python benchmarks/bench_smtp.py --messages 500 --latency-ms 2
+
+Starts a local aiosmtpd sink as the SMTP stand-in and reports messages per
+second for:
+  * a new connection per message (the previous send_email behaviour),
+  * pooled send_email,
+  * send_email_batch (one message to many recipients),
+  * send_messages (many messages over one connection).
+The stand-in has no TLS or AUTH, so --latency-ms adds a per-command delay to
+approximate the round trips a real relay would cost.
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import SMTP as SMTPServer  # noqa: E402
+
+from app import email_utils  # noqa: E402
+
+ICS = b"BEGIN:VCALENDAR\nVERSION:2.0\nEND:VCALENDAR\n" * 20
+
+
+class SinkHandler:
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        await asyncio.sleep(self.latency)
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += len(envelope.rcpt_tos)
+        return '250 Message accepted for delivery'
+
+
+class SlowSMTP(SMTPServer):
+    """aiosmtpd server that adds latency to connection setup, like a remote relay would."""
+
+    async def _handle_client(self):
+        await asyncio.sleep(self.event_handler.latency * 3)  # TCP + greeting + EHLO
+        await super()._handle_client()
+
+
+class SlowController(Controller):
+    def factory(self):
+        return SlowSMTP(self.handler)
+
+
+def legacy_send(host, port, recipient):
+    msg = email_utils.build_message([recipient], "Meeting Invitation", "You are invited", ICS, "meeting-invitation.ics")
+    with smtplib.SMTP(host, port) as server:
+        server.send_message(msg)
+
+
+def measure(label, count, function):
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<38} {count / elapsed:>10.1f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SMTP delivery with and without pooling')
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Simulated per-command latency')
+    parser.add_argument('--batch-size', type=int, default=50, help='Recipients per batched message')
+    args = parser.parse_args()
+
+    handler = SinkHandler(args.latency_ms / 1000)
+    controller = SlowController(handler, hostname='127.0.0.1', port=8025)
+    controller.start()
+    os.environ.update(EMAIL_HOST='127.0.0.1', EMAIL_PORT='8025', EMAIL_FROM='bench@example.com',
+                      EMAIL_USE_TLS='false', EMAIL_POOL_SIZE='1')
+    os.environ.pop('EMAIL_USERNAME', None)
+    recipients = [f"attendee{i}@example.com" for i in range(args.messages)]
+
+    try:
+        measure("new connection per message", args.messages,
+                lambda: [legacy_send('127.0.0.1', 8025, r) for r in recipients])
+        measure("pooled send_email", args.messages,
+                lambda: [email_utils.send_email(r, "Meeting Invitation", "You are invited", ICS, "meeting-invitation.ics")
+                         for r in recipients])
+        measure(f"send_email_batch ({args.batch_size} recipients)", args.messages,
+                lambda: [email_utils.send_email_batch(recipients[i:i + args.batch_size], "Meeting Invitation",
+                                                      "You are invited", ICS, "meeting-invitation.ics")
+                         for i in range(0, len(recipients), args.batch_size)])
+        measure("send_messages (one connection)", args.messages,
+                lambda: email_utils.send_messages([
+                    {"to_email": r, "subject": "Meeting Invitation", "body": "You are invited",
+                     "attachment": ICS, "attachment_name": "meeting-invitation.ics"} for r in recipients
+                ]))
+    finally:
+        email_utils.close_smtp_pool()
+        controller.stop()
+    print(f"sink received {handler.received} deliveries")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Per-request overhead of token_required with and without the verified-token cache.
+
+Usage:
+    python benchmarks/bench_token_required.py --requests 100000 --tokens 50
+
+Calls a no-op view wrapped in app.jwt_utils.token_required inside a Flask
+request context, cycling through `--tokens` distinct access tokens as a set of
+client sessions would. Prints the mean time per request for the bare view, the
+decorator with the cache disabled (signature verified every time, as before)
+and the decorator with the cache. No database or broker is needed.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import jwt
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.jwt_utils import JWT_SECRET_KEY, token_required  # noqa: E402
+from app.token_cache import token_cache  # noqa: E402
+
+
+def make_tokens(count):
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    return [
+        jwt.encode({
+            'sub': user_id, 'exp': expires, 'type': 'access', 'role': 'staff',
+            'email': f'user{user_id}@example.com', 'full_name': f'User {user_id}', 'ver': 1
+        }, JWT_SECRET_KEY, algorithm='HS256')
+        for user_id in range(1, count + 1)
+    ]
+
+
+def run(app, view, tokens, requests):
+    contexts = [app.test_request_context(headers={'Authorization': f'Bearer {token}'}) for token in tokens]
+    started = time.perf_counter()
+    for i in range(requests):
+        with contexts[i % len(contexts)]:
+            view()
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark token_required overhead per request')
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--tokens', type=int, default=50, help='Distinct tokens (client sessions) in rotation')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    tokens = make_tokens(args.tokens)
+
+    def bare_view(user_id=None, token=None):
+        return user_id
+
+    decorated_view = token_required(bare_view)
+
+    bare_us = run(app, bare_view, tokens, args.requests)
+
+    max_size = token_cache.max_size
+    token_cache.max_size = 0  # Disabled: verify the signature on every request
+    uncached_us = run(app, decorated_view, tokens, args.requests)
+    token_cache.max_size = max_size
+    token_cache.clear()
+    cached_us = run(app, decorated_view, tokens, args.requests)
+
+    print(f"{'variant':<28} {'us/request':>11} {'overhead us':>12}")
+    print(f"{'bare view':<28} {bare_us:>11.2f} {'-':>12}")
+    print(f"{'token_required (no cache)':<28} {uncached_us:>11.2f} {uncached_us - bare_us:>12.2f}")
+    print(f"{'token_required (cached)':<28} {cached_us:>11.2f} {cached_us - bare_us:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
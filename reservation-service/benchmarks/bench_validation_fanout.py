@@ -0,0 +1,111 @@
+"""Latency breakdown of the create-reservation validation lookups, sequential vs concurrent.
+
+Usage:
+    python benchmarks/bench_validation_fanout.py --requests 200 --user-delay-ms 20 --room-delay-ms 30
+
+Starts local stand-ins for user-service (GET /users/me) and room-service
+(GET /rooms/<id>) that answer after a fixed delay, and points the service
+clients at them. Each simulated request looks up its room (the replica-miss
+read-through path) and its user (a token without role claims, with the user
+cache disabled), first one after the other as before, then with
+app.lookups.run_concurrently. Prints the mean latency of each lookup alone and
+of both validation strategies. No database or broker is needed.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.jwt_utils import get_user_details  # noqa: E402
+from app.lookups import run_concurrently  # noqa: E402
+from app.room_catalog import fetch_room  # noqa: E402
+from app.user_cache import user_cache  # noqa: E402
+
+USER_ID = 1
+TOKEN = 'benchmark-token'
+
+
+def start_stand_in(delay, respond):
+    """Serve GET requests on a free local port, answering `respond(path)` after `delay` seconds."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, as with the pooled service clients
+        disable_nagle_algorithm = True  # Headers and body are written separately
+
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps(respond(self.path)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def timed(app, requests, fn):
+    """Mean milliseconds of `fn()` per request, each call inside its own request context."""
+    started = time.perf_counter()
+    for _ in range(requests):
+        with app.test_request_context(headers={'Authorization': f'Bearer {TOKEN}'}):
+            fn()
+    return (time.perf_counter() - started) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sequential vs concurrent validation lookups')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--user-delay-ms', type=float, default=20.0, help='Stand-in user-service latency')
+    parser.add_argument('--room-delay-ms', type=float, default=30.0, help='Stand-in room-service latency')
+    args = parser.parse_args()
+
+    os.environ['USER_SERVICE_URL'] = start_stand_in(
+        args.user_delay_ms / 1000, lambda path: {'id': USER_ID, 'email': 'user@example.com', 'role': 'staff'}
+    )
+    os.environ['ROOM_SERVICE_URL'] = start_stand_in(
+        args.room_delay_ms / 1000, lambda path: {'id': int(path.rstrip('/').rsplit('/', 1)[-1]), 'capacity': 10}
+    )
+    user_cache.ttl = 0  # Every request goes to the stand-in user-service
+    app = Flask(__name__)
+
+    def room_lookup():
+        return fetch_room(1, TOKEN)
+
+    def user_lookup():
+        return get_user_details(USER_ID, TOKEN)
+
+    def sequential():
+        return room_lookup(), user_lookup()
+
+    def concurrent():
+        return run_concurrently([(fetch_room, 1, TOKEN), (get_user_details, USER_ID, TOKEN)])
+
+    with app.app_context():
+        timed(app, 5, concurrent)  # Warm up the pooled connections and the lookup pool
+        rows = [
+            ('room lookup', timed(app, args.requests, room_lookup)),
+            ('user lookup', timed(app, args.requests, user_lookup)),
+            ('sequential (room + user)', timed(app, args.requests, sequential)),
+            ('concurrent (run_concurrently)', timed(app, args.requests, concurrent)),
+        ]
+
+    print(f"{'variant':<32} {'ms/request':>11}")
+    for name, ms in rows:
+        print(f"{name:<32} {ms:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Closed-loop load test of a running reservation service at several client counts.
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:5002 --token <access token> --clients 100 500 1000
+
+Each client is a greenlet with its own keep-alive session that sends GET requests
+to `--path` back to back for `--duration` seconds. For every client count prints
+throughput, latency percentiles and the number of failed requests (non-2xx or
+connection errors). Run it once against `python run.py` and once against
+`python run_async.py` to compare the serving modes.
+"""
+from gevent import monkey
+monkey.patch_all()  # The clients are greenlets
+
+import argparse  # noqa: E402
+import time  # noqa: E402
+
+import gevent  # noqa: E402
+import requests  # noqa: E402
+from requests.adapters import HTTPAdapter  # noqa: E402
+
+
+def client(url, headers, deadline, latencies, errors):
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            response = session.get(url, headers=headers, timeout=30)
+            ok = response.ok
+        except requests.exceptions.RequestException:
+            ok = False
+        if ok:
+            latencies.append(time.monotonic() - started)
+        else:
+            errors.append(1)
+    session.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+
+def run(url, headers, clients, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    gevent.joinall([gevent.spawn(client, url, headers, deadline, latencies, errors) for _ in range(clients)])
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.95), percentile(latencies, 0.99), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a running reservation service')
+    parser.add_argument('--url', default='http://localhost:5002')
+    parser.add_argument('--path', default='/reservations/?limit=20')
+    parser.add_argument('--token', help='Bearer access token sent with every request')
+    parser.add_argument('--clients', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds per client count')
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for clients in args.clients:
+        throughput, p50, p95, p99, errors = run(args.url + args.path, headers, clients, args.duration)
+        print(f"{clients:>8} {throughput:>9.1f} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
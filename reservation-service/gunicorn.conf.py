@@ -0,0 +1,44 @@
+"""Gunicorn configuration for the reservation service.
+
+Usage:
+    gunicorn -c gunicorn.conf.py run:app
+
+The app is loaded once in the master and forked into GUNICORN_WORKERS processes
+with GUNICORN_THREADS threads each. Database pools, Kafka and HTTP clients created
+before the fork are re-created in every worker, which then starts its own Kafka
+consumers. Workers flush buffered Kafka events when they stop.
+"""
+import os
+import shutil
+
+# Set before the app is preloaded: the Kafka consumers are started per worker in post_fork
+os.environ['START_BACKGROUND_WORKERS'] = 'false'
+
+# Metrics of all workers are aggregated through files in this directory and served by any worker
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-reservation-service')
+shutil.rmtree(prometheus_dir, ignore_errors=True)
+os.makedirs(prometheus_dir, exist_ok=True)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5002')}"
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+
+def post_fork(server, worker):
+    from app.lifecycle import init_worker_process
+    init_worker_process(server.app.wsgi())
+
+
+def worker_exit(server, worker):
+    from app.lifecycle import shutdown
+    shutdown(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
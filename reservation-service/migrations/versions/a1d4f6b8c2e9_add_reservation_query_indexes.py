@@ -0,0 +1,36 @@
+"""Add indexes for reservation overlap checks, filters and pagination
+
+Revision ID: a1d4f6b8c2e9
+Revises: f3c1a7e9d2b4
+Create Date: 2025-05-12 10:27:45.118032
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d4f6b8c2e9'
+down_revision = 'f3c1a7e9d2b4'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_reservation_room_id_start_time_end_time', ['room_id', 'start_time', 'end_time']),
+    ('ix_reservation_user_id_start_time_id', ['user_id', 'start_time', 'id']),
+    ('ix_reservation_start_time_id', ['start_time', 'id']),
+]
+
+
+def upgrade():
+    # Built concurrently so bookings are not blocked while a large table is indexed
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'reservation', columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='reservation', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,30 @@
+"""Add exclusion constraint preventing overlapping reservations
+
+Revision ID: c4e8a1f2d9b3
+Revises: b57d3d538482
+Create Date: 2025-05-02 10:12:41.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1f2d9b3'
+down_revision = 'b57d3d538482'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # btree_gist provides the GiST operator class for the `room_id WITH =` part of the constraint.
+    # Existing overlapping reservations must be resolved before this migration can be applied.
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        'ALTER TABLE reservation ADD CONSTRAINT exclude_overlapping_reservations '
+        'EXCLUDE USING gist (room_id WITH =, tsrange(start_time, end_time) WITH &&)'
+    )
+
+
+def downgrade():
+    op.drop_constraint('exclude_overlapping_reservations', 'reservation')
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import logging
+import argparse
+from dotenv import load_dotenv
+from kafka.errors import NoBrokersAvailable
+
+from app.event_bus import EventBusError, create_event_bus
+
+# Load environment variables from .env file located in the parent directory
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust path to root .env
+load_dotenv(dotenv_path=dotenv_path)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger("provision_topics")
+
+
+def provision(bus, topics, timeout):
+    """Create missing topics and grow existing ones to the requested partition count.
+
+    Waits up to `timeout` seconds for the broker. Partitions are never removed. Growing a topic moves
+    keys to other partitions, so events of one room produced before and after the change may be
+    consumed out of order.
+    """
+    deadline = time.monotonic() + timeout
+    for name, partitions in topics.items():
+        while True:
+            try:
+                actual = bus.create_topic(name, partitions)
+                break
+            except NoBrokersAvailable:
+                if time.monotonic() >= deadline:
+                    raise
+                logger.info("Kafka not available yet, retrying in 5 seconds...")
+                time.sleep(5)
+        if actual > partitions:
+            logger.warning(f"Topic {name} has {actual} partitions, more than the {partitions} requested; left unchanged")
+        else:
+            logger.info(f"Topic {name} has {actual} partitions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Create the reservation event topics with the configured partition counts')
+    parser.add_argument('--partitions', type=int, default=int(os.getenv('KAFKA_RESERVATIONS_PARTITIONS', 6)),
+                        help='Partitions of the reservations topic: the maximum number of parallel consumers in a group')
+    parser.add_argument('--dlq-partitions', type=int, default=int(os.getenv('KAFKA_DLQ_PARTITIONS', 1)), help='Partitions of the dead-letter topic')
+    parser.add_argument('--replication-factor', type=int, default=int(os.getenv('KAFKA_REPLICATION_FACTOR', 1)))
+    parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for the broker')
+    args = parser.parse_args()
+
+    reservations_topic = os.getenv('KAFKA_RESERVATIONS_TOPIC', 'reservations-topic')
+    topics = {
+        reservations_topic: args.partitions,
+        os.getenv('KAFKA_DLQ_TOPIC', f'{reservations_topic}.dlq'): args.dlq_partitions,
+    }
+    backend = os.getenv('EVENT_BUS_BACKEND', 'kafka')
+    if backend == 'memory':
+        logger.info("The memory event bus backend lives in each process; nothing to provision")
+        sys.exit(0)
+    bus = create_event_bus({
+        'EVENT_BUS_BACKEND': backend,
+        'EVENT_BUS_SQLITE_PATH': os.getenv('EVENT_BUS_SQLITE_PATH', '/tmp/event-bus.sqlite3'),
+        'KAFKA_BOOTSTRAP_SERVERS': os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'kafka:9092'),
+        'KAFKA_REPLICATION_FACTOR': args.replication_factor,
+    })
+    try:
+        provision(bus, topics, args.timeout)
+    except EventBusError as e:
+        logger.error(f"Topic provisioning failed: {e}")
+        sys.exit(1)
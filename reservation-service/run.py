@@ -2,12 +2,21 @@ from app import create_app
 import os
 from dotenv import load_dotenv
 import argparse # Import argparse
+from prometheus_flask_exporter import PrometheusMetrics
+from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
 
 # Load environment variables from .env file located in the parent directory
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust path to root .env
 load_dotenv(dotenv_path=dotenv_path)
 
 app = create_app()
+# Initialize Prometheus metrics (also exposes the inter-service client metrics)
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    # Several worker processes (gunicorn.conf.py): metrics are aggregated across them
+    metrics = GunicornInternalPrometheusMetrics(app, path='/metrics')
+else:
+    metrics = PrometheusMetrics(app, path='/metrics')
+metrics.info('reservation_service_info', 'Reservation Service Information', version='1.0.0')
 
 if __name__ == "__main__":
     # Set up argument parser
@@ -0,0 +1,33 @@
+"""Cooperative (gevent) serving mode for the reservation service.
+
+Usage:
+    python run_async.py --port=5002 --max-connections=1000
+
+Every request runs in a greenlet. Postgres queries (psycopg2 through psycogreen),
+inter-service HTTP calls, SMTP and Kafka all yield while waiting on the network, so a
+slow dependency holds one greenlet instead of the whole process. Routes and behaviour
+are the same as with run.py; the database connection pool (DB_POOL_SIZE,
+DB_MAX_OVERFLOW) bounds how many requests talk to Postgres at once.
+"""
+from gevent import monkey
+monkey.patch_all()  # Must run before anything imports socket, ssl, threading or time
+
+from psycogreen.gevent import patch_psycopg  # noqa: E402
+patch_psycopg()  # Wait on psycopg2 sockets cooperatively instead of blocking the hub
+
+import argparse  # noqa: E402
+import os  # noqa: E402
+from gevent.pool import Pool  # noqa: E402
+from gevent.pywsgi import WSGIServer  # noqa: E402
+from run import app  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run Reservation Service (gevent)')
+    parser.add_argument('--port', type=int, default=5002, help='Port to run the service on')
+    parser.add_argument('--max-connections', type=int, default=int(os.getenv('ASYNC_MAX_CONNECTIONS', 1000)),
+                        help='Maximum number of requests handled concurrently')
+    args = parser.parse_args()
+
+    server = WSGIServer(("0.0.0.0", args.port), app, spawn=Pool(args.max_connections), log=None)
+    app.logger.info(f"Reservation service running on port {args.port} (gevent, {args.max_connections} connections)")
+    server.serve_forever()
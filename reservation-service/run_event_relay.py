@@ -0,0 +1,36 @@
+import os
+import signal
+import argparse
+from dotenv import load_dotenv
+from prometheus_client import start_http_server
+
+# Load environment variables from .env file located in the parent directory
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust path to root .env
+load_dotenv(dotenv_path=dotenv_path)
+os.environ.setdefault("START_BACKGROUND_WORKERS", "false") # The relay never consumes room or user events
+
+from app import create_app
+from app.event_relay import run_relay, stop_relay
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Publish reservation events from the outbox table to Kafka')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('EVENT_RELAY_BATCH_SIZE', 500)), help='Events published per batch')
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('EVENT_RELAY_POLL_INTERVAL', 0.2)), help='Seconds to wait when the outbox is empty')
+    parser.add_argument('--send-timeout', type=float, default=30, help='Seconds to wait for the broker to acknowledge a batch')
+    parser.add_argument('--retention-hours', type=float, default=float(os.getenv('EVENT_RELAY_RETENTION_HOURS', 24)), help='Hours delivered events are kept')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('EVENT_RELAY_METRICS_PORT', 9103)), help='Port for Prometheus metrics')
+    args = parser.parse_args()
+
+    app = create_app()
+    signal.signal(signal.SIGTERM, stop_relay)
+    signal.signal(signal.SIGINT, stop_relay)
+
+    start_http_server(args.metrics_port)
+    app.logger.info(f"Event relay metrics available at http://0.0.0.0:{args.metrics_port}/metrics")
+    run_relay(
+        app,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        send_timeout=args.send_timeout,
+        retention_hours=args.retention_hours
+    )
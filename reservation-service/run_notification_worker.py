@@ -0,0 +1,40 @@
+import os
+import signal
+import argparse
+from dotenv import load_dotenv
+from prometheus_client import start_http_server
+
+# Load environment variables from .env file located in the parent directory
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust path to root .env
+load_dotenv(dotenv_path=dotenv_path)
+os.environ.setdefault("START_BACKGROUND_WORKERS", "false") # The worker never consumes room or user events
+
+from app import create_app
+from app.notification_worker import run_worker, stop_worker
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the reservation notification delivery worker')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('NOTIFICATION_WORKER_CONCURRENCY', 4)), help='Parallel deliveries')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('NOTIFICATION_WORKER_BATCH_SIZE', 50)), help='Notifications claimed per poll')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+    parser.add_argument('--max-attempts', type=int, default=int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', 5)), help='Attempts before a notification is marked failed')
+    parser.add_argument('--backoff-base', type=float, default=30, help='First retry delay in seconds (doubles per attempt)')
+    parser.add_argument('--backoff-max', type=float, default=3600, help='Maximum retry delay in seconds')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('NOTIFICATION_WORKER_METRICS_PORT', 9102)), help='Port for Prometheus metrics')
+    args = parser.parse_args()
+
+    app = create_app()
+    signal.signal(signal.SIGTERM, stop_worker)
+    signal.signal(signal.SIGINT, stop_worker)
+
+    start_http_server(args.metrics_port)
+    app.logger.info(f"Notification worker metrics available at http://0.0.0.0:{args.metrics_port}/metrics")
+    run_worker(
+        app,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        max_attempts=args.max_attempts,
+        backoff_base=args.backoff_base,
+        backoff_max=args.backoff_max
+    )
@@ -0,0 +1,46 @@
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.recurrence import build_rule, end_series, expand_series, rule_occurrences  # noqa: E402
+
+
+def make_series(rule, dtstart, exceptions=()):
+    return SimpleNamespace(rrule=rule, dtstart=dtstart, duration=60, exceptions=list(exceptions), span_end=None)
+
+
+def test_utc_until_is_accepted():
+    rule = build_rule(rule="RRULE:FREQ=WEEKLY;UNTIL=20261231T000000Z")
+    assert rule == "FREQ=WEEKLY;UNTIL=20261231T000000"
+    starts = rule_occurrences(rule, datetime(2026, 12, 1, 9))
+    assert starts == [datetime(2026, 12, day, 9) for day in (1, 8, 15, 22, 29)]
+
+
+def test_unbounded_rule_is_rejected():
+    with pytest.raises(ValueError):
+        rule_occurrences(build_rule(rule="FREQ=WEEKLY"), datetime(2026, 12, 1, 9))
+
+
+def test_end_series_keeps_started_occurrences():
+    moved_later = SimpleNamespace(original_start=datetime(2026, 1, 8, 9), cancelled=False,
+                                  start_time=datetime(2026, 1, 20, 9), end_time=datetime(2026, 1, 20, 10))
+    moved_earlier = SimpleNamespace(original_start=datetime(2026, 1, 22, 9), cancelled=False,
+                                    start_time=datetime(2026, 1, 13, 9), end_time=datetime(2026, 1, 13, 10))
+    series = make_series("FREQ=WEEKLY;COUNT=6", datetime(2026, 1, 1, 9), [moved_later, moved_earlier])
+
+    removed = end_series(series, datetime(2026, 1, 16))
+
+    assert removed == [(datetime(2026, 1, 20, 9), datetime(2026, 1, 20, 10)),
+                       (datetime(2026, 1, 29, 9), datetime(2026, 1, 29, 10)),
+                       (datetime(2026, 2, 5, 9), datetime(2026, 2, 5, 10))]
+    assert series.rrule == "FREQ=WEEKLY;UNTIL=20260115T090000"
+    assert moved_later.cancelled
+    assert [start for _, start, _, _ in expand_series(series)] == [
+        datetime(2026, 1, 1, 9), datetime(2026, 1, 13, 9), datetime(2026, 1, 15, 9)
+    ]
+    assert series.span_end == datetime(2026, 1, 15, 10)
@@ -17,7 +17,14 @@ def create_app():
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SECRET_KEY=os.getenv("SECRET_KEY", "another-super-secret"),
         JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "super-secret-key"), # Use the same JWT key as user-service
-        RESERVATION_SERVICE_URL=os.getenv("RESERVATION_SERVICE_URL", "http://reservation-service:5002") # Add this line
+        RESERVATION_SERVICE_URL=os.getenv("RESERVATION_SERVICE_URL", "http://reservation-service:5002"), # Add this line
+        # Kafka Configuration (room change events)
+        # Event bus (app/event_bus.py): kafka, memory (in-process) or sqlite (one machine)
+        EVENT_BUS_BACKEND=os.getenv("EVENT_BUS_BACKEND", "kafka"),
+        EVENT_BUS_PARTITIONS=int(os.getenv("EVENT_BUS_PARTITIONS", 6)),
+        EVENT_BUS_SQLITE_PATH=os.getenv("EVENT_BUS_SQLITE_PATH", "/tmp/event-bus.sqlite3"),
+        KAFKA_BOOTSTRAP_SERVERS=os.getenv("KAFKA_BOOTSTRAP_SERVERS"),
+        KAFKA_ROOMS_TOPIC=os.getenv("KAFKA_ROOMS_TOPIC", "rooms-topic"),
     )
 
     # Setup structured logging
@@ -0,0 +1,277 @@
+"""Event bus, producer side: the surface room-service uses to publish, with backends that need no broker.
+
+EVENT_BUS_BACKEND selects the backend:
+  * kafka (default): a kafka-python producer for KAFKA_BOOTSTRAP_SERVERS.
+  * memory: topics and partitions inside this process. Nothing is persisted and other processes
+    do not see the events.
+  * sqlite: an append-only log in the SQLite file EVENT_BUS_SQLITE_PATH, shared by the processes
+    of one machine.
+
+Every backend offers the kafka-python producer subset the services use: send/flush/close, plus
+create_topic(). Keys, values and header values are bytes: callers serialize. Events with the same
+key go to the same partition of a topic. Topics are created on first use with EVENT_BUS_PARTITIONS
+partitions (the kafka backend uses the broker's topics).
+This is the producer half of reservation-service's and user-service's app/event_bus.py, which
+also hold the consumers; keep the shared classes and the SQLite schema identical.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from itertools import count
+
+from flask import current_app
+from kafka.errors import KafkaError as EventBusError  # Base of every bus error; the kafka backend raises subclasses
+
+logger = logging.getLogger(__name__)
+event_bus = None
+event_bus_lock = threading.Lock()
+
+Record = namedtuple('Record', ['topic', 'partition', 'offset', 'timestamp', 'key', 'value', 'headers'])
+RecordMetadata = namedtuple('RecordMetadata', ['topic', 'partition', 'offset'])
+
+
+class CompletedFuture:
+    """Result of a send to a backend that stores records synchronously (mirrors kafka-python's future)."""
+
+    def __init__(self, value=None, exception=None):
+        self.value = value
+        self.exception = exception
+
+    def get(self, timeout=None):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def add_callback(self, callback, *args, **kwargs):
+        if self.exception is None:
+            callback(*args, self.value, **kwargs)
+        return self
+
+    def add_errback(self, errback, *args, **kwargs):
+        if self.exception is not None:
+            errback(*args, self.exception, **kwargs)
+        return self
+
+
+def choose_partition(key, partitions, counter):
+    """Same key, same partition; records without a key are spread round-robin."""
+    if key is None:
+        return next(counter) % partitions
+    return zlib.crc32(key) % partitions
+
+
+class InMemoryEventBus:
+    """Topics and partitions held in this process; see the module docstring."""
+
+    def __init__(self, partitions=6):
+        self.default_partitions = partitions
+        self.topics = {}  # Topic -> list of partition logs (lists of Record)
+        self.condition = threading.Condition(threading.RLock())
+        self.counter = count()
+
+    def create_topic(self, name, partitions=None):
+        """Create a topic, or grow it to `partitions`. Partitions are never removed."""
+        with self.condition:
+            logs = self.topics.setdefault(name, [])
+            missing = (partitions or self.default_partitions) - len(logs)
+            if missing > 0:
+                logs.extend([] for _ in range(missing))
+            return len(logs)
+
+    def producer(self, **options):
+        return InMemoryProducer(self)
+
+class InMemoryProducer:
+    def __init__(self, bus):
+        self.bus = bus
+
+    def send(self, topic, value=None, key=None, headers=None, partition=None):
+        bus = self.bus
+        with bus.condition:
+            if topic not in bus.topics:
+                bus.create_topic(topic)
+            logs = bus.topics[topic]
+            if partition is None:
+                partition = choose_partition(key, len(logs), bus.counter)
+            log = logs[partition]
+            log.append(Record(topic, partition, len(log), int(time.time() * 1000), key, value, list(headers or [])))
+            bus.condition.notify_all()
+            return CompletedFuture(RecordMetadata(topic, partition, len(log) - 1))
+
+    def flush(self, timeout=None):
+        pass  # Records are stored by send()
+
+    def close(self, timeout=None):
+        pass
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (name TEXT PRIMARY KEY, partitions INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS records (
+    topic TEXT NOT NULL, partition INTEGER NOT NULL, offset INTEGER NOT NULL, timestamp INTEGER NOT NULL,
+    key BLOB, value BLOB, headers TEXT NOT NULL, PRIMARY KEY (topic, partition, offset)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS group_offsets (
+    group_id TEXT NOT NULL, topic TEXT NOT NULL, partition INTEGER NOT NULL, offset INTEGER NOT NULL,
+    PRIMARY KEY (group_id, topic, partition)
+);
+CREATE TABLE IF NOT EXISTS group_members (
+    group_id TEXT NOT NULL, member_id TEXT NOT NULL, heartbeat REAL NOT NULL, PRIMARY KEY (group_id, member_id)
+);
+"""
+
+
+class SqliteEventBus:
+    """Append-only log in a SQLite file shared by the processes of one machine; see the module docstring."""
+
+    def __init__(self, path, partitions=6):
+        self.path = path
+        self.default_partitions = partitions
+        connection = self.connect()
+        try:
+            connection.executescript(SQLITE_SCHEMA)
+        finally:
+            connection.close()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def topic_partitions(self, connection, topic, create=True):
+        row = connection.execute("SELECT partitions FROM topics WHERE name = ?", (topic,)).fetchone()
+        if row is None and create:
+            connection.execute("INSERT OR IGNORE INTO topics (name, partitions) VALUES (?, ?)", (topic, self.default_partitions))
+            return self.topic_partitions(connection, topic, create=False)
+        return row[0] if row else 0
+
+    def create_topic(self, name, partitions=None):
+        """Create a topic, or grow it to `partitions`. Partitions are never removed."""
+        connection = self.connect()
+        try:
+            connection.execute(
+                "INSERT INTO topics (name, partitions) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET partitions = MAX(partitions, excluded.partitions)",
+                (name, partitions or self.default_partitions)
+            )
+            return self.topic_partitions(connection, name)
+        finally:
+            connection.close()
+
+    def producer(self, **options):
+        return SqliteProducer(self)
+
+class SqliteProducer:
+    def __init__(self, bus):
+        self.bus = bus
+        self.connection = bus.connect()
+        self.lock = threading.Lock()
+        self.counter = count()
+
+    def send(self, topic, value=None, key=None, headers=None, partition=None):
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")  # Serializes offset assignment across processes
+                try:
+                    if partition is None:
+                        partition = choose_partition(key, self.bus.topic_partitions(self.connection, topic), self.counter)
+                    offset = self.connection.execute(
+                        "SELECT COALESCE(MAX(offset) + 1, 0) FROM records WHERE topic = ? AND partition = ?", (topic, partition)
+                    ).fetchone()[0]
+                    self.connection.execute(
+                        "INSERT INTO records (topic, partition, offset, timestamp, key, value, headers) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (topic, partition, offset, int(time.time() * 1000), key, value,
+                         json.dumps([[name, data.decode('latin-1')] for name, data in headers or []]))
+                    )
+                    self.connection.execute("COMMIT")
+                except BaseException:
+                    self.connection.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                return CompletedFuture(exception=EventBusError(f"Failed to append to {topic}: {e}"))
+        return CompletedFuture(RecordMetadata(topic, partition, offset))
+
+    def flush(self, timeout=None):
+        pass  # Records are committed by send()
+
+    def close(self, timeout=None):
+        with self.lock:
+            self.connection.close()
+
+
+class KafkaEventBus:
+    """kafka-python producer for a broker; producer options are passed through."""
+
+    def __init__(self, bootstrap_servers, partitions=6, replication_factor=1):
+        self.bootstrap_servers = bootstrap_servers.split(',')  # Handle comma-separated list
+        self.default_partitions = partitions
+        self.replication_factor = replication_factor
+
+    def create_topic(self, name, partitions=None):
+        """Create a topic, or grow it to `partitions`. Partitions are never removed. Returns the partition count.
+
+        Growing a topic moves keys to other partitions, so events of one key produced before and
+        after the change may be consumed out of order.
+        """
+        from kafka.admin import KafkaAdminClient, NewPartitions, NewTopic
+        from kafka.errors import TopicAlreadyExistsError
+        partitions = partitions or self.default_partitions
+        admin = KafkaAdminClient(bootstrap_servers=self.bootstrap_servers, client_id='event-bus-admin')
+        try:
+            existing = {
+                topic['topic']: len(topic['partitions']) for topic in admin.describe_topics([name]) if not topic['error_code']
+            }.get(name)
+            if existing is None:
+                try:
+                    admin.create_topics([NewTopic(name=name, num_partitions=partitions, replication_factor=self.replication_factor)])
+                except TopicAlreadyExistsError:
+                    pass  # Created concurrently by another process
+                return partitions
+            if existing < partitions:
+                admin.create_partitions({name: NewPartitions(total_count=partitions)})
+                return partitions
+            return existing
+        finally:
+            admin.close()
+
+    def producer(self, **options):
+        from kafka import KafkaProducer
+        return KafkaProducer(bootstrap_servers=self.bootstrap_servers, **options)
+
+
+def create_event_bus(config):
+    """Build the backend selected by EVENT_BUS_BACKEND; None if Kafka is selected but not configured."""
+    backend = config.get('EVENT_BUS_BACKEND', 'kafka')
+    partitions = int(config.get('EVENT_BUS_PARTITIONS', 6))
+    if backend == 'memory':
+        return InMemoryEventBus(partitions)
+    if backend == 'sqlite':
+        return SqliteEventBus(config.get('EVENT_BUS_SQLITE_PATH', '/tmp/event-bus.sqlite3'), partitions)
+    if backend == 'kafka':
+        if not config.get('KAFKA_BOOTSTRAP_SERVERS'):
+            return None
+        return KafkaEventBus(config['KAFKA_BOOTSTRAP_SERVERS'], partitions, int(config.get('KAFKA_REPLICATION_FACTOR', 1)))
+    raise ValueError(f"Unknown EVENT_BUS_BACKEND {backend!r}")
+
+
+def get_event_bus(config=None):
+    """Return this process's event bus, created from `config` (default: the current app's) on first use."""
+    global event_bus
+    if event_bus is None:
+        with event_bus_lock:
+            if event_bus is None:
+                event_bus = create_event_bus(config if config is not None else current_app.config)
+                if event_bus is not None:
+                    logger.info(f"Event bus backend: {type(event_bus).__name__}")
+    return event_bus
+
+
+def reset_event_bus():
+    """Forget a bus inherited from the parent process (SQLite connections do not survive a fork)."""
+    global event_bus
+    event_bus = None
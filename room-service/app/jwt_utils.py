@@ -1,9 +1,9 @@
 import jwt
 import datetime
 import os
-from flask import current_app, request, jsonify # Import current_app to access config
+from flask import current_app, request, jsonify, g # Import current_app to access config
 from functools import wraps
-from .config import JWT_SECRET_KEY  # Ensure the secret key is imported
+from .token_cache import token_cache  # Verified claims of recently seen tokens
 
 # Function to generate JWT token
 def generate_token(user_id):
@@ -28,26 +28,40 @@ def generate_token(user_id):
         return None
 
 # Function to decode JWT token
-def decode_token(token):
-    try:
-        # Use JWT_SECRET_KEY from Flask app config or environment variable
-        secret_key = current_app.config.get('JWT_SECRET_KEY') or os.getenv('JWT_SECRET_KEY')
-        if not secret_key:
-            raise ValueError("JWT_SECRET_KEY is not configured")
+def decode_claims(token):
+    """Return the verified claims of an access token, or None if it is invalid, expired or a refresh token.
 
-        payload = jwt.decode(token, secret_key, algorithms=['HS256'])
-        return payload['sub'] # Return user_id (subject)
-    except jwt.ExpiredSignatureError:
-        # Handle expired token
-        return None
-    except jwt.InvalidTokenError:
-        # Handle invalid token
-        return None
-    except Exception as e:
-        # Log the exception e
+    Tokens verified before are served from the token cache until they expire.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            # Use JWT_SECRET_KEY from Flask app config or environment variable
+            secret_key = current_app.config.get('JWT_SECRET_KEY') or os.getenv('JWT_SECRET_KEY')
+            if not secret_key:
+                raise ValueError("JWT_SECRET_KEY is not configured")
+
+            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            # Handle expired token
+            return None
+        except jwt.InvalidTokenError:
+            # Handle invalid token
+            return None
+        except Exception as e:
+            # Log the exception e
+            return None
+        token_cache.set(token, payload)
+    if payload.get('type', 'access') != 'access' or not payload.get('sub'):
         return None
+    return payload
+
+def decode_token(token):
+    claims = decode_claims(token)
+    return claims['sub'] if claims else None # Return user_id (subject)
 
 def token_required(f):
+    """Verify the bearer access token and expose its claims as `g.claims`."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         token = request.headers.get('Authorization')
@@ -56,18 +70,16 @@ def token_required(f):
 
         try:
             token = token.split(" ")[1]  # Extract the token from "Bearer <token>"
-            decoded_token = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-            user_id = decoded_token.get("sub")
-            if not user_id:
-                return jsonify({"message": "Invalid token"}), 401
+        except IndexError:
+            return jsonify({"message": "Bearer token malformed"}), 401
 
-            kwargs['user_id'] = user_id
-            kwargs['token'] = token
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token"}), 401
+        claims = decode_claims(token)
+        if not claims:
+            return jsonify({"message": "Token is invalid or expired"}), 401
 
+        g.claims = claims
+        kwargs['user_id'] = claims['sub']
+        kwargs['token'] = token
         return f(*args, **kwargs)
     return decorated_function
 
@@ -0,0 +1,24 @@
+import logging
+
+from .models import db
+from .event_bus import reset_event_bus
+from .kafka_producer import close_kafka_producer, reset_kafka_producer
+from .service_client import reset_clients
+
+logger = logging.getLogger(__name__)
+
+
+def init_worker_process(app):
+    """Re-create per-process resources in a worker forked from a preloaded app."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)  # Pooled connections opened before the fork belong to the parent
+    reset_event_bus()
+    reset_kafka_producer()
+    reset_clients()
+    logger.info("Worker process initialized.")
+
+
+def shutdown(app):
+    """Flush buffered Kafka events before the process exits."""
+    close_kafka_producer()
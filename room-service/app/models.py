@@ -32,6 +32,10 @@ class BlackoutPeriod(db.Model):
     end_time = db.Column(db.DateTime, nullable=False)
     reason = db.Column(db.String(255), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_blackout_period_room_id_start_time', 'room_id', 'start_time'),  # Blackout lookups per room
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -40,3 +44,23 @@ class BlackoutPeriod(db.Model):
             'end_time': self.end_time.isoformat(),
             'reason': self.reason
         }
+
+class EventOutbox(db.Model):
+    """Room event written in the same transaction as the room change; published by run_event_relay.py."""
+    __tablename__ = 'event_outbox'
+    id = db.Column(db.BigInteger, primary_key=True)
+    event_id = db.Column(db.String(32), nullable=False, unique=True)
+    topic = db.Column(db.String(255), nullable=False)
+    key = db.Column(db.String(255), nullable=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Only undelivered rows are scanned by the relay
+        db.Index('ix_event_outbox_pending', 'id', postgresql_where=db.text('delivered_at IS NULL')),
+    )
+
+    def to_event(self):
+        return {"id": self.event_id, "type": self.event_type, "payload": self.payload}
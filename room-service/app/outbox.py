@@ -0,0 +1,20 @@
+import uuid
+
+from flask import current_app
+
+from .models import db, EventOutbox
+
+
+def queue_room_event(event_type, room_data):
+    """Queue a room event (ROOM_* or BLACKOUT_*) in the current transaction; it is published by the event relay after commit.
+
+    Events are keyed by room id (a blackout period's room_id) so every consumer sees the changes
+    of one room and its blackout periods in order.
+    """
+    db.session.add(EventOutbox(
+        event_id=uuid.uuid4().hex,
+        topic=current_app.config['KAFKA_ROOMS_TOPIC'],
+        key=str(room_data.get('room_id', room_data.get('id'))),
+        event_type=event_type,
+        payload=room_data
+    ))
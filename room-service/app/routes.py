@@ -3,6 +3,8 @@ from .models import db, Room, BlackoutPeriod
 from .jwt_utils import token_required  # Fix typo: token_requird -> token_required
 from .decorators import token_required, role_required  # Import both token_required and role_required
 import requests
+from .service_client import get_service_client  # Pooled, timeout-bounded client for other services
+from .outbox import queue_room_event  # Room events are committed with the change and published by the event relay
 from datetime import datetime
 from sqlalchemy import and_
 
@@ -28,6 +30,8 @@ def create_room(user_id, token): # user_id and token passed by decorator
             amenities=data.get('amenities')  # Optional amenities
         )
         db.session.add(new_room)
+        db.session.flush()  # Assigns the id sent with the event
+        queue_room_event("ROOM_CREATED", new_room.to_dict())
         db.session.commit()
         return jsonify(new_room.to_dict()), 201
     except Exception as e:
@@ -74,6 +78,7 @@ def update_room(user_id, token, room_id): # user_id and token passed by decorato
         room.capacity = data.get('capacity', room.capacity)
         room.description = data.get('description', room.description)
         room.amenities = data.get('amenities', room.amenities)  # Update amenities
+        queue_room_event("ROOM_UPDATED", room.to_dict())
         db.session.commit()
         return jsonify(room.to_dict())
     except Exception as e:
@@ -91,6 +96,7 @@ def delete_room(user_id, token, room_id): # user_id and token passed by decorato
 
     try:
         db.session.delete(room)
+        queue_room_event("ROOM_DELETED", {"id": room_id})
         db.session.commit()
         return jsonify({"message": "Room deleted successfully"})
     except Exception as e:
@@ -98,6 +104,30 @@ def delete_room(user_id, token, room_id): # user_id and token passed by decorato
         # Consider checking for FK constraints if reservations depend on rooms
         return jsonify({"message": "Failed to delete room", "error": str(e)}), 500
 
+RESERVATION_PAGE_SIZE = 1000  # Largest page reservation-service returns
+
+def fetch_reserved_room_ids(start_time, end_time, headers):
+    """Collect the ids of rooms reserved between start_time and end_time.
+
+    Only the room_id field is requested and pages are followed through the X-Next-Cursor header.
+    """
+    params = {
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "fields": "room_id",
+        "limit": RESERVATION_PAGE_SIZE
+    }
+    reserved_room_ids = set()
+    while True:
+        response = get_service_client("reservation-service").get("/reservations/", params=params, headers=headers)
+        current_app.logger.debug(f"Reservation service response status: {response.status_code}")
+        response.raise_for_status()
+        reserved_room_ids.update(res['room_id'] for res in response.json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return reserved_room_ids
+        params["cursor"] = cursor
+
 # Check room availability (All authenticated users)
 @room_bp.route('/availability', methods=['GET'])
 @token_required
@@ -122,50 +152,19 @@ def check_room_availability(user_id, token):
     user_role = request.headers.get('X-User-Role', 'user')
     
     # Fetch reservations from reservation-service
-    # Try localhost:5002 as fallback when running outside Docker
-    reservation_service_url = current_app.config.get(
-        "RESERVATION_SERVICE_URL", 
-        "http://reservation-service:5002"
-    )
-    
-    current_app.logger.debug(f"Connecting to reservation service at: {reservation_service_url}")
-    
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "X-User-Role": user_role  # Pass the role header to reservation service
+    }
     try:
-        response = requests.get(
-            f"{reservation_service_url}/reservations",
-            params={"start_time": start_time.isoformat(), "end_time": end_time.isoformat()},
-            headers={
-                "Authorization": f"Bearer {token}",
-                "X-User-Role": user_role  # Pass the role header to reservation service
-            }
-        )
-        current_app.logger.debug(f"Reservation service response status: {response.status_code}")
-        response.raise_for_status()
-        reservations = response.json()
-        current_app.logger.debug(f"Retrieved {len(reservations)} reservations")
+        reserved_room_ids = fetch_reserved_room_ids(start_time, end_time, headers)
+        current_app.logger.debug(f"Retrieved reservations for {len(reserved_room_ids)} rooms")
     except requests.exceptions.RequestException as e:
         current_app.logger.error(f"Failed to fetch reservations: {str(e)}")
-        # Try alternate URL if the first one fails (localhost fallback)
-        try:
-            alternate_url = "http://localhost:5002" if "reservation-service" in reservation_service_url else "http://reservation-service:5002"
-            current_app.logger.debug(f"Trying alternate URL: {alternate_url}")
-            response = requests.get(
-                f"{alternate_url}/reservations",
-                params={"start_time": start_time.isoformat(), "end_time": end_time.isoformat()},
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "X-User-Role": user_role
-                }
-            )
-            response.raise_for_status()
-            reservations = response.json()
-        except requests.exceptions.RequestException as e2:
-            current_app.logger.error(f"Failed with alternate URL too: {str(e2)}")
-            return jsonify({"message": "Failed to fetch reservations from reservation-service", "error": str(e)}), 500
+        return jsonify({"message": "Failed to fetch reservations from reservation-service", "error": str(e)}), 500
 
     # Get all rooms
     rooms = Room.query.all()
-    reserved_room_ids = {res['room_id'] for res in reservations}
 
     # Find available rooms
     available_rooms = [room.to_dict() for room in rooms if room.id not in reserved_room_ids]
@@ -201,12 +200,64 @@ def add_blackout_period(user_id, token, room_id):
     )
     try:
         db.session.add(blackout_period)
+        db.session.flush()  # Assigns the id sent with the event
+        queue_room_event("BLACKOUT_CREATED", blackout_period.to_dict())
         db.session.commit()
         return jsonify(blackout_period.to_dict()), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to add blackout period", "error": str(e)}), 500
 
+# Update a blackout period (Admin only)
+@room_bp.route('/<int:room_id>/blackout/<int:blackout_id>', methods=['PUT'])
+@token_required
+@role_required(['admin'])
+def update_blackout_period(user_id, token, room_id, blackout_id):
+    blackout_period = BlackoutPeriod.query.filter_by(id=blackout_id, room_id=room_id).first()
+    if not blackout_period:
+        return jsonify({"message": "Blackout period not found"}), 404
+
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    try:
+        start_time = datetime.fromisoformat(data['start_time']) if 'start_time' in data else blackout_period.start_time
+        end_time = datetime.fromisoformat(data['end_time']) if 'end_time' in data else blackout_period.end_time
+        if end_time <= start_time:
+            return jsonify({"message": "End time must be after start time"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"message": "Invalid date format. Use ISO 8601 format."}), 400
+
+    try:
+        blackout_period.start_time = start_time
+        blackout_period.end_time = end_time
+        blackout_period.reason = data.get('reason', blackout_period.reason)
+        queue_room_event("BLACKOUT_UPDATED", blackout_period.to_dict())
+        db.session.commit()
+        return jsonify(blackout_period.to_dict())
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to update blackout period", "error": str(e)}), 500
+
+# Delete a blackout period (Admin only)
+@room_bp.route('/<int:room_id>/blackout/<int:blackout_id>', methods=['DELETE'])
+@token_required
+@role_required(['admin'])
+def delete_blackout_period(user_id, token, room_id, blackout_id):
+    blackout_period = BlackoutPeriod.query.filter_by(id=blackout_id, room_id=room_id).first()
+    if not blackout_period:
+        return jsonify({"message": "Blackout period not found"}), 404
+
+    try:
+        db.session.delete(blackout_period)
+        queue_room_event("BLACKOUT_DELETED", {"id": blackout_id, "room_id": room_id})
+        db.session.commit()
+        return jsonify({"message": "Blackout period deleted successfully"})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to delete blackout period", "error": str(e)}), 500
+
 # Get blackout periods for a room
 @room_bp.route('/<int:room_id>/blackout', methods=['GET'])
 @token_required
@@ -218,6 +269,13 @@ def get_blackout_periods(user_id, token, room_id):
     blackout_periods = BlackoutPeriod.query.filter_by(room_id=room_id).all()
     return jsonify([bp.to_dict() for bp in blackout_periods])
 
+# Get the blackout periods of every room (snapshot for reservation-service's replica)
+@room_bp.route('/blackouts', methods=['GET'])
+@token_required
+def get_all_blackout_periods(user_id, token):
+    blackout_periods = BlackoutPeriod.query.order_by(BlackoutPeriod.id).all()
+    return jsonify([bp.to_dict() for bp in blackout_periods])
+
 @room_bp.route('/search', methods=['GET'])
 def search_rooms():
     """
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+TOKEN_CACHE_HITS = Counter('token_cache_hits_total', 'Bearer tokens served from the verified-token cache')
+TOKEN_CACHE_MISSES = Counter('token_cache_misses_total', 'Bearer tokens whose signature had to be verified')
+
+
+class TokenCache:
+    """Bounded LRU cache of verified JWT claims, keyed by a SHA-256 digest of the token.
+
+    Only tokens whose signature verified are stored. An entry is dropped once the token's
+    `exp` has passed, and after at most `max_ttl` seconds for tokens without `exp`.
+    """
+
+    def __init__(self, max_size=10000, max_ttl=300):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()  # token digest -> (expires_at, claims)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        """Return a copy of the cached claims of `token`, or None if not cached or expired."""
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                TOKEN_CACHE_HITS.inc()
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+        TOKEN_CACHE_MISSES.inc()
+        return None
+
+    def set(self, token, claims):
+        """Cache the verified claims of `token` until its expiry."""
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.max_ttl
+        if isinstance(claims.get('exp'), (int, float)):
+            expires_at = min(expires_at, claims['exp'])
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=int(os.getenv('TOKEN_CACHE_SIZE', 10000)),
+    max_ttl=float(os.getenv('TOKEN_CACHE_MAX_TTL', 300))
+)
@@ -0,0 +1,29 @@
+"""Add blackout_period (room_id, start_time) index
+
+Revision ID: 5c2f8e1a9b7d
+Revises: 24a8e84054ff
+Create Date: 2025-05-12 10:31:02.664190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2f8e1a9b7d'
+down_revision = '24a8e84054ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so blackout changes are not blocked while the table is indexed
+    with op.get_context().autocommit_block():
+        op.create_index('ix_blackout_period_room_id_start_time', 'blackout_period', ['room_id', 'start_time'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_blackout_period_room_id_start_time', table_name='blackout_period',
+                      postgresql_concurrently=True, if_exists=True)
@@ -3,6 +3,7 @@ import os
 from dotenv import load_dotenv
 import argparse # Import argparse
 from prometheus_flask_exporter import PrometheusMetrics
+from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
 
 # Load environment variables from .env file located in the parent directory
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust path to root .env
@@ -10,7 +11,11 @@ load_dotenv(dotenv_path=dotenv_path)
 
 app = create_app()
 # Initialize Prometheus metrics
-metrics = PrometheusMetrics(app, path='/metrics')
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    # Several worker processes (gunicorn.conf.py): metrics are aggregated across them
+    metrics = GunicornInternalPrometheusMetrics(app, path='/metrics')
+else:
+    metrics = PrometheusMetrics(app, path='/metrics')
 # Add default metrics
 metrics.info('room_service_info', 'Room Service Information', version='1.0.0')
 
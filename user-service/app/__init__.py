@@ -26,6 +26,24 @@ def create_app():
     app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    # Event bus (app/event_bus.py): kafka, memory (in-process) or sqlite (one machine)
+    app.config['EVENT_BUS_BACKEND'] = os.getenv('EVENT_BUS_BACKEND', 'kafka')
+    app.config['EVENT_BUS_PARTITIONS'] = int(os.getenv('EVENT_BUS_PARTITIONS', '6'))
+    app.config['EVENT_BUS_SQLITE_PATH'] = os.getenv('EVENT_BUS_SQLITE_PATH', '/tmp/event-bus.sqlite3')
+    app.config['KAFKA_BOOTSTRAP_SERVERS'] = os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'kafka:9092')
+    app.config['KAFKA_USERS_TOPIC'] = os.getenv('KAFKA_USERS_TOPIC', 'users-topic')
+    app.config['START_BACKGROUND_WORKERS'] = os.getenv('START_BACKGROUND_WORKERS', 'true').lower() == 'true'
+    # Reservation event consumer (app/kafka_consumer.py)
+    app.config['KAFKA_RESERVATIONS_TOPIC'] = os.getenv('KAFKA_RESERVATIONS_TOPIC', 'reservations-topic')
+    app.config['KAFKA_CONSUMER_GROUP'] = os.getenv('KAFKA_CONSUMER_GROUP', 'user-service-group')
+    # False when events are consumed by dedicated run_consumer.py processes instead of the web workers
+    app.config['KAFKA_CONSUMER_IN_WEB'] = os.getenv('KAFKA_CONSUMER_IN_WEB', 'true').lower() == 'true'
+    app.config['KAFKA_CONSUMER_MAX_RECORDS'] = int(os.getenv('KAFKA_CONSUMER_MAX_RECORDS', '500'))  # Messages per polled batch
+    app.config['KAFKA_CONSUMER_WORKERS'] = int(os.getenv('KAFKA_CONSUMER_WORKERS', '4'))  # Partitions of a batch processed in parallel
+    app.config['KAFKA_CONSUMER_MAX_ATTEMPTS'] = max(1, int(os.getenv('KAFKA_CONSUMER_MAX_ATTEMPTS', '3')))  # At least one attempt per message
+    app.config['KAFKA_CONSUMER_RETRY_BACKOFF'] = float(os.getenv('KAFKA_CONSUMER_RETRY_BACKOFF', '0.5'))  # Seconds, doubled per attempt
+    app.config['KAFKA_DLQ_TOPIC'] = os.getenv('KAFKA_DLQ_TOPIC', 'reservations-topic.dlq')
+    app.config['PROCESSED_EVENT_RETENTION_DAYS'] = int(os.getenv('PROCESSED_EVENT_RETENTION_DAYS', '7'))
 
     # Initialize extensions
     db.init_app(app) # Use the db defined above
@@ -57,21 +75,11 @@ def create_app():
 
         app.register_blueprint(routes.user_bp, url_prefix='/users') # Register the user blueprint with prefix
 
-        # Start Kafka consumer in a background thread
-        from .kafka_consumer import start_kafka_consumer_thread
-        start_kafka_consumer_thread(app)
-
     # Delay the import to avoid circular import issues
     from . import auth
 
     app.register_blueprint(auth.auth_bp)   # Register the auth blueprint (prefix is defined in auth.py)
 
-    # Delay the import to avoid circular import issues
-    from .kafka_consumer import start_kafka_consumer
-
-    # Start Kafka consumer
-    start_kafka_consumer(app)
-
     # Simple health check endpoint
     @app.route('/health')
     def health_check():
@@ -2,7 +2,8 @@
 
 from flask import Blueprint, jsonify, current_app, request, session, redirect, url_for
 import requests
-from .jwt_utils import generate_token
+from .jwt_utils import token_response, decode_claims
+from .service_client import get_service_client  # Pooled, timeout-bounded HTTP client
 import os
 import sys
 from dotenv import load_dotenv
@@ -52,7 +53,10 @@ def google_callback():
         "redirect_uri": GOOGLE_REDIRECT_URI,
         "grant_type": "authorization_code"
     }
-    token_response = requests.post(GOOGLE_TOKEN_URL, data=token_data)
+    try:
+        token_response = get_service_client("google").post(GOOGLE_TOKEN_URL, data=token_data)
+    except requests.exceptions.RequestException:
+        return jsonify({"message": "Failed to fetch access token"}), 503
     if not token_response.ok:
         return jsonify({"message": "Failed to fetch access token"}), 400
 
@@ -61,7 +65,10 @@ def google_callback():
         return jsonify({"message": "Access token not provided"}), 400
 
     # Fetch user info from Google
-    userinfo_response = requests.get(GOOGLE_USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"})
+    try:
+        userinfo_response = get_service_client("google").get(GOOGLE_USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"})
+    except requests.exceptions.RequestException:
+        return jsonify({"message": "Failed to fetch user info from Google"}), 503
     if not userinfo_response.ok:
         return jsonify({"message": "Failed to fetch user info from Google"}), 400
 
@@ -75,12 +82,12 @@ def google_callback():
     # Check if the user exists in the database
     user = User.query.filter_by(email=email).first()
     if user:
-        # User exists, generate a JWT token
-        token = generate_token(user.id)
-        if not token:
+        # User exists, generate JWT access and refresh tokens
+        tokens = token_response(user, message="Login successful", user={"id": user.id, "email": user.email, "full_name": user.full_name, "role": user.role})
+        if not tokens:
             return jsonify({"message": "Failed to generate token"}), 500
 
-        return jsonify({"message": "Login successful", "token": token, "user": {"id": user.id, "email": user.email, "full_name": user.full_name, "role": user.role}})
+        return jsonify(tokens)
 
     # User does not exist, create a new user
     user = User(
@@ -91,12 +98,12 @@ def google_callback():
     db.session.add(user)
     db.session.commit()
 
-    # Generate JWT token for the new user
-    token = generate_token(user.id)
-    if not token:
+    # Generate JWT access and refresh tokens for the new user
+    tokens = token_response(user, message="User created and login successful", user={"id": user.id, "email": user.email, "full_name": user.full_name, "role": user.role})
+    if not tokens:
         return jsonify({"message": "Failed to generate token"}), 500
 
-    return jsonify({"message": "User created and login successful", "token": token, "user": {"id": user.id, "email": user.email, "full_name": user.full_name, "role": user.role}})
+    return jsonify(tokens)
 
 
 @auth_bp.route("/login", methods=["POST"])
@@ -114,11 +121,34 @@ def login():
     if not user or not check_password_hash(user.password, password):
         return jsonify({"message": "Invalid username or password"}), 401
 
-    token = generate_token(user.id)
-    if not token:
+    tokens = token_response(user, message="Login successful")
+    if not tokens:
+        return jsonify({"message": "Failed to generate token"}), 500
+
+    return jsonify(tokens)
+
+
+@auth_bp.route("/refresh", methods=["POST"])
+def refresh():
+    """Exchange a refresh token for a new access token carrying the user's current claims."""
+    data = request.get_json(silent=True)
+    if not data or "refresh_token" not in data:
+        return jsonify({"message": "refresh_token is required"}), 400
+
+    claims = decode_claims(data["refresh_token"], token_type='refresh')
+    if not claims:
+        return jsonify({"message": "Refresh token is invalid or expired"}), 401
+
+    user = User.query.get(claims['sub'])
+    if not user or claims.get('ver') != user.claims_version:
+        # The user was deleted or their role changed since the token was issued: log in again
+        return jsonify({"message": "Refresh token has been revoked"}), 401
+
+    tokens = token_response(user, message="Token refreshed")
+    if not tokens:
         return jsonify({"message": "Failed to generate token"}), 500
 
-    return jsonify({"message": "Login successful", "token": token})
+    return jsonify(tokens)
 
 
 @auth_bp.route("/register", methods=["POST"])
@@ -1,6 +1,6 @@
 from functools import wraps
-from flask import request, jsonify
-from .jwt_utils import decode_token # Use relative import
+from flask import request, jsonify, g
+from .jwt_utils import decode_claims # Use relative import
 
 def token_required(f):
     @wraps(f)
@@ -16,12 +16,13 @@ def token_required(f):
         if not token:
             return jsonify({"message": "Token is missing"}), 401
 
-        user_id = decode_token(token)
-        if not user_id:
+        claims = decode_claims(token)
+        if not claims:
             return jsonify({"message": "Token is invalid or expired"}), 401
 
-        # Pass the user_id obtained from the token to the decorated function
-        return f(user_id, *args, **kwargs)
+        # Expose the verified claims and pass the user_id obtained from the token to the decorated function
+        g.claims = claims
+        return f(claims['sub'], *args, **kwargs)
 
     return decorated
 
@@ -29,9 +30,13 @@ def role_required(required_roles):
     def decorator(f):
         @wraps(f)
         def decorated(user_id, *args, **kwargs):
-            from .models import User
-            user = User.query.get(user_id)
-            if not user or user.role not in required_roles:
+            # The role claim of the access token decides; tokens issued before claims were added fall back to the database
+            role = g.get('claims', {}).get('role')
+            if role is None:
+                from .models import User
+                user = User.query.get(user_id)
+                role = user.role if user else None
+            if role not in required_roles:
                 return jsonify({"message": "Access denied"}), 403
             return f(user_id, *args, **kwargs)
         return decorated
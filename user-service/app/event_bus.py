@@ -0,0 +1,559 @@
+"""Event bus: the producer and consumer surface the services use, with backends that need no broker.
+
+EVENT_BUS_BACKEND selects the backend:
+  * kafka (default): kafka-python producers and consumers for KAFKA_BOOTSTRAP_SERVERS.
+  * memory: topics, partitions and consumer groups inside this process. The producers and
+    consumers of one process share them, so load tests and benchmarks need no broker. Nothing
+    is persisted and other processes do not see the events.
+  * sqlite: an append-only log in the SQLite file EVENT_BUS_SQLITE_PATH, shared by the processes
+    of one machine, with consumer groups that balance partitions over their live members.
+
+Every backend offers the kafka-python subset the services use: producer send/flush/close, and
+consumer poll/commit/seek/assignment/committed/end_offsets/close with a rebalance listener.
+Offsets are only committed by commit(). Keys, values and header values are bytes: callers
+serialize. Events with the same key go to the same partition of a topic. Topics are created on
+first use with EVENT_BUS_PARTITIONS partitions (the kafka backend uses the broker's topics), or
+ahead of time with create_topic(), which every backend implements (provision_topics.py).
+This module is copied in reservation-service and user-service, which both produce and consume;
+keep the copies identical. room-service only produces and carries the producer half.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import namedtuple
+from itertools import count
+
+from flask import current_app
+from kafka import ConsumerRebalanceListener  # noqa: F401 - re-exported for consumers' rebalance listeners
+from kafka.errors import KafkaError as EventBusError  # Base of every bus error; the kafka backend raises subclasses
+from kafka.structs import TopicPartition
+
+logger = logging.getLogger(__name__)
+event_bus = None
+event_bus_lock = threading.Lock()
+
+Record = namedtuple('Record', ['topic', 'partition', 'offset', 'timestamp', 'key', 'value', 'headers'])
+RecordMetadata = namedtuple('RecordMetadata', ['topic', 'partition', 'offset'])
+
+
+class CompletedFuture:
+    """Result of a send to a backend that stores records synchronously (mirrors kafka-python's future)."""
+
+    def __init__(self, value=None, exception=None):
+        self.value = value
+        self.exception = exception
+
+    def get(self, timeout=None):
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def add_callback(self, callback, *args, **kwargs):
+        if self.exception is None:
+            callback(*args, self.value, **kwargs)
+        return self
+
+    def add_errback(self, errback, *args, **kwargs):
+        if self.exception is not None:
+            errback(*args, self.exception, **kwargs)
+        return self
+
+
+def choose_partition(key, partitions, counter):
+    """Same key, same partition; records without a key are spread round-robin."""
+    if key is None:
+        return next(counter) % partitions
+    return zlib.crc32(key) % partitions
+
+
+def assign_partitions(partitions, members, member_id):
+    """Round-robin `partitions` over the sorted group `members`; returns the share of `member_id`."""
+    members = sorted(members)
+    return {
+        partition for i, partition in enumerate(sorted(partitions))
+        if members[i % len(members)] == member_id
+    }
+
+
+class BusConsumer:
+    """Consumer bookkeeping shared by the memory and sqlite backends: assignment, positions, listener."""
+
+    def __init__(self, topics, group_id, auto_offset_reset, max_poll_records, listener):
+        self.topics = list(topics)
+        self.group_id = group_id
+        self.member_id = uuid.uuid4().hex
+        self.auto_offset_reset = auto_offset_reset
+        self.max_poll_records = max_poll_records
+        self.listener = listener
+        self.assigned = set()
+        self.positions = {}
+        self.next_partition = 0
+        self.closed = False
+
+    def update_assignment(self, assigned):
+        """Switch to a new assignment, telling the listener what was revoked and what was added."""
+        revoked, added = self.assigned - assigned, assigned - self.assigned
+        if not revoked and not added:
+            return
+        if revoked and self.listener:
+            self.listener.on_partitions_revoked(revoked)
+        for partition in revoked:
+            self.positions.pop(partition, None)
+        for partition in added:
+            committed = self.committed(partition) if self.group_id else None
+            if committed is not None:
+                self.positions[partition] = committed
+            else:
+                self.positions[partition] = 0 if self.auto_offset_reset == 'earliest' else self.log_end(partition)
+        self.assigned = assigned
+        if added and self.listener:
+            self.listener.on_partitions_assigned(added)
+
+    def fetch(self, max_records):
+        """Read up to `max_records` from the assigned partitions, starting with a different one each time."""
+        batch = {}
+        partitions = sorted(self.assigned)
+        if not partitions:
+            return batch
+        self.next_partition = (self.next_partition + 1) % len(partitions)
+        remaining = max_records
+        for partition in partitions[self.next_partition:] + partitions[:self.next_partition]:
+            if remaining <= 0:
+                break
+            records = self.read(partition, self.positions[partition], remaining)
+            if records:
+                batch[partition] = records
+                self.positions[partition] = records[-1].offset + 1
+                remaining -= len(records)
+        return batch
+
+    def assignment(self):
+        return set(self.assigned)
+
+    def seek(self, partition, offset):
+        self.positions[partition] = offset
+
+    def position(self, partition):
+        return self.positions[partition]
+
+
+class InMemoryEventBus:
+    """Topics, partitions and consumer groups held in this process; see the module docstring."""
+
+    def __init__(self, partitions=6):
+        self.default_partitions = partitions
+        self.topics = {}  # Topic -> list of partition logs (lists of Record)
+        self.groups = {}  # Group id -> {'members': set, 'offsets': {TopicPartition: offset}}
+        self.version = 0  # Bumped when topics or group memberships change; consumers then rebalance
+        self.condition = threading.Condition(threading.RLock())
+        self.counter = count()
+
+    def create_topic(self, name, partitions=None):
+        """Create a topic, or grow it to `partitions`. Partitions are never removed."""
+        with self.condition:
+            logs = self.topics.setdefault(name, [])
+            missing = (partitions or self.default_partitions) - len(logs)
+            if missing > 0:
+                logs.extend([] for _ in range(missing))
+                self.version += 1
+                self.condition.notify_all()
+            return len(logs)
+
+    def producer(self, **options):
+        return InMemoryProducer(self)
+
+    def consumer(self, topics, group_id=None, auto_offset_reset='latest', max_poll_records=500, listener=None, **options):
+        return InMemoryConsumer(self, topics, group_id, auto_offset_reset, max_poll_records, listener)
+
+    def partitions(self, topics):
+        return {TopicPartition(topic, p) for topic in topics for p in range(len(self.topics.get(topic, ())))}
+
+
+class InMemoryProducer:
+    def __init__(self, bus):
+        self.bus = bus
+
+    def send(self, topic, value=None, key=None, headers=None, partition=None):
+        bus = self.bus
+        with bus.condition:
+            if topic not in bus.topics:
+                bus.create_topic(topic)
+            logs = bus.topics[topic]
+            if partition is None:
+                partition = choose_partition(key, len(logs), bus.counter)
+            log = logs[partition]
+            log.append(Record(topic, partition, len(log), int(time.time() * 1000), key, value, list(headers or [])))
+            bus.condition.notify_all()
+            return CompletedFuture(RecordMetadata(topic, partition, len(log) - 1))
+
+    def flush(self, timeout=None):
+        pass  # Records are stored by send()
+
+    def close(self, timeout=None):
+        pass
+
+
+class InMemoryConsumer(BusConsumer):
+    def __init__(self, bus, topics, group_id, auto_offset_reset, max_poll_records, listener):
+        super().__init__(topics, group_id, auto_offset_reset, max_poll_records, listener)
+        self.bus = bus
+        self.version = None
+        with bus.condition:
+            for topic in self.topics:
+                if topic not in bus.topics:
+                    bus.create_topic(topic)
+            if group_id is not None:
+                bus.groups.setdefault(group_id, {'members': set(), 'offsets': {}})['members'].add(self.member_id)
+                bus.version += 1
+                bus.condition.notify_all()  # Other members pick up the new membership on their next poll
+
+    def rebalance(self):
+        if self.version == self.bus.version:
+            return
+        self.version = self.bus.version
+        partitions = self.bus.partitions(self.topics)
+        if self.group_id is not None:
+            partitions = assign_partitions(partitions, self.bus.groups[self.group_id]['members'], self.member_id)
+        self.update_assignment(partitions)
+
+    def read(self, partition, offset, limit):
+        return self.bus.topics[partition.topic][partition.partition][offset:offset + limit]
+
+    def log_end(self, partition):
+        return len(self.bus.topics[partition.topic][partition.partition])
+
+    def poll(self, timeout_ms=0, max_records=None):
+        deadline = time.monotonic() + timeout_ms / 1000
+        with self.bus.condition:
+            while not self.closed:
+                self.rebalance()
+                batch = self.fetch(max_records or self.max_poll_records)
+                remaining = deadline - time.monotonic()
+                if batch or remaining <= 0:
+                    return batch
+                self.bus.condition.wait(remaining)  # Woken by sends and membership changes
+            return {}
+
+    def commit(self):
+        if self.group_id is None:
+            return
+        with self.bus.condition:
+            self.bus.groups[self.group_id]['offsets'].update(self.positions)
+
+    def committed(self, partition):
+        with self.bus.condition:
+            return self.bus.groups[self.group_id]['offsets'].get(partition) if self.group_id else None
+
+    def end_offsets(self, partitions):
+        with self.bus.condition:
+            return {partition: self.log_end(partition) for partition in partitions}
+
+    def close(self, autocommit=False):
+        with self.bus.condition:
+            if autocommit:
+                self.commit()
+            self.closed = True
+            if self.group_id is not None:
+                self.bus.groups[self.group_id]['members'].discard(self.member_id)
+                self.bus.version += 1
+                self.bus.condition.notify_all()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (name TEXT PRIMARY KEY, partitions INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS records (
+    topic TEXT NOT NULL, partition INTEGER NOT NULL, offset INTEGER NOT NULL, timestamp INTEGER NOT NULL,
+    key BLOB, value BLOB, headers TEXT NOT NULL, PRIMARY KEY (topic, partition, offset)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS group_offsets (
+    group_id TEXT NOT NULL, topic TEXT NOT NULL, partition INTEGER NOT NULL, offset INTEGER NOT NULL,
+    PRIMARY KEY (group_id, topic, partition)
+);
+CREATE TABLE IF NOT EXISTS group_members (
+    group_id TEXT NOT NULL, member_id TEXT NOT NULL, heartbeat REAL NOT NULL, PRIMARY KEY (group_id, member_id)
+);
+"""
+
+
+class SqliteEventBus:
+    """Append-only log in a SQLite file shared by the processes of one machine; see the module docstring.
+
+    Group members heartbeat on every poll. A member that has not polled for `session_timeout`
+    seconds is dropped and its partitions move to the others, so a batch must be processed
+    within that time (like Kafka's max.poll.interval.ms).
+    """
+
+    def __init__(self, path, partitions=6, session_timeout=30, poll_interval=0.05):
+        self.path = path
+        self.default_partitions = partitions
+        self.session_timeout = session_timeout
+        self.poll_interval = poll_interval
+        connection = self.connect()
+        try:
+            connection.executescript(SQLITE_SCHEMA)
+        finally:
+            connection.close()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def topic_partitions(self, connection, topic, create=True):
+        row = connection.execute("SELECT partitions FROM topics WHERE name = ?", (topic,)).fetchone()
+        if row is None and create:
+            connection.execute("INSERT OR IGNORE INTO topics (name, partitions) VALUES (?, ?)", (topic, self.default_partitions))
+            return self.topic_partitions(connection, topic, create=False)
+        return row[0] if row else 0
+
+    def create_topic(self, name, partitions=None):
+        """Create a topic, or grow it to `partitions`. Partitions are never removed."""
+        connection = self.connect()
+        try:
+            connection.execute(
+                "INSERT INTO topics (name, partitions) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET partitions = MAX(partitions, excluded.partitions)",
+                (name, partitions or self.default_partitions)
+            )
+            return self.topic_partitions(connection, name)
+        finally:
+            connection.close()
+
+    def producer(self, **options):
+        return SqliteProducer(self)
+
+    def consumer(self, topics, group_id=None, auto_offset_reset='latest', max_poll_records=500, listener=None, **options):
+        return SqliteConsumer(self, topics, group_id, auto_offset_reset, max_poll_records, listener)
+
+
+class SqliteProducer:
+    def __init__(self, bus):
+        self.bus = bus
+        self.connection = bus.connect()
+        self.lock = threading.Lock()
+        self.counter = count()
+
+    def send(self, topic, value=None, key=None, headers=None, partition=None):
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")  # Serializes offset assignment across processes
+                try:
+                    if partition is None:
+                        partition = choose_partition(key, self.bus.topic_partitions(self.connection, topic), self.counter)
+                    offset = self.connection.execute(
+                        "SELECT COALESCE(MAX(offset) + 1, 0) FROM records WHERE topic = ? AND partition = ?", (topic, partition)
+                    ).fetchone()[0]
+                    self.connection.execute(
+                        "INSERT INTO records (topic, partition, offset, timestamp, key, value, headers) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (topic, partition, offset, int(time.time() * 1000), key, value,
+                         json.dumps([[name, data.decode('latin-1')] for name, data in headers or []]))
+                    )
+                    self.connection.execute("COMMIT")
+                except BaseException:
+                    self.connection.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                return CompletedFuture(exception=EventBusError(f"Failed to append to {topic}: {e}"))
+        return CompletedFuture(RecordMetadata(topic, partition, offset))
+
+    def flush(self, timeout=None):
+        pass  # Records are committed by send()
+
+    def close(self, timeout=None):
+        with self.lock:
+            self.connection.close()
+
+
+class SqliteConsumer(BusConsumer):
+    def __init__(self, bus, topics, group_id, auto_offset_reset, max_poll_records, listener):
+        super().__init__(topics, group_id, auto_offset_reset, max_poll_records, listener)
+        self.bus = bus
+        self.connection = bus.connect()
+        self.lock = threading.RLock()  # Re-entrant: rebalance listeners may call back into the consumer
+
+    def rebalance(self):
+        """Heartbeat, drop members that stopped polling and take this member's share of the partitions."""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            partitions = {
+                TopicPartition(topic, p)
+                for topic in self.topics for p in range(self.bus.topic_partitions(connection, topic))
+            }
+            if self.group_id is not None:
+                now = time.time()
+                connection.execute(
+                    "INSERT OR REPLACE INTO group_members (group_id, member_id, heartbeat) VALUES (?, ?, ?)",
+                    (self.group_id, self.member_id, now)
+                )
+                connection.execute(
+                    "DELETE FROM group_members WHERE group_id = ? AND heartbeat < ?", (self.group_id, now - self.bus.session_timeout)
+                )
+                members = [row[0] for row in connection.execute(
+                    "SELECT member_id FROM group_members WHERE group_id = ?", (self.group_id,)
+                )]
+                partitions = assign_partitions(partitions, members, self.member_id)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self.update_assignment(partitions)
+
+    def read(self, partition, offset, limit):
+        return [
+            Record(partition.topic, partition.partition, row[0], row[1], row[2], row[3],
+                   [(name, data.encode('latin-1')) for name, data in json.loads(row[4])])
+            for row in self.connection.execute(
+                "SELECT offset, timestamp, key, value, headers FROM records "
+                "WHERE topic = ? AND partition = ? AND offset >= ? ORDER BY offset LIMIT ?",
+                (partition.topic, partition.partition, offset, limit)
+            )
+        ]
+
+    def log_end(self, partition):
+        return self.connection.execute(
+            "SELECT COALESCE(MAX(offset) + 1, 0) FROM records WHERE topic = ? AND partition = ?",
+            (partition.topic, partition.partition)
+        ).fetchone()[0]
+
+    def poll(self, timeout_ms=0, max_records=None):
+        deadline = time.monotonic() + timeout_ms / 1000
+        while not self.closed:
+            with self.lock:
+                try:
+                    self.rebalance()
+                    batch = self.fetch(max_records or self.max_poll_records)
+                except sqlite3.Error as e:
+                    raise EventBusError(f"Failed to poll {self.topics}: {e}") from e
+            remaining = deadline - time.monotonic()
+            if batch or remaining <= 0:
+                return batch
+            time.sleep(min(self.bus.poll_interval, remaining))
+        return {}
+
+    def commit(self):
+        if self.group_id is None:
+            return
+        with self.lock:
+            try:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO group_offsets (group_id, topic, partition, offset) VALUES (?, ?, ?, ?)",
+                    [(self.group_id, p.topic, p.partition, offset) for p, offset in self.positions.items()]
+                )
+            except sqlite3.Error as e:
+                raise EventBusError(f"Failed to commit offsets of group {self.group_id}: {e}") from e
+
+    def committed(self, partition):
+        if self.group_id is None:
+            return None
+        row = self.connection.execute(
+            "SELECT offset FROM group_offsets WHERE group_id = ? AND topic = ? AND partition = ?",
+            (self.group_id, partition.topic, partition.partition)
+        ).fetchone()
+        return row[0] if row else None
+
+    def end_offsets(self, partitions):
+        with self.lock:
+            return {partition: self.log_end(partition) for partition in partitions}
+
+    def close(self, autocommit=False):
+        if autocommit:
+            self.commit()
+        with self.lock:
+            self.closed = True
+            if self.group_id is not None:
+                self.connection.execute(
+                    "DELETE FROM group_members WHERE group_id = ? AND member_id = ?", (self.group_id, self.member_id)
+                )
+            self.connection.close()
+
+
+class KafkaEventBus:
+    """kafka-python clients for a broker; producer and consumer options are passed through."""
+
+    def __init__(self, bootstrap_servers, partitions=6, replication_factor=1):
+        self.bootstrap_servers = bootstrap_servers.split(',')  # Handle comma-separated list
+        self.default_partitions = partitions
+        self.replication_factor = replication_factor
+
+    def create_topic(self, name, partitions=None):
+        """Create a topic, or grow it to `partitions`. Partitions are never removed. Returns the partition count.
+
+        Growing a topic moves keys to other partitions, so events of one key produced before and
+        after the change may be consumed out of order.
+        """
+        from kafka.admin import KafkaAdminClient, NewPartitions, NewTopic
+        from kafka.errors import TopicAlreadyExistsError
+        partitions = partitions or self.default_partitions
+        admin = KafkaAdminClient(bootstrap_servers=self.bootstrap_servers, client_id='event-bus-admin')
+        try:
+            existing = {
+                topic['topic']: len(topic['partitions']) for topic in admin.describe_topics([name]) if not topic['error_code']
+            }.get(name)
+            if existing is None:
+                try:
+                    admin.create_topics([NewTopic(name=name, num_partitions=partitions, replication_factor=self.replication_factor)])
+                except TopicAlreadyExistsError:
+                    pass  # Created concurrently by another process
+                return partitions
+            if existing < partitions:
+                admin.create_partitions({name: NewPartitions(total_count=partitions)})
+                return partitions
+            return existing
+        finally:
+            admin.close()
+
+    def producer(self, **options):
+        from kafka import KafkaProducer
+        return KafkaProducer(bootstrap_servers=self.bootstrap_servers, **options)
+
+    def consumer(self, topics, group_id=None, auto_offset_reset='latest', max_poll_records=500, listener=None, **options):
+        from kafka import KafkaConsumer
+        consumer = KafkaConsumer(
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=group_id,
+            auto_offset_reset=auto_offset_reset,
+            enable_auto_commit=False,  # Offsets are committed by commit(), as with the other backends
+            max_poll_records=max_poll_records,
+            **options
+        )
+        consumer.subscribe(list(topics), listener=listener)
+        return consumer
+
+
+def create_event_bus(config):
+    """Build the backend selected by EVENT_BUS_BACKEND; None if Kafka is selected but not configured."""
+    backend = config.get('EVENT_BUS_BACKEND', 'kafka')
+    partitions = int(config.get('EVENT_BUS_PARTITIONS', 6))
+    if backend == 'memory':
+        return InMemoryEventBus(partitions)
+    if backend == 'sqlite':
+        return SqliteEventBus(config.get('EVENT_BUS_SQLITE_PATH', '/tmp/event-bus.sqlite3'), partitions)
+    if backend == 'kafka':
+        if not config.get('KAFKA_BOOTSTRAP_SERVERS'):
+            return None
+        return KafkaEventBus(config['KAFKA_BOOTSTRAP_SERVERS'], partitions, int(config.get('KAFKA_REPLICATION_FACTOR', 1)))
+    raise ValueError(f"Unknown EVENT_BUS_BACKEND {backend!r}")
+
+
+def get_event_bus(config=None):
+    """Return this process's event bus, created from `config` (default: the current app's) on first use."""
+    global event_bus
+    if event_bus is None:
+        with event_bus_lock:
+            if event_bus is None:
+                event_bus = create_event_bus(config if config is not None else current_app.config)
+                if event_bus is not None:
+                    logger.info(f"Event bus backend: {type(event_bus).__name__}")
+    return event_bus
+
+
+def reset_event_bus():
+    """Forget a bus inherited from the parent process (SQLite connections do not survive a fork)."""
+    global event_bus
+    event_bus = None
@@ -1,53 +1,100 @@
 import jwt
 import datetime
 import os
-from flask import current_app, request, jsonify # Import current_app to access config
+from flask import current_app, request, jsonify, g # Import current_app to access config
 from functools import wraps
-from .config import JWT_SECRET_KEY  # Ensure the secret key is imported
+from .token_cache import token_cache  # Verified claims of recently seen tokens
+
+# Access tokens are short-lived because they carry the user's role; refresh tokens only carry `sub` and `ver`
+ACCESS_TOKEN_MINUTES = int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15))
+REFRESH_TOKEN_DAYS = int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 7))
+
+def get_secret_key():
+    # Use JWT_SECRET_KEY from Flask app config or environment variable
+    secret_key = current_app.config.get('JWT_SECRET_KEY') or os.getenv('JWT_SECRET_KEY')
+    if not secret_key:
+        raise ValueError("JWT_SECRET_KEY is not configured")
+    return secret_key
 
 # Function to generate JWT token
-def generate_token(user_id):
+def generate_token(user):
+    """Generate an access token carrying the user's role and profile claims.
+
+    `ver` is the user's claims version: it changes whenever the role changes, so refresh
+    tokens issued before the change stop working.
+    """
     try:
+        now = datetime.datetime.utcnow()
         payload = {
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1), # Token expiration time
-            'iat': datetime.datetime.utcnow(),
-            'sub': user_id
+            'exp': now + datetime.timedelta(minutes=ACCESS_TOKEN_MINUTES), # Token expiration time
+            'iat': now,
+            'sub': user.id,
+            'type': 'access',
+            'role': user.role,
+            'email': user.email,
+            'full_name': user.full_name,
+            'ver': user.claims_version
         }
-        # Use JWT_SECRET_KEY from Flask app config or environment variable
-        secret_key = current_app.config.get('JWT_SECRET_KEY') or os.getenv('JWT_SECRET_KEY')
-        if not secret_key:
-            raise ValueError("JWT_SECRET_KEY is not configured")
-
-        return jwt.encode(
-            payload,
-            secret_key,
-            algorithm='HS256'
-        )
+        return jwt.encode(payload, get_secret_key(), algorithm='HS256')
     except Exception as e:
-        # Log the exception e
+        current_app.logger.error(f"Failed to generate access token: {e}")
         return None
 
-# Function to decode JWT token
-def decode_token(token):
+def generate_refresh_token(user):
+    """Generate a long-lived refresh token, exchanged for new access tokens at /auth/refresh."""
     try:
-        # Use JWT_SECRET_KEY from Flask app config or environment variable
-        secret_key = current_app.config.get('JWT_SECRET_KEY') or os.getenv('JWT_SECRET_KEY')
-        if not secret_key:
-            raise ValueError("JWT_SECRET_KEY is not configured")
-
-        payload = jwt.decode(token, secret_key, algorithms=['HS256'])
-        return payload['sub'] # Return user_id (subject)
-    except jwt.ExpiredSignatureError:
-        # Handle expired token
+        now = datetime.datetime.utcnow()
+        payload = {
+            'exp': now + datetime.timedelta(days=REFRESH_TOKEN_DAYS),
+            'iat': now,
+            'sub': user.id,
+            'type': 'refresh',
+            'ver': user.claims_version
+        }
+        return jwt.encode(payload, get_secret_key(), algorithm='HS256')
+    except Exception as e:
+        current_app.logger.error(f"Failed to generate refresh token: {e}")
         return None
-    except jwt.InvalidTokenError:
-        # Handle invalid token
+
+def token_response(user, **extra):
+    """Body of a successful login or refresh: access token, refresh token and access token lifetime."""
+    access_token = generate_token(user)
+    refresh_token = generate_refresh_token(user)
+    if not access_token or not refresh_token:
         return None
-    except Exception as e:
-        # Log the exception e
+    return dict(extra, token=access_token, refresh_token=refresh_token, expires_in=ACCESS_TOKEN_MINUTES * 60)
+
+# Function to decode JWT token
+def decode_claims(token, token_type='access'):
+    """Return the verified claims of a token of the given type, or None if it is invalid or expired.
+
+    Tokens issued before claims were added have no `type` and count as access tokens. Tokens
+    verified before are served from the token cache until they expire.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, get_secret_key(), algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            # Handle expired token
+            return None
+        except jwt.InvalidTokenError:
+            # Handle invalid token
+            return None
+        except Exception as e:
+            # Log the exception e
+            return None
+        token_cache.set(token, payload)
+    if payload.get('type', 'access') != token_type or not payload.get('sub'):
         return None
+    return payload
+
+def decode_token(token):
+    claims = decode_claims(token)
+    return claims['sub'] if claims else None # Return user_id (subject)
 
 def token_required(f):
+    """Verify the bearer access token and expose its claims as `g.claims`."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         token = request.headers.get('Authorization')
@@ -56,19 +103,18 @@ def token_required(f):
 
         try:
             token = token.split(" ")[1]  # Extract the token from "Bearer <token>"
-            decoded_token = jwt.decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-            user_id = decoded_token.get("sub")
-            if not user_id:
-                return jsonify({"message": "Invalid token"}), 401
+        except IndexError:
+            return jsonify({"message": "Bearer token malformed"}), 401
 
-            kwargs['user_id'] = user_id
-            kwargs['token'] = token
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token"}), 401
+        claims = decode_claims(token)
+        if not claims:
+            return jsonify({"message": "Token is invalid or expired"}), 401
 
+        g.claims = claims
+        kwargs['user_id'] = claims['sub']
+        kwargs['token'] = token
         return f(*args, **kwargs)
     return decorated_function
 
+
 # ... potentially other utility functions ...
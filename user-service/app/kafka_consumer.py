@@ -1,225 +1,281 @@
-import json
+import base64
 import logging
 import threading
 import time
-import os
-from kafka import KafkaConsumer
-from kafka.errors import KafkaError
-from flask import current_app, jsonify
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .event_bus import ConsumerRebalanceListener, EventBusError, get_event_bus
+from .event_codec import EventDecodeError, decode_event
 
 logger = logging.getLogger(__name__)
 consumer_thread = None
 stop_event = threading.Event()
+partition_states = {}  # TopicPartition -> PartitionState, for the partitions this process owns
+
+MESSAGES = Counter(
+    'kafka_consumer_messages_total', 'Consumed messages by outcome', ['topic', 'outcome']
+)  # outcome: processed, duplicate or dead_lettered
+RETRIES = Counter('kafka_consumer_retries_total', 'Message processing attempts that failed and were retried', ['topic'])
+CONSUMER_LAG = Gauge(
+    'kafka_consumer_lag', 'Messages between the committed position and the end of a partition', ['topic', 'partition'],
+    multiprocess_mode='livemax'  # Only the owning process reports a partition; others report 0
+)
+BATCH_SECONDS = Histogram('kafka_consumer_batch_seconds', 'Time to process and commit one polled batch')
+
+
+class PartitionState:
+    """State local to one partition, valid while this process owns it.
+
+    Events of a room always land on the same partition, so per-room state can live here without
+    coordination between consumer processes. It currently remembers recently processed event ids,
+    which skips the database check when a batch is replayed after a failure.
+    """
+    max_event_ids = 10000
+
+    def __init__(self):
+        self.event_ids = OrderedDict()
+
+    def seen(self, event_id):
+        return event_id in self.event_ids
+
+    def remember(self, event_id):
+        self.event_ids[event_id] = None
+        if len(self.event_ids) > self.max_event_ids:
+            self.event_ids.popitem(last=False)
+
+
+class PartitionStateListener(ConsumerRebalanceListener):
+    """Creates partition state on assignment and drops it when the partition moves to another group member."""
 
-# Define Kafka configuration using environment variables
-KAFKA_BOOTSTRAP_SERVERS = os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'kafka:9092')
-RESERVATIONS_TOPIC = os.getenv('KAFKA_RESERVATIONS_TOPIC', 'reservations-topic')
-GROUP_ID = os.getenv('KAFKA_CONSUMER_GROUP', 'user-service-group')  # Updated to use environment variable
+    def on_partitions_revoked(self, revoked):
+        for partition in revoked:
+            partition_states.pop(partition, None)
+            CONSUMER_LAG.labels(partition.topic, partition.partition).set(0)
+        logger.info(f"Partitions revoked: {sorted(p.partition for p in revoked)}")
 
-# Global flag to prevent multiple threads
-consumer_thread_started = False
-consumer_thread_lock = threading.Lock()
+    def on_partitions_assigned(self, assigned):
+        for partition in assigned:
+            partition_states.setdefault(partition, PartitionState())
+        logger.info(f"Partitions assigned: {sorted(p.partition for p in assigned)}")
 
-def process_message(message):
-    """Process received Kafka messages."""
-    from .models import db, User  # Delayed import to avoid circular import
+
+def handle_event(event):
+    """Apply one reservation event. Reservation events are only recorded for now."""
+    event_type = event.get("type")
+    payload = event.get("payload") or {}
+    if event_type in ("RESERVATION_CREATED", "RESERVATION_UPDATED", "RESERVATION_DELETED",
+                      "RESERVATION_SERIES_CREATED", "RESERVATION_SERIES_UPDATED", "RESERVATION_SERIES_DELETED"):
+        logger.debug(f"Processing {event_type} for user {payload.get('user_id')}")
+    elif event_type == "TEST_EVENT":
+        logger.info("Test event received. No further action taken.")
+    else:
+        logger.warning(f"Unhandled event type: {event_type}")
+
+
+def event_id(event, message):
+    """Id used for idempotency: the event's own id, or its position for events published without one."""
+    return event.get("id") or f"{message.topic}:{message.partition}:{message.offset}"
+
+
+def process_once(event, message):
+    """Handle an event unless it was processed before. Returns False for a duplicate.
+
+    The processed marker is written in the same transaction as the handler's changes.
+    """
+    from .models import db, ProcessedEvent  # Delayed import to avoid circular import
     try:
-        event = json.loads(message.value.decode('utf-8'))
-        event_type = event.get("type")
-        payload = event.get("payload")
-        logger.info(f"Received Kafka Event Type: {event_type}, Payload: {json.dumps(payload, indent=2)}")
-
-        # Handle specific event types
-        if event_type == "RESERVATION_CREATED":
-            logger.info(f"Processing RESERVATION_CREATED for user {payload.get('user_id')}")
-        elif event_type == "RESERVATION_UPDATED":
-            logger.info(f"Processing RESERVATION_UPDATED for user {payload.get('user_id')}")
-        elif event_type == "RESERVATION_DELETED":
-            logger.info(f"Processing RESERVATION_DELETED for user {payload.get('user_id')}")
-        elif event_type == "TEST_EVENT":
-            logger.info("Test event received. No further action taken.")
-        else:
-            logger.warning(f"Unhandled event type: {event_type}")
-
-    except json.JSONDecodeError:
-        logger.error(f"Failed to decode Kafka message value: {message.value}")
-    except Exception as e:
-        logger.error(f"Error processing Kafka message: {e}", exc_info=True)
-
-
-def consume_messages(app):
-    """Runs the Kafka consumer loop."""
-    # Need app context to access config
+        inserted = db.session.execute(
+            pg_insert(ProcessedEvent).values(event_id=event_id(event, message), processed_at=datetime.utcnow())
+            .on_conflict_do_nothing().returning(ProcessedEvent.event_id)
+        ).scalar()
+        if inserted is None:
+            db.session.rollback()
+            return False
+        handle_event(event)
+        db.session.commit()
+        return True
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def dead_letter(message, event, error, attempts):
+    """Publish a message that could not be processed to the dead-letter topic, with the reason."""
+    from flask import current_app
+    from .kafka_producer import encode_key, encode_value, get_kafka_producer  # Delayed import to avoid circular import
+    kafka_producer = get_kafka_producer()
+    topic = current_app.config['KAFKA_DLQ_TOPIC']
+    if kafka_producer is None:
+        raise EventBusError("Kafka producer not available for the dead-letter topic")
+    kafka_producer.send(topic, key=message.key, value=encode_value({
+        "event": event if event is not None else {"raw": base64.b64encode(message.value).decode('ascii'), "headers": {
+            name: value.decode('utf-8', errors='replace') for name, value in message.headers or []
+        }},
+        "error": error,
+        "attempts": attempts,
+        "source": {"topic": message.topic, "partition": message.partition, "offset": message.offset}
+    })).get(timeout=30)  # Offsets are committed only once the dead letter is stored
+    logger.error(f"Dead-lettered message {message.topic}:{message.partition}:{message.offset} after {attempts} attempts: {error}")
+
+
+def process_partition(app, partition, messages, max_attempts, backoff_base):
+    """Process one partition's messages of a batch in offset order, retrying with exponential backoff.
+
+    A message that still fails after `max_attempts` (or cannot be decoded) goes to the dead-letter
+    topic, so one bad message does not stall its partition. A failure while the consumer is stopping
+    is raised instead, so the message is processed again by the next owner of the partition.
+    """
+    state = partition_states.setdefault(partition, PartitionState())
+    with app.app_context():
+        for message in messages:
+            try:
+                event = decode_event(message.value, message.headers)  # JSON or compact, by record header
+            except EventDecodeError as e:
+                dead_letter(message, None, str(e), 0)
+                MESSAGES.labels(message.topic, 'dead_lettered').inc()
+                continue
+            if state.seen(event_id(event, message)):
+                MESSAGES.labels(message.topic, 'duplicate').inc()
+                continue
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    outcome = 'processed' if process_once(event, message) else 'duplicate'
+                    state.remember(event_id(event, message))
+                    break
+                except Exception as e:
+                    if stop_event.is_set():
+                        raise  # Shutting down: the batch is rewound, not dead-lettered, and retried after restart
+                    if attempt == max_attempts:
+                        dead_letter(message, event, str(e), attempt)
+                        outcome = 'dead_lettered'
+                        break
+                    RETRIES.labels(message.topic).inc()
+                    logger.warning(f"Error processing message {message.topic}:{message.partition}:{message.offset} (attempt {attempt}): {e}")
+                    stop_event.wait(backoff_base * 2 ** (attempt - 1))
+            MESSAGES.labels(message.topic, outcome).inc()
+
+
+def update_lag(consumer):
+    partitions = consumer.assignment()
+    if not partitions:
+        return
+    for partition, end_offset in consumer.end_offsets(list(partitions)).items():
+        committed = consumer.committed(partition) or 0
+        CONSUMER_LAG.labels(partition.topic, partition.partition).set(max(0, end_offset - committed))
+
+
+def purge_processed_events(app, retention):
+    from .models import db, ProcessedEvent  # Delayed import to avoid circular import
     with app.app_context():
-        bootstrap_servers = current_app.config.get('KAFKA_BOOTSTRAP_SERVERS', 'kafka:9092')
-        topic = current_app.config.get('KAFKA_RESERVATIONS_TOPIC', 'reservations-topic')
-        group_id = current_app.config.get('KAFKA_CONSUMER_GROUP', 'user-service-group')
+        ProcessedEvent.query.filter(ProcessedEvent.processed_at < datetime.utcnow() - retention).delete(synchronize_session=False)
+        db.session.commit()
+
 
-        if not all([bootstrap_servers, topic, group_id]):
-            logger.error("Kafka consumer configuration missing (servers, topic, or group_id). Consumer not starting.")
-            return
+def consume_events(app):
+    """Poll the reservations topic in batches until stop_event is set.
 
-        logger.info(f"Starting Kafka consumer thread for topic '{topic}', group '{group_id}'...")
-        consumer = None
+    Each batch is split by partition and processed on a bounded pool, every partition with its
+    own PartitionState; several processes can run this loop in one consumer group. Offsets are committed
+    manually once every message of the batch is processed or dead-lettered. If a batch fails,
+    the consumer seeks back to its first offsets and the batch is polled again.
+    """
+    config = app.config
+    event_bus = get_event_bus(config)
+    topic = config['KAFKA_RESERVATIONS_TOPIC']
+    max_attempts = config['KAFKA_CONSUMER_MAX_ATTEMPTS']
+    backoff_base = config['KAFKA_CONSUMER_RETRY_BACKOFF']
+    retention = timedelta(days=config['PROCESSED_EVENT_RETENTION_DAYS'])
+    next_lag_at = next_purge_at = 0
+    consumer = None
+    with ThreadPoolExecutor(max_workers=config['KAFKA_CONSUMER_WORKERS'], thread_name_prefix='kafka-worker') as executor:
         while not stop_event.is_set():
             try:
                 if consumer is None:
-                    logger.info(f"Attempting to connect Kafka consumer to {bootstrap_servers}...")
-                    consumer = KafkaConsumer(
-                        topic,
-                        bootstrap_servers=bootstrap_servers.split(','),
-                        group_id=group_id,
+                    consumer = event_bus.consumer(
+                        [topic],
+                        group_id=config['KAFKA_CONSUMER_GROUP'],
                         auto_offset_reset='earliest', # Start reading at the earliest message if no offset found
-                        # value_deserializer=lambda m: json.loads(m.decode('utf-8')), # Can deserialize here
-                        consumer_timeout_ms=1000, # Timeout to allow checking stop_event
-                        enable_auto_commit=True, # Auto commit offsets
-                        security_protocol='PLAINTEXT' # Explicitly set, adjust if using SSL/SASL
+                        max_poll_records=config['KAFKA_CONSUMER_MAX_RECORDS'], # Offsets are committed after each processed batch
+                        listener=PartitionStateListener(),
+                        security_protocol='PLAINTEXT' # Kafka backend only; adjust if using SSL/SASL
                     )
-                    logger.info(f"Kafka consumer connected to topic '{topic}'.")
-
-                for message in consumer:
-                    if stop_event.is_set():
-                        break
-                    process_message(message)
-                    # Manual commit if enable_auto_commit=False
-                    # consumer.commit()
-
-            except KafkaError as e:
+                    partition_states.clear()
+                    logger.info(f"Kafka consumer connected to topic '{topic}', group '{config['KAFKA_CONSUMER_GROUP']}'.")
+
+                batch = consumer.poll(timeout_ms=1000, max_records=config['KAFKA_CONSUMER_MAX_RECORDS'])
+                if batch:
+                    started = time.monotonic()
+                    futures = [
+                        executor.submit(process_partition, app, partition, messages, max_attempts, backoff_base)
+                        for partition, messages in batch.items()
+                    ]
+                    try:
+                        for future in futures:
+                            future.result()
+                    except Exception:
+                        for future in futures:
+                            future.exception()  # Let the other partitions finish before rewinding
+                        for partition, messages in batch.items():
+                            consumer.seek(partition, messages[0].offset)
+                        raise
+                    consumer.commit()
+                    BATCH_SECONDS.observe(time.monotonic() - started)
+
+                now = time.monotonic()
+                if now >= next_lag_at:
+                    update_lag(consumer)
+                    next_lag_at = now + 10
+                if now >= next_purge_at:
+                    purge_processed_events(app, retention)
+                    next_purge_at = now + 3600
+
+            except EventBusError as e:
                 logger.error(f"Kafka error in consumer loop: {e}. Retrying in 10 seconds...")
                 if consumer:
-                    consumer.close()
+                    consumer.close(autocommit=False)
                 consumer = None
-                time.sleep(10) # Wait before retrying connection
+                stop_event.wait(10) # Wait before retrying connection
             except Exception as e:
-                 logger.error(f"Unexpected error in consumer loop: {e}. Retrying in 10 seconds...", exc_info=True)
-                 if consumer:
-                     consumer.close()
-                 consumer = None
-                 time.sleep(10) # Wait before retrying
+                logger.error(f"Unexpected error in consumer loop: {e}. Retrying in 10 seconds...", exc_info=True)
+                stop_event.wait(10)
 
-        if consumer:
-            consumer.close()
-        logger.info("Kafka consumer thread stopped.")
+    if consumer:
+        consumer.close(autocommit=False) # Leave the group so partitions are reassigned right away
+    logger.info("Kafka consumer thread stopped.")
+
+
+def stop_consumer(*_):
+    """Signal the consumer loop to stop after the current batch."""
+    stop_event.set()
 
 
 def start_consumer_thread(app):
     """Starts the Kafka consumer in a background thread."""
     global consumer_thread
+    if get_event_bus(app.config) is None:
+        logger.warning("KAFKA_BOOTSTRAP_SERVERS not configured; reservation events will not be consumed.")
+        return
     if consumer_thread is None or not consumer_thread.is_alive():
         stop_event.clear()
-        # Pass the app instance itself, not just current_app proxy
-        consumer_thread = threading.Thread(target=consume_messages, args=(app,), daemon=True)
+        consumer_thread = threading.Thread(target=consume_events, args=(app,), daemon=True)
         consumer_thread.start()
         logger.info("Kafka consumer background thread initiated.")
     else:
         logger.info("Kafka consumer thread already running.")
 
-def stop_consumer_thread():
-    """Signals the consumer thread to stop."""
+
+def stop_consumer_thread(timeout=30):
+    """Signals the consumer to stop after the current batch and waits for it to leave the group."""
     global consumer_thread
     if consumer_thread and consumer_thread.is_alive():
         logger.info("Stopping Kafka consumer thread...")
         stop_event.set()
-        consumer_thread.join(timeout=10) # Wait for thread to finish
+        consumer_thread.join(timeout=timeout)
         if consumer_thread.is_alive():
-             logger.warning("Kafka consumer thread did not stop gracefully.")
+            logger.warning("Kafka consumer thread did not stop gracefully.")
         consumer_thread = None
-    else:
-        logger.info("Kafka consumer thread not running or already stopped.")
-
-def consume_reservations(app):
-    """
-    Kafka consumer function that runs in a background thread.
-    Needs the Flask app instance to work within the application context.
-    """
-    from .models import db, User  # Delayed import to avoid circular import
-    consumer = None # Initialize consumer to None
-    try:
-        with app.app_context(): # Create an application context
-            current_app.logger.info(f"Attempting to connect Kafka consumer to {KAFKA_BOOTSTRAP_SERVERS}...")
-            consumer = KafkaConsumer(
-                RESERVATIONS_TOPIC,
-                bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(','),
-                auto_offset_reset='earliest',
-                group_id=GROUP_ID,
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')),
-                consumer_timeout_ms=1000
-            )
-            current_app.logger.info(f"Kafka consumer connected to topic '{RESERVATIONS_TOPIC}'.")
-
-            while True: # Keep consuming messages
-                # Check for stop signal if you implement one
-                # if stop_event.is_set():
-                #    break
-
-                for message in consumer:
-                    try:
-                        reservation_data = message.value
-                        current_app.logger.info(f"Received reservation message: {reservation_data}")
-
-                        # --- Process the message ---
-                        user_id = reservation_data.get('user_id')
-                        status = reservation_data.get('status')
-
-                        if user_id and status == 'cancelled':
-                            user = User.query.get(user_id)
-                            if user:
-                                current_app.logger.info(f"Processing cancellation for user {user_id}")
-                                # db.session.commit() # Commit if changes were made
-                            else:
-                                current_app.logger.warning(f"User {user_id} not found for cancellation.")
-
-                    except json.JSONDecodeError:
-                        current_app.logger.error(f"Failed to decode JSON message: {message.value}")
-                    except Exception as e:
-                        # This exception handling is now INSIDE the app context
-                        current_app.logger.error(f"Error processing Kafka message: {e}", exc_info=True)
-
-                # Optional sleep if consumer_timeout_ms is not used or is long
-                # time.sleep(0.1)
-
-    except Exception as e:
-        # Log general consumer errors (like connection issues)
-        # Use the passed 'app' object's logger if current_app is unavailable
-        logger_instance = current_app.logger if current_app else app.logger
-        logger_instance.error(f"Kafka consumer error: {e}", exc_info=True)
-    finally:
-        if consumer:
-            consumer.close()
-            logger_instance = current_app.logger if current_app else app.logger
-            logger_instance.info("Kafka consumer closed.")
-
-
-def start_kafka_consumer_thread(app):
-    """Starts the Kafka consumer in a background daemon thread."""
-    global consumer_thread_started
-
-    with consumer_thread_lock:
-        if consumer_thread_started:
-            logger.info("Kafka consumer thread already running. Skipping initialization.")
-            return
-
-        consumer_thread_started = True
-        current_app.logger.info(f"Starting Kafka consumer thread for topic '{RESERVATIONS_TOPIC}', group '{GROUP_ID}'...")
-        # Pass the app instance to the target function
-        thread = threading.Thread(target=consume_reservations, args=(app,), daemon=True)
-        thread.start()
-        current_app.logger.info("Kafka consumer background thread initiated.")
-        return thread
-
-def start_kafka_consumer(app):
-    """Starts the Kafka consumer in a background thread."""
-    global consumer_thread_started
-
-    with consumer_thread_lock:
-        if consumer_thread_started:
-            logger.info("Kafka consumer thread already running. Skipping initialization.")
-            return
-
-        consumer_thread_started = True
-        logger.info(f"Starting Kafka consumer thread for topic '{RESERVATIONS_TOPIC}', group '{GROUP_ID}'...")
-        # Pass the app instance to the target function
-        thread = threading.Thread(target=consume_reservations, args=(app,), daemon=True)
-        thread.start()
-        logger.info("Kafka consumer background thread initiated.")
-
@@ -0,0 +1,75 @@
+import json
+import logging
+from flask import current_app
+
+from .event_bus import EventBusError, get_event_bus
+
+logger = logging.getLogger(__name__)
+producer = None
+
+def get_kafka_producer():
+    """Initializes and returns the event bus producer (a KafkaProducer with the kafka backend)."""
+    global producer
+    if producer is None:
+        event_bus = get_event_bus()
+        if event_bus is None:
+            logger.error("KAFKA_BOOTSTRAP_SERVERS not configured.")
+            return None
+        try:
+            producer = event_bus.producer( # Options below tune the kafka backend; the others ignore them
+                retries=5, # Retry sending messages on failure
+                acks='all' # Wait for all replicas to acknowledge
+            )
+            logger.info(f"Event producer initialized: {type(producer).__name__}")
+        except EventBusError as e:
+            logger.error(f"Failed to initialize event producer: {e}")
+            producer = None # Ensure producer remains None on failure
+    return producer
+
+def encode_key(key):
+    return str(key).encode('utf-8') if key else None
+
+def encode_value(event):
+    return json.dumps(event).encode('utf-8')
+
+def send_user_event(event_type, user_data):
+    """Sends a user event (e.g. USER_ROLE_UPDATED, USER_DELETED) to the users topic.
+
+    Other services cache user details and drop their entry for `user_data['id']` on these events.
+    """
+    kafka_producer = get_kafka_producer()
+    topic = current_app.config.get('KAFKA_USERS_TOPIC')
+
+    if not kafka_producer or not topic:
+        logger.error("Kafka producer or topic not available. Cannot send event.")
+        return
+
+    event = {"type": event_type, "payload": user_data}
+    try:
+        future = kafka_producer.send(topic, key=encode_key(user_data.get('id')), value=encode_value(event))
+        future.add_errback(on_send_error)
+        logger.info(f"Sent '{event_type}' event for user {user_data.get('id')} to Kafka topic '{topic}'")
+    except EventBusError as e:
+        logger.error(f"Failed to send event to Kafka topic '{topic}': {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while sending Kafka event: {e}")
+
+def on_send_error(excp):
+    logger.error('Error sending message to Kafka', exc_info=excp)
+
+def close_kafka_producer(timeout=10):
+    """Flush buffered events and close the producer (graceful shutdown)."""
+    global producer
+    if producer is not None:
+        try:
+            producer.flush(timeout=timeout)
+            producer.close(timeout=timeout)
+            logger.info("KafkaProducer closed.")
+        except Exception as e:
+            logger.error(f"Error closing KafkaProducer: {e}")
+        producer = None
+
+def reset_kafka_producer():
+    """Forget a producer inherited from the parent process; its I/O thread does not survive a fork."""
+    global producer
+    producer = None
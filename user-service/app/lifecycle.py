@@ -0,0 +1,33 @@
+import logging
+
+from . import db
+from .event_bus import reset_event_bus
+from .kafka_consumer import start_consumer_thread, stop_consumer_thread
+from .kafka_producer import close_kafka_producer, reset_kafka_producer
+from .service_client import reset_clients
+
+logger = logging.getLogger(__name__)
+
+
+def start_background_workers(app):
+    """Start the Kafka consumer of reservation events, unless run_consumer.py processes consume them."""
+    if app.config['KAFKA_CONSUMER_IN_WEB']:
+        start_consumer_thread(app)
+
+
+def init_worker_process(app):
+    """Re-create per-process resources in a worker forked from a preloaded app, then start its consumer."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)  # Pooled connections opened before the fork belong to the parent
+    reset_event_bus()
+    reset_kafka_producer()
+    reset_clients()
+    start_background_workers(app)
+    logger.info("Worker process initialized.")
+
+
+def shutdown(app):
+    """Stop the consumer and flush buffered Kafka events before the process exits."""
+    stop_consumer_thread()
+    close_kafka_producer()
@@ -11,6 +11,7 @@ class User(db.Model):  # Ensure User inherits from db.Model
     password = Column(String(256), nullable=False)  # Updated length to 256
     full_name = Column(String(128), nullable=True)
     role = Column(String(128), nullable=False, default="user")
+    claims_version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped when token claims change
     created_at = Column(DateTime, nullable=False, server_default=func.now())  # Automatically set current timestamp
 
     def __repr__(self):
@@ -26,3 +27,10 @@ class User(db.Model):  # Ensure User inherits from db.Model
             'role': self.role,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class ProcessedEvent(db.Model):
+    """Id of a consumed Kafka event, recorded with its handling so redelivered events are skipped."""
+    __tablename__ = "processed_event"
+    event_id = Column(String(64), primary_key=True)
+    processed_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
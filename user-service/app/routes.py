@@ -13,6 +13,7 @@ from .decorators import token_required, role_required  # Import both token_requi
 
 from functools import wraps
 from .jwt_utils import token_required  # Import token_required for base authentication
+from .kafka_producer import send_user_event  # Lets other services invalidate cached user details
 
 import logging
 logging.basicConfig(level=logging.DEBUG)
@@ -73,8 +74,10 @@ def update_user_role(user_id, target_user_id, token):
 
     try:
         user.role = new_role
+        user.claims_version += 1  # Refresh tokens issued with the old role stop working
         db.session.commit()
         current_app.logger.info(f"User ID {target_user_id} role updated to {new_role}.")
+        send_user_event("USER_ROLE_UPDATED", {"id": user.id, "role": user.role})
         return jsonify({"message": "User role updated successfully", "user": user.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -97,6 +100,7 @@ def delete_user(user_id, target_user_id, token):
         db.session.delete(user)
         db.session.commit()
         current_app.logger.info(f"User ID {target_user_id} deleted successfully.")
+        send_user_event("USER_DELETED", {"id": target_user_id})
         return jsonify({"message": "User deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,231 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Services this service calls: name -> (environment variable with the base URL, default URL)
+DEPENDENCIES = {
+    "google": ("GOOGLE_API_URL", "https://www.googleapis.com"),  # OAuth endpoints are called with absolute URLs
+}
+
+REQUEST_LATENCY = Histogram(
+    'service_client_request_seconds', 'Latency of outgoing requests to other services', ['dependency']
+)
+REQUEST_ERRORS = Counter(
+    'service_client_errors_total', 'Failed outgoing requests by reason', ['dependency', 'reason']
+)  # reason: timeout, connection, status (5xx) or circuit_open
+CIRCUIT_OPEN = Gauge(
+    'service_client_circuit_open', '1 while the circuit breaker of a dependency is open', ['dependency']
+)
+RETRIES_DENIED = Counter(
+    'service_client_retries_denied_total', 'Retries not attempted because the retry budget of a dependency was spent',
+    ['dependency']
+)
+
+clients = {}
+clients_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without calling the dependency while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast for `reset_timeout` seconds.
+
+    After the timeout a single trial request is let through: success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True  # Half-open: let one request probe the dependency
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+        CIRCUIT_OPEN.labels(self.name).set(0)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is None and self.failures < self.failure_threshold:
+                return
+            if self.opened_at is None:
+                logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        CIRCUIT_OPEN.labels(self.name).set(1)
+
+
+class RetryBudget:
+    """Token bucket shared by every request to one dependency, limiting retries to a fraction of the traffic.
+
+    Each request deposits `ratio` tokens and each retry spends one, so while a dependency fails retries
+    add at most `ratio` extra load instead of multiplying it. `min_per_second` tokens also accrue over
+    time so a quiet client can still retry; the balance never exceeds `capacity`.
+    """
+
+    def __init__(self, name, ratio=0.1, min_per_second=1.0, capacity=10):
+        self.name = name
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount=0.0):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + amount + (now - self.updated_at) * self.min_per_second)
+        self.updated_at = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self):
+        """Spend a token for one retry. Returns False when the budget is exhausted."""
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class BudgetedRetry(Retry):
+    """urllib3 Retry that also spends a RetryBudget token for every retry; without one the request fails as if out of retries."""
+
+    def __init__(self, *args, budget=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.budget = self.budget
+        return retry
+
+    def increment(self, *args, **kwargs):
+        if self.budget is not None and not self.is_exhausted() and not self.budget.withdraw():
+            RETRIES_DENIED.labels(self.budget.name).inc()
+            return Retry.increment(self.new(total=0), *args, **kwargs)  # Out of retries: raises MaxRetryError
+        return super().increment(*args, **kwargs)
+
+
+class ServiceClient:
+    """HTTP client for one dependency: pooled keep-alive connections, timeouts, retries and a circuit breaker.
+
+    Idempotent requests are retried on connection errors and 502/503/504 with exponential backoff,
+    as long as the dependency's retry budget allows.
+    Timeouts, connection errors and 5xx responses count as failures for the circuit breaker.
+    """
+
+    def __init__(self, name, base_url, connect_timeout=1.0, read_timeout=3.0, retries=2, backoff_factor=0.2,
+                 pool_size=20, failure_threshold=5, reset_timeout=30, retry_budget_ratio=0.1, retry_budget_min_per_second=1.0):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.retry_budget = RetryBudget(name, retry_budget_ratio, retry_budget_min_per_second)
+
+        retry = BudgetedRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+            raise_on_status=False,
+            budget=self.retry_budget
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        """Send a request to `path` (relative to the base URL, or absolute). Raises RequestException on failure."""
+        if not self.breaker.allow():
+            REQUEST_ERRORS.labels(self.name, 'circuit_open').inc()
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit breaker open)")
+
+        self.retry_budget.deposit()
+        url = path if path.startswith(('http://', 'https://')) else f"{self.base_url}{path}"
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.Timeout:
+            REQUEST_ERRORS.labels(self.name, 'timeout').inc()
+            self.breaker.record_failure()
+            raise
+        except requests.exceptions.RequestException:
+            REQUEST_ERRORS.labels(self.name, 'connection').inc()
+            self.breaker.record_failure()
+            raise
+        finally:
+            REQUEST_LATENCY.labels(self.name).observe(time.perf_counter() - started)
+
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(self.name, 'status').inc()
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+
+def get_service_client(name):
+    """Return the shared ServiceClient of a dependency listed in DEPENDENCIES, configured from the environment."""
+    with clients_lock:
+        if name not in clients:
+            url_variable, default_url = DEPENDENCIES[name]
+            clients[name] = ServiceClient(
+                name,
+                os.getenv(url_variable, default_url),
+                connect_timeout=float(os.getenv('SERVICE_CLIENT_CONNECT_TIMEOUT', 1.0)),
+                read_timeout=float(os.getenv('SERVICE_CLIENT_READ_TIMEOUT', 3.0)),
+                retries=int(os.getenv('SERVICE_CLIENT_RETRIES', 2)),
+                pool_size=int(os.getenv('SERVICE_CLIENT_POOL_SIZE', 20)),
+                failure_threshold=int(os.getenv('SERVICE_CLIENT_FAILURE_THRESHOLD', 5)),
+                reset_timeout=float(os.getenv('SERVICE_CLIENT_RESET_TIMEOUT', 30)),
+                retry_budget_ratio=float(os.getenv('SERVICE_CLIENT_RETRY_BUDGET_RATIO', 0.1)),
+                retry_budget_min_per_second=float(os.getenv('SERVICE_CLIENT_RETRY_BUDGET_MIN_PER_SECOND', 1.0))
+            )
+        return clients[name]
+
+
+def reset_clients():
+    """Forget clients created before a fork; their pooled connections belong to the parent process."""
+    global clients_lock
+    clients.clear()
+    clients_lock = threading.Lock()  # May have been copied while held
@@ -7,17 +7,27 @@ dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust pat
 load_dotenv(dotenv_path=dotenv_path)
 
 from app import create_app
-# Import consumer start/stop functions
-from app.kafka_consumer import start_consumer_thread, stop_consumer_thread
+from prometheus_flask_exporter import PrometheusMetrics
+from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+# Import the background worker start/stop functions
+from app.lifecycle import start_background_workers, shutdown
 
 app = create_app()
+# Initialize Prometheus metrics (also exposes the outgoing HTTP client metrics)
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    # Several worker processes (gunicorn.conf.py): metrics are aggregated across them
+    metrics = GunicornInternalPrometheusMetrics(app, path='/metrics')
+else:
+    metrics = PrometheusMetrics(app, path='/metrics')
+metrics.info('user_service_info', 'User Service Information', version='1.0.0')
 
-# Start Kafka consumer thread in the main process after app creation
-# Ensure this runs only once, e.g., not in Flask's reloader process
-if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-    start_consumer_thread(app)
-    # Register cleanup function
-    atexit.register(stop_consumer_thread)
+# Start the Kafka consumer thread (its only start point besides gunicorn's post_fork hook)
+# Ensure this runs only once, e.g., not in Flask's reloader process; under gunicorn it is
+# started in each worker after the fork instead (see gunicorn.conf.py)
+if app.config['START_BACKGROUND_WORKERS'] and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    start_background_workers(app)
+    # Register cleanup function: finish the current batch, commit its offsets and leave the group
+    atexit.register(shutdown, app)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,60 @@
+import os
+import signal
+import shutil
+import argparse
+import multiprocessing
+from dotenv import load_dotenv
+
+# Load environment variables from .env file located in the parent directory
+dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env') # Adjust path if .env is elsewhere
+load_dotenv(dotenv_path=dotenv_path)
+os.environ["START_BACKGROUND_WORKERS"] = "false" # Each process runs the consumer loop itself
+
+# Consumer metrics of all processes are aggregated through files in this directory
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-user-consumer')
+
+
+def consumer_process():
+    """Run one member of the consumer group until SIGTERM; it owns a share of the partitions."""
+    from app import create_app
+    from app.kafka_consumer import consume_events, stop_consumer
+    from app.kafka_producer import close_kafka_producer
+
+    signal.signal(signal.SIGTERM, stop_consumer)
+    signal.signal(signal.SIGINT, stop_consumer)
+    app = create_app()
+    consume_events(app)
+    close_kafka_producer() # Flush dead letters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Consume reservation events with several processes in one consumer group')
+    parser.add_argument('--processes', type=int, default=int(os.getenv('KAFKA_CONSUMER_PROCESSES', os.cpu_count() or 1)),
+                        help='Consumer processes; more than the topic has partitions leaves some idle')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('KAFKA_CONSUMER_METRICS_PORT', 9104)), help='Port for Prometheus metrics')
+    args = parser.parse_args()
+
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+    processes = [multiprocessing.Process(target=consumer_process, name=f'consumer-{i}') for i in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    def stop(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate() # SIGTERM: finish the batch, commit and leave the group
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(args.metrics_port, registry=registry)
+    print(f"Started {args.processes} consumer processes; metrics at http://0.0.0.0:{args.metrics_port}/metrics")
+
+    for process in processes:
+        process.join()
+        multiprocess.mark_process_dead(process.pid)